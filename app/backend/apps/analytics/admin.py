@@ -1,3 +1,18 @@
 from django.contrib import admin
+from apps.core.pagination import EstimatedCountPaginator
+from .models import DailyRollup
 
-# Analytics app doesn't have models, so no admin registration needed
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    """Read-only admin for the derived daily rollups"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_display = [
+        'user', 'date', 'weight', 'calories_in', 'meals_count',
+        'calories_burned', 'workouts_count', 'updated_at'
+    ]
+    list_filter = ['date']
+    search_fields = ['user__email']
+    date_hierarchy = 'date'
+    readonly_fields = [field.name for field in DailyRollup._meta.fields]
@@ -0,0 +1,73 @@
+"""
+Per-user response cache for analytics and recommendation views
+
+Entries are keyed by user, endpoint, query parameters, the current day and
+a per-user data version. Any write to the user's data bumps the version, so
+stale entries are never read again and simply expire from the cache. The
+version is stored in the database, so a write handled by one worker
+invalidates the entries every other worker holds in its local cache.
+"""
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from apps.core.versions import bump_version, get_version, get_versions
+
+
+VERSION_KEY = 'user-data-version:{user_id}'
+RESPONSE_KEY = 'user-response:{user_id}:{digest}'
+
+
+def get_data_version(user_id):
+    """Return the current data version of a user"""
+    return get_version(VERSION_KEY.format(user_id=user_id))
+
+
+def bump_data_version(user_id):
+    """Invalidate a user's cached responses once the current transaction commits"""
+    if user_id is not None:
+        bump_version(VERSION_KEY.format(user_id=user_id))
+
+
+def cache_user_response(view_method=None, *, shared_versions=()):
+    """
+    Cache successful responses of an APIView method per user
+
+    The cached value is the response data; only 200 responses are stored.
+    Responses that also depend on shared data name its version keys in
+    shared_versions, e.g. @cache_user_response(shared_versions=[CATALOG_VERSION_KEY]);
+    all versions are read in one query.
+    """
+    if view_method is None:
+        return lambda method: cache_user_response(method, shared_versions=shared_versions)
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        user_id = request.user.pk
+        params = sorted(
+            (name, sorted(values)) for name, values in request.query_params.lists()
+        )
+        version_keys = [VERSION_KEY.format(user_id=user_id), *shared_versions]
+        versions = get_versions(version_keys)
+        raw_key = '{}|{}|{}|{}'.format(
+            request.path, params, timezone.localdate(),
+            [versions[key] for key in version_keys]
+        )
+        key = RESPONSE_KEY.format(
+            user_id=user_id,
+            digest=hashlib.md5(raw_key.encode()).hexdigest()
+        )
+
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.USER_RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
@@ -0,0 +1,38 @@
+"""
+Django管理コマンド: 日次集計（DailyRollup）の再構築
+"""
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from apps.analytics.rollups import DailyRollupService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = '測定・食事・ワークアウトの記録から日次集計テーブルを再構築'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='指定したユーザーIDの集計のみ再構築'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='bulk_createの1バッチあたりの行数'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        if options['user']:
+            user_ids = user_ids.filter(pk=options['user'])
+
+        total_rows = 0
+        for user_id in user_ids.iterator():
+            rows = DailyRollupService.rebuild(user_id, batch_size=options['batch_size'])
+            total_rows += rows
+            self.stdout.write(f"  ユーザー {user_id}: {rows}日分")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ 再構築完了: {total_rows}行"))
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "weight",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=5, null=True
+                    ),
+                ),
+                (
+                    "body_fat_percentage",
+                    models.DecimalField(
+                        blank=True, decimal_places=1, max_digits=4, null=True
+                    ),
+                ),
+                (
+                    "calories_in",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=8),
+                ),
+                (
+                    "protein",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=7),
+                ),
+                (
+                    "carbs",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=7),
+                ),
+                (
+                    "fats",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=7),
+                ),
+                ("meals_count", models.IntegerField(default=0)),
+                (
+                    "calories_burned",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=8),
+                ),
+                ("workouts_count", models.IntegerField(default=0)),
+                ("workouts_completed", models.IntegerField(default=0)),
+                ("workout_duration_minutes", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "unique_together": {("user", "date")},
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    BodyMeasurement = apps.get_model("measurements", "BodyMeasurement")
+    Meal = apps.get_model("nutrition", "Meal")
+    Workout = apps.get_model("workouts", "Workout")
+    DailyRollup = apps.get_model("analytics", "DailyRollup")
+
+    user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(user_ids), 500):
+        chunk = user_ids[start : start + 500]
+        rows = {}
+
+        def row_for(user_id, date):
+            key = (user_id, date)
+            if key not in rows:
+                rows[key] = DailyRollup(user_id=user_id, date=date)
+            return rows[key]
+
+        for m in BodyMeasurement.objects.filter(user_id__in=chunk).values(
+            "user_id", "date", "weight", "body_fat_percentage"
+        ):
+            row = row_for(m["user_id"], m["date"])
+            row.weight = m["weight"]
+            row.body_fat_percentage = m["body_fat_percentage"]
+
+        meals = (
+            Meal.objects.filter(user_id__in=chunk)
+            .values("user_id", "date")
+            .annotate(
+                calories_in=Sum("total_calories"),
+                protein=Sum("total_protein"),
+                carbs=Sum("total_carbs"),
+                fats=Sum("total_fats"),
+                meals_count=Count("id"),
+            )
+            .order_by()
+        )
+        for m in meals:
+            row = row_for(m["user_id"], m["date"])
+            row.calories_in = m["calories_in"] or 0
+            row.protein = m["protein"] or 0
+            row.carbs = m["carbs"] or 0
+            row.fats = m["fats"] or 0
+            row.meals_count = m["meals_count"]
+
+        workouts = (
+            Workout.objects.filter(user_id__in=chunk)
+            .values("user_id", "date")
+            .annotate(
+                calories_burned=Sum("total_calories_burned"),
+                workouts_count=Count("id"),
+                workouts_completed=Count("id", filter=Q(completed=True)),
+                workout_duration_minutes=Sum("duration_minutes"),
+            )
+            .order_by()
+        )
+        for w in workouts:
+            row = row_for(w["user_id"], w["date"])
+            row.calories_burned = w["calories_burned"] or 0
+            row.workouts_count = w["workouts_count"]
+            row.workouts_completed = w["workouts_completed"]
+            row.workout_duration_minutes = w["workout_duration_minutes"] or 0
+
+        DailyRollup.objects.filter(user_id__in=chunk).delete()
+        DailyRollup.objects.bulk_create(rows.values(), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics", "0001_initial"),
+        ("measurements", "0003_alter_bodymeasurement_options_and_more"),
+        (
+            "nutrition",
+            "0007_meal_total_calories_meal_total_carbs_meal_total_fats_and_more",
+        ),
+        ("workouts", "0009_workoutexercise_calories_burned"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
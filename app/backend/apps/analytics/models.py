@@ -1,4 +1,42 @@
 from django.db import models
+from django.conf import settings
 
-# Analytics app doesn't need models as it will use data from other apps
-# All calculations will be done in views/services
+
+class DailyRollup(models.Model):
+    """
+    Per-user, per-day summary of measurements, nutrition and workouts.
+    Maintained incrementally from the source apps (see signals.py) so that
+    analytics reports can range-scan one narrow row per day.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups'
+    )
+    date = models.DateField()
+    
+    # Body measurements
+    weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    body_fat_percentage = models.DecimalField(max_digits=4, decimal_places=1, null=True, blank=True)
+    
+    # Nutrition intake
+    calories_in = models.DecimalField(max_digits=8, decimal_places=1, default=0)
+    protein = models.DecimalField(max_digits=7, decimal_places=1, default=0)
+    carbs = models.DecimalField(max_digits=7, decimal_places=1, default=0)
+    fats = models.DecimalField(max_digits=7, decimal_places=1, default=0)
+    meals_count = models.IntegerField(default=0)
+    
+    # Workouts
+    calories_burned = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    workouts_count = models.IntegerField(default=0)
+    workouts_completed = models.IntegerField(default=0)
+    workout_duration_minutes = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['user', 'date']
+
+    def __str__(self):
+        return f"{self.user.email} - {self.date}"
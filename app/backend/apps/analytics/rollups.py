@@ -0,0 +1,172 @@
+"""
+Maintenance of the per-user daily rollup table used by analytics reports
+"""
+import threading
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from apps.measurements.models import BodyMeasurement
+from apps.nutrition.models import Meal
+from apps.workouts.models import Workout
+from .models import DailyRollup
+
+
+ROLLUP_FIELDS = [
+    'weight', 'body_fat_percentage',
+    'calories_in', 'protein', 'carbs', 'fats', 'meals_count',
+    'calories_burned', 'workouts_count', 'workouts_completed',
+    'workout_duration_minutes',
+]
+
+# (user_id, date) pairs waiting for the current transaction to commit
+_pending = threading.local()
+
+
+class DailyRollupService:
+    """Recompute DailyRollup rows from the source tables"""
+
+    @staticmethod
+    def _collect(user_id, dates=None):
+        """
+        Aggregate the source tables into rollup field values per date
+
+        Args:
+            user_id: ID of the user
+            dates: Iterable of dates to collect, or None for the full history
+
+        Returns:
+            dict mapping date to a dict of rollup field values
+        """
+        date_filter = Q(user_id=user_id)
+        if dates is not None:
+            date_filter &= Q(date__in=list(dates))
+
+        rows = {}
+
+        def row_for(date):
+            if date not in rows:
+                rows[date] = {
+                    'weight': None,
+                    'body_fat_percentage': None,
+                    'calories_in': 0,
+                    'protein': 0,
+                    'carbs': 0,
+                    'fats': 0,
+                    'meals_count': 0,
+                    'calories_burned': 0,
+                    'workouts_count': 0,
+                    'workouts_completed': 0,
+                    'workout_duration_minutes': 0,
+                }
+            return rows[date]
+
+        # One measurement per user per day (unique_together)
+        measurements = BodyMeasurement.objects.filter(date_filter).values(
+            'date', 'weight', 'body_fat_percentage'
+        )
+        for m in measurements:
+            row = row_for(m['date'])
+            row['weight'] = m['weight']
+            row['body_fat_percentage'] = m['body_fat_percentage']
+
+        meals = Meal.objects.filter(date_filter).values('date').annotate(
+            calories_in=Sum('total_calories'),
+            protein=Sum('total_protein'),
+            carbs=Sum('total_carbs'),
+            fats=Sum('total_fats'),
+            meals_count=Count('id')
+        ).order_by()
+        for m in meals:
+            row = row_for(m['date'])
+            row['calories_in'] = m['calories_in'] or 0
+            row['protein'] = m['protein'] or 0
+            row['carbs'] = m['carbs'] or 0
+            row['fats'] = m['fats'] or 0
+            row['meals_count'] = m['meals_count']
+
+        workouts = Workout.objects.filter(date_filter).values('date').annotate(
+            calories_burned=Sum('total_calories_burned'),
+            workouts_count=Count('id'),
+            workouts_completed=Count('id', filter=Q(completed=True)),
+            workout_duration_minutes=Sum('duration_minutes')
+        ).order_by()
+        for w in workouts:
+            row = row_for(w['date'])
+            row['calories_burned'] = w['calories_burned'] or 0
+            row['workouts_count'] = w['workouts_count']
+            row['workouts_completed'] = w['workouts_completed']
+            row['workout_duration_minutes'] = w['workout_duration_minutes'] or 0
+
+        return rows
+
+    @classmethod
+    def refresh(cls, user_id, dates):
+        """Recompute the rollup rows of a user for the given dates"""
+        dates = set(dates)
+        if not dates:
+            return
+
+        rows = cls._collect(user_id, dates)
+
+        with transaction.atomic():
+            if rows:
+                DailyRollup.objects.bulk_create(
+                    [
+                        DailyRollup(user_id=user_id, date=date, **values)
+                        for date, values in rows.items()
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['user', 'date'],
+                    update_fields=ROLLUP_FIELDS + ['updated_at'],
+                )
+
+            # Days that no longer have any source data
+            empty_dates = dates - set(rows)
+            if empty_dates:
+                DailyRollup.objects.filter(user_id=user_id, date__in=empty_dates).delete()
+
+    @classmethod
+    def rebuild(cls, user_id, batch_size=1000):
+        """Rebuild every rollup row of a user from scratch"""
+        rows = cls._collect(user_id)
+
+        with transaction.atomic():
+            DailyRollup.objects.filter(user_id=user_id).delete()
+            DailyRollup.objects.bulk_create(
+                [
+                    DailyRollup(user_id=user_id, date=date, **values)
+                    for date, values in rows.items()
+                ],
+                batch_size=batch_size,
+            )
+
+        return len(rows)
+
+    @classmethod
+    def schedule_refresh(cls, user_id, *dates):
+        """
+        Refresh the given days once the current transaction commits.
+
+        Keys are collected per thread so that a burst of writes touching the
+        same day (e.g. several meal items) results in a single recomputation.
+        """
+        pending = getattr(_pending, 'keys', None)
+        if pending is None:
+            pending = _pending.keys = set()
+        for date in dates:
+            if date is not None:
+                pending.add((user_id, date))
+        transaction.on_commit(cls._flush_pending)
+
+    @classmethod
+    def _flush_pending(cls):
+        """Refresh every scheduled (user, date) pair"""
+        pending = getattr(_pending, 'keys', None)
+        if not pending:
+            return
+        _pending.keys = set()
+
+        dates_by_user = {}
+        for user_id, date in pending:
+            dates_by_user.setdefault(user_id, set()).add(date)
+        for user_id, dates in dates_by_user.items():
+            cls.refresh(user_id, dates)
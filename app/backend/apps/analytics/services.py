@@ -1,13 +1,12 @@
 """
 Analytics service for calculating BMR, TDEE, and other metrics
 """
-from datetime import datetime, timedelta
-from django.db import models
-from django.db.models import Avg, Sum, Count
+from datetime import timedelta
+from django.db.models import Count, Q
 from django.utils import timezone
 from apps.measurements.models import BodyMeasurement
-from apps.nutrition.models import Meal
-from apps.workouts.models import Workout
+from .models import DailyRollup
+from .rollups import ROLLUP_FIELDS
 
 
 class MetabolismCalculator:
@@ -182,77 +181,54 @@ class MacroCalculator:
 
 
 class ProgressAnalyzer:
-    """Analyze user progress over time"""
+    """Analyze user progress over time from the per-day rollups"""
+    
+    EXERCISE_TYPE_LABELS = {
+        'strength': '筋力トレーニング',
+        'cardio': '有酸素運動',
+        'flexibility': '柔軟性',
+        'balance': 'バランス',
+        'sports': 'スポーツ',
+    }
     
     @staticmethod
-    def get_weight_progress_by_date(user, start_date, end_date):
-        """Get weight progress for specific date range"""
-        measurements = BodyMeasurement.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).order_by('date').values('date', 'weight')
-        
-        if not measurements:
-            return None
-        
-        data_list = list(measurements)
-        first_weight = float(data_list[0]['weight'])
-        last_weight = float(data_list[-1]['weight'])
-        weight_change = last_weight - first_weight
-        
-        # Create dict of existing measurements
-        data_dict = {m['date']: float(m['weight']) for m in data_list}
-        
-        # Fill all dates in range
-        filled_data = []
-        current = start_date
-        while current <= end_date:
-            filled_data.append({
-                'date': current,
-                'weight': data_dict.get(current)
-            })
-            current += timedelta(days=1)
-        
-        return {
-            'data': filled_data,
-            'start_weight': first_weight,
-            'current_weight': last_weight,
-            'weight_change': round(weight_change, 2),
-            'percentage_change': round((weight_change / first_weight) * 100, 2) if first_weight > 0 else 0,
-        }
+    def _rollup_rows(user, start_date, end_date=None):
+        """Fetch a user's daily rollups for a date range in one query"""
+        rollups = DailyRollup.objects.filter(user=user, date__gte=start_date)
+        if end_date:
+            rollups = rollups.filter(date__lte=end_date)
+        return list(rollups.order_by('date').values('date', *ROLLUP_FIELDS))
     
     @staticmethod
-    def get_weight_progress(user, days=30):
-        """Get weight progress over specified days"""
-        start_date = timezone.now().date() - timedelta(days=days)
-        
-        measurements = BodyMeasurement.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).order_by('date').values('date', 'weight')
-        
-        if not measurements:
+    def _fill_dates(start, end, values, empty=None):
+        """List one entry per day between start and end, using values[date] when present"""
+        filled = []
+        current = start
+        while current <= end:
+            filled.append((current, values.get(current, empty)))
+            current += timedelta(days=1)
+        return filled
+    
+    @classmethod
+    def _build_weight_progress(cls, rows, start_date=None, end_date=None):
+        """Weight progress from rollup rows; fills start..end or first..last measurement"""
+        measured = [row for row in rows if row['weight'] is not None]
+        if not measured:
             return None
         
-        data_list = list(measurements)
-        first_weight = float(data_list[0]['weight'])
-        last_weight = float(data_list[-1]['weight'])
+        first_weight = float(measured[0]['weight'])
+        last_weight = float(measured[-1]['weight'])
         weight_change = last_weight - first_weight
         
-        # Create dict of existing measurements
-        data_dict = {m['date']: float(m['weight']) for m in data_list}
-        
-        # Fill all dates between first and last
-        filled_data = []
-        current = data_list[0]['date']
-        end = data_list[-1]['date']
-        while current <= end:
-            filled_data.append({
-                'date': current,
-                'weight': data_dict.get(current)
-            })
-            current += timedelta(days=1)
+        data_dict = {row['date']: float(row['weight']) for row in measured}
+        filled_data = [
+            {'date': date, 'weight': weight}
+            for date, weight in cls._fill_dates(
+                start_date or measured[0]['date'],
+                end_date or measured[-1]['date'],
+                data_dict
+            )
+        ]
         
         return {
             'data': filled_data,
@@ -260,23 +236,17 @@ class ProgressAnalyzer:
             'current_weight': last_weight,
             'weight_change': round(weight_change, 2),
             'percentage_change': round((weight_change / first_weight) * 100, 2) if first_weight > 0 else 0,
-            'days': days
         }
     
-    @staticmethod
-    def get_body_composition_progress_by_date(user, start_date, end_date):
-        """Get body composition progress for specific date range"""
-        measurements = BodyMeasurement.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).order_by('date')
-        
-        if not measurements:
+    @classmethod
+    def _build_body_composition(cls, rows, start_date=None, end_date=None):
+        """Body composition progress from rollup rows; fills like _build_weight_progress"""
+        measured = [row for row in rows if row['weight'] is not None]
+        if not measured:
             return None
         
-        first = measurements.first()
-        last = measurements.last()
+        first = measured[0]
+        last = measured[-1]
         
         result = {
             'body_fat_change': None,
@@ -284,132 +254,48 @@ class ProgressAnalyzer:
             'measurements': []
         }
         
-        if first.body_fat_percentage and last.body_fat_percentage:
-            result['body_fat_change'] = round(
-                float(last.body_fat_percentage) - float(first.body_fat_percentage), 2
-            )
-            result['start_body_fat'] = float(first.body_fat_percentage)
-            result['current_body_fat'] = float(last.body_fat_percentage)
-        
-        # Calculate estimated muscle mass (weight * (1 - body_fat_percentage))
-        if first.body_fat_percentage and last.body_fat_percentage:
-            first_muscle = float(first.weight) * (1 - float(first.body_fat_percentage) / 100)
-            last_muscle = float(last.weight) * (1 - float(last.body_fat_percentage) / 100)
+        if first['body_fat_percentage'] and last['body_fat_percentage']:
+            first_body_fat = float(first['body_fat_percentage'])
+            last_body_fat = float(last['body_fat_percentage'])
+            result['body_fat_change'] = round(last_body_fat - first_body_fat, 2)
+            result['start_body_fat'] = first_body_fat
+            result['current_body_fat'] = last_body_fat
+            
+            # Calculate estimated muscle mass (weight * (1 - body_fat_percentage))
+            first_muscle = float(first['weight']) * (1 - first_body_fat / 100)
+            last_muscle = float(last['weight']) * (1 - last_body_fat / 100)
             result['muscle_mass_change'] = round(last_muscle - first_muscle, 2)
         
-        # Create dict of existing measurements
-        meas_dict = {}
-        for m in measurements:
-            meas_dict[m.date] = {
-                'weight': float(m.weight),
-                'body_fat_percentage': float(m.body_fat_percentage) if m.body_fat_percentage else None
+        meas_dict = {
+            row['date']: {
+                'weight': float(row['weight']),
+                'body_fat_percentage': float(row['body_fat_percentage']) if row['body_fat_percentage'] else None
             }
-        
-        # Fill all dates in range
-        current = start_date
-        while current <= end_date:
-            if current in meas_dict:
-                result['measurements'].append({
-                    'date': current,
-                    'weight': meas_dict[current]['weight'],
-                    'body_fat_percentage': meas_dict[current]['body_fat_percentage']
-                })
-            else:
-                result['measurements'].append({
-                    'date': current,
-                    'weight': None,
-                    'body_fat_percentage': None
-                })
-            current += timedelta(days=1)
-        
-        return result
-    
-    @staticmethod
-    def get_body_composition_progress(user, days=30):
-        """Get body composition progress"""
-        start_date = timezone.now().date() - timedelta(days=days)
-        
-        measurements = BodyMeasurement.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).order_by('date')
-        
-        if not measurements:
-            return None
-        
-        first = measurements.first()
-        last = measurements.last()
-        
-        result = {
-            'body_fat_change': None,
-            'muscle_mass_change': None,
-            'measurements': []
+            for row in measured
         }
-        
-        if first.body_fat_percentage and last.body_fat_percentage:
-            result['body_fat_change'] = round(
-                float(last.body_fat_percentage) - float(first.body_fat_percentage), 2
+        empty = {'weight': None, 'body_fat_percentage': None}
+        result['measurements'] = [
+            {'date': date, **values}
+            for date, values in cls._fill_dates(
+                start_date or first['date'],
+                end_date or last['date'],
+                meas_dict,
+                empty
             )
-            result['start_body_fat'] = float(first.body_fat_percentage)
-            result['current_body_fat'] = float(last.body_fat_percentage)
-        
-        # Calculate estimated muscle mass (weight * (1 - body_fat_percentage))
-        if first.body_fat_percentage and last.body_fat_percentage:
-            first_muscle = float(first.weight) * (1 - float(first.body_fat_percentage) / 100)
-            last_muscle = float(last.weight) * (1 - float(last.body_fat_percentage) / 100)
-            result['muscle_mass_change'] = round(last_muscle - first_muscle, 2)
-        
-        # Create dict of existing measurements
-        meas_dict = {}
-        for m in measurements:
-            meas_dict[m.date] = {
-                'weight': float(m.weight),
-                'body_fat_percentage': float(m.body_fat_percentage) if m.body_fat_percentage else None
-            }
-        
-        # Fill all dates between first and last
-        current = first.date
-        end = last.date
-        while current <= end:
-            if current in meas_dict:
-                result['measurements'].append({
-                    'date': current,
-                    'weight': meas_dict[current]['weight'],
-                    'body_fat_percentage': meas_dict[current]['body_fat_percentage']
-                })
-            else:
-                result['measurements'].append({
-                    'date': current,
-                    'weight': None,
-                    'body_fat_percentage': None
-                })
-            current += timedelta(days=1)
+        ]
         
         return result
     
     @staticmethod
-    def get_nutrition_trends_by_date(user, start_date, end_date):
-        """Get nutrition trends for specific date range"""
-        # Get all meals in the date range
-        meals = Meal.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        )
-        
-        total_meals = meals.count()
+    def _build_nutrition_trends(rows):
+        """Average intake per logged meal from rollup rows"""
+        total_meals = sum(row['meals_count'] for row in rows)
         
-        # Calculate totals from meal properties
         if total_meals > 0:
-            total_calories = sum(meal.total_calories for meal in meals)
-            total_protein = sum(meal.total_protein for meal in meals)
-            total_carbs = sum(meal.total_carbs for meal in meals)
-            total_fats = sum(meal.total_fats for meal in meals)
-            
-            avg_calories = total_calories / total_meals
-            avg_protein = total_protein / total_meals
-            avg_carbs = total_carbs / total_meals
-            avg_fats = total_fats / total_meals
+            avg_calories = float(sum(row['calories_in'] for row in rows)) / total_meals
+            avg_protein = float(sum(row['protein'] for row in rows)) / total_meals
+            avg_carbs = float(sum(row['carbs'] for row in rows)) / total_meals
+            avg_fats = float(sum(row['fats'] for row in rows)) / total_meals
         else:
             avg_calories = avg_protein = avg_carbs = avg_fats = 0
         
@@ -422,293 +308,128 @@ class ProgressAnalyzer:
         }
     
     @staticmethod
-    def get_nutrition_trends(user, days=30):
-        """Get nutrition trends"""
-        start_date = timezone.now().date() - timedelta(days=days)
-        
-        # Get all meals in the date range
-        meals = Meal.objects.filter(
-            user=user,
-            date__gte=start_date
-        )
-        
-        total_meals = meals.count()
-        
-        # Calculate totals from meal properties
-        if total_meals > 0:
-            total_calories = sum(meal.total_calories for meal in meals)
-            total_protein = sum(meal.total_protein for meal in meals)
-            total_carbs = sum(meal.total_carbs for meal in meals)
-            total_fats = sum(meal.total_fats for meal in meals)
-            
-            avg_calories = total_calories / total_meals
-            avg_protein = total_protein / total_meals
-            avg_carbs = total_carbs / total_meals
-            avg_fats = total_fats / total_meals
-        else:
-            avg_calories = avg_protein = avg_carbs = avg_fats = 0
-        
-        return {
-            'average_daily_calories': round(avg_calories, 0),
-            'average_daily_protein': round(avg_protein, 1),
-            'average_daily_carbs': round(avg_carbs, 1),
-            'average_daily_fats': round(avg_fats, 1),
-            'total_meals_logged': total_meals,
-            'days': days
-        }
-    
-    @staticmethod
-    def get_workout_trends_by_date(user, start_date, end_date):
-        """Get workout trends for specific date range"""
-        workouts = Workout.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).aggregate(
-            total_workouts=Count('id'),
-            completed_workouts=Count('id', filter=models.Q(completed=True)),
-            total_duration=Sum('duration_minutes'),
-            total_calories=Sum('total_calories_burned'),
-            avg_duration=Avg('duration_minutes')
-        )
+    def _build_workout_trends(rows, days):
+        """Workout totals from rollup rows"""
+        total_workouts = sum(row['workouts_count'] for row in rows)
+        total_duration = sum(row['workout_duration_minutes'] for row in rows)
+        total_calories = float(sum(row['calories_burned'] for row in rows))
         
         # Calculate consistency based on unique workout days vs total days
-        unique_workout_days = Workout.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).values('date').distinct().count()
-        
-        days = (end_date - start_date).days + 1
-        consistency_rate = round((unique_workout_days / days * 100), 1) if days > 0 else 0
+        workout_days = sum(1 for row in rows if row['workouts_count'] > 0)
+        consistency_rate = round((workout_days / days * 100), 1) if days > 0 else 0
         
         return {
-            'total_workouts': workouts['total_workouts'],
-            'completed_workouts': workouts['completed_workouts'],
+            'total_workouts': total_workouts,
+            'completed_workouts': sum(row['workouts_completed'] for row in rows),
             'completion_rate': consistency_rate,
-            'total_duration_minutes': workouts['total_duration'] or 0,
-            'total_calories_burned': round(workouts['total_calories'] or 0, 0),
-            'average_duration_minutes': round(workouts['avg_duration'] or 0, 1),
+            'total_duration_minutes': total_duration,
+            'total_calories_burned': round(total_calories, 0),
+            'average_duration_minutes': round(total_duration / total_workouts, 1) if total_workouts else 0,
         }
     
-    @staticmethod
-    def get_workout_trends(user, days=30):
-        """Get workout trends"""
-        start_date = timezone.now().date() - timedelta(days=days)
-        
-        workouts = Workout.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).aggregate(
-            total_workouts=Count('id'),
-            completed_workouts=Count('id', filter=models.Q(completed=True)),
-            total_duration=Sum('duration_minutes'),
-            total_calories=Sum('total_calories_burned'),
-            avg_duration=Avg('duration_minutes')
-        )
-        
-        # Calculate consistency based on unique workout days vs total days
-        unique_workout_days = Workout.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).values('date').distinct().count()
-        
-        consistency_rate = round((unique_workout_days / days * 100), 1) if days > 0 else 0
-        
-        return {
-            'total_workouts': workouts['total_workouts'],
-            'completed_workouts': workouts['completed_workouts'],
-            'completion_rate': consistency_rate,
-            'total_duration_minutes': workouts['total_duration'] or 0,
-            'total_calories_burned': round(workouts['total_calories'] or 0, 0),
-            'average_duration_minutes': round(workouts['avg_duration'] or 0, 1),
-            'days': days
-        }
+    @classmethod
+    def get_weight_progress_by_date(cls, user, start_date, end_date, rows=None):
+        """Get weight progress for specific date range"""
+        if rows is None:
+            rows = cls._rollup_rows(user, start_date, end_date)
+        return cls._build_weight_progress(rows, start_date, end_date)
     
-    @staticmethod
-    def get_exercise_type_distribution_by_date(user, start_date, end_date):
-        """Get distribution of exercise types for specific date range"""
-        from apps.workouts.models import WorkoutExercise
-        
-        # Get all workout exercises in the period
-        workout_exercises = WorkoutExercise.objects.filter(
-            workout__user=user,
-            workout__date__gte=start_date,
-            workout__date__lte=end_date
-        ).select_related('exercise')
-        
-        # Count by exercise type
-        type_counts = {}
-        type_labels = {
-            'strength': '筋力トレーニング',
-            'cardio': '有酸素運動',
-            'flexibility': '柔軟性',
-            'balance': 'バランス',
-            'sports': 'スポーツ',
-        }
+    @classmethod
+    def get_weight_progress(cls, user, days=30, rows=None):
+        """Get weight progress over specified days"""
+        if rows is None:
+            rows = cls._rollup_rows(user, timezone.now().date() - timedelta(days=days))
         
-        for we in workout_exercises:
-            exercise_type = we.exercise.exercise_type
-            if exercise_type in type_counts:
-                type_counts[exercise_type] += 1
-            else:
-                type_counts[exercise_type] = 1
+        result = cls._build_weight_progress(rows)
+        if result:
+            result['days'] = days
+        return result
+    
+    @classmethod
+    def get_body_composition_progress_by_date(cls, user, start_date, end_date, rows=None):
+        """Get body composition progress for specific date range"""
+        if rows is None:
+            rows = cls._rollup_rows(user, start_date, end_date)
+        return cls._build_body_composition(rows, start_date, end_date)
+    
+    @classmethod
+    def get_body_composition_progress(cls, user, days=30, rows=None):
+        """Get body composition progress"""
+        if rows is None:
+            rows = cls._rollup_rows(user, timezone.now().date() - timedelta(days=days))
+        return cls._build_body_composition(rows)
+    
+    @classmethod
+    def get_nutrition_trends_by_date(cls, user, start_date, end_date, rows=None):
+        """Get nutrition trends for specific date range"""
+        if rows is None:
+            rows = cls._rollup_rows(user, start_date, end_date)
+        return cls._build_nutrition_trends(rows)
+    
+    @classmethod
+    def get_nutrition_trends(cls, user, days=30, rows=None):
+        """Get nutrition trends"""
+        if rows is None:
+            rows = cls._rollup_rows(user, timezone.now().date() - timedelta(days=days))
         
-        # Format for pie chart
-        result = []
-        for type_key, count in type_counts.items():
-            result.append({
-                'name': type_labels.get(type_key, type_key),
-                'value': count,
-                'type': type_key
-            })
+        result = cls._build_nutrition_trends(rows)
+        result['days'] = days
+        return result
+    
+    @classmethod
+    def get_workout_trends_by_date(cls, user, start_date, end_date, rows=None):
+        """Get workout trends for specific date range"""
+        if rows is None:
+            rows = cls._rollup_rows(user, start_date, end_date)
+        return cls._build_workout_trends(rows, (end_date - start_date).days + 1)
+    
+    @classmethod
+    def get_workout_trends(cls, user, days=30, rows=None):
+        """Get workout trends"""
+        if rows is None:
+            rows = cls._rollup_rows(user, timezone.now().date() - timedelta(days=days))
         
+        result = cls._build_workout_trends(rows, days)
+        result['days'] = days
         return result
     
-    @staticmethod
-    def get_exercise_type_distribution(user, days=30):
-        """Get distribution of exercise types"""
+    @classmethod
+    def get_exercise_type_distribution_by_date(cls, user, start_date, end_date=None):
+        """Get distribution of exercise types for specific date range"""
         from apps.workouts.models import WorkoutExercise
-        start_date = timezone.now().date() - timedelta(days=days)
         
-        # Get all workout exercises in the period (include both completed and in-progress)
+        # Count workout exercises by exercise type in one grouped query
         workout_exercises = WorkoutExercise.objects.filter(
             workout__user=user,
             workout__date__gte=start_date
-        ).select_related('exercise')
-        
-        # Count by exercise type
-        type_counts = {}
-        type_labels = {
-            'strength': '筋力トレーニング',
-            'cardio': '有酸素運動',
-            'flexibility': '柔軟性',
-            'balance': 'バランス',
-            'sports': 'スポーツ',
-        }
-        
-        for we in workout_exercises:
-            exercise_type = we.exercise.exercise_type
-            if exercise_type in type_counts:
-                type_counts[exercise_type] += 1
-            else:
-                type_counts[exercise_type] = 1
+        )
+        if end_date:
+            workout_exercises = workout_exercises.filter(workout__date__lte=end_date)
+        type_counts = workout_exercises.values('exercise__exercise_type').annotate(
+            count=Count('id')
+        ).order_by('exercise__exercise_type')
         
         # Format for pie chart
-        result = []
-        for type_key, count in type_counts.items():
-            result.append({
-                'name': type_labels.get(type_key, type_key),
-                'value': count,
-                'type': type_key
-            })
-        
-        return result
+        return [
+            {
+                'name': cls.EXERCISE_TYPE_LABELS.get(item['exercise__exercise_type'], item['exercise__exercise_type']),
+                'value': item['count'],
+                'type': item['exercise__exercise_type']
+            }
+            for item in type_counts
+        ]
     
     @classmethod
-    def get_comprehensive_report_by_date(cls, user, start_date, end_date):
-        """Get comprehensive progress report for specific date range"""
-        # Get individual reports
-        weight_progress = cls.get_weight_progress_by_date(user, start_date, end_date)
-        body_composition = cls.get_body_composition_progress_by_date(user, start_date, end_date)
-        nutrition_trends = cls.get_nutrition_trends_by_date(user, start_date, end_date)
-        workout_trends = cls.get_workout_trends_by_date(user, start_date, end_date)
-        
-        # Format data for frontend compatibility
-        result = {
-            'weight_history': [],
-            'body_fat_history': [],
-            'workout_frequency': [],
-            'calorie_trends': [],
-            'weight_change': 0,
-            'body_fat_change': 0,
-            'total_workouts': 0,
-            'workout_consistency': 0,
-            'avg_calories': 0,
-            'target_calories': 2000,
-            'current_weight': 0,
-            'weight_goal': 0,
-            'current_body_fat': 0,
-            'body_fat_goal': 0,
-            'workout_goal': 0,
-            'workouts_this_week': 0,
-            'achievements': []
-        }
-        
-        # Process weight data
-        if weight_progress and weight_progress.get('data'):
-            result['weight_history'] = [
-                {'date': item['date'], 'weight': item['weight']} 
-                for item in weight_progress['data']
-            ]
-            result['weight_change'] = weight_progress.get('weight_change', 0)
-            result['current_weight'] = weight_progress.get('current_weight', 0)
-        
-        # Process body composition data
-        if body_composition:
-            if body_composition.get('measurements'):
-                result['body_fat_history'] = [
-                    {'date': item['date'], 'body_fat_percentage': item['body_fat_percentage']}
-                    for item in body_composition['measurements']
-                ]
-            result['body_fat_change'] = body_composition.get('body_fat_change', 0)
-            result['start_body_fat'] = body_composition.get('start_body_fat')
-            result['current_body_fat'] = body_composition.get('current_body_fat')
-        
-        # Process nutrition data and workout calories
-        from ..nutrition.models import Meal
-        from ..workouts.models import Workout
-        from django.db.models import Sum, F
-        
-        # Get daily calorie intake (摂取カロリー)
-        daily_intake = {}
-        if nutrition_trends:
-            result['avg_calories'] = nutrition_trends.get('average_daily_calories', 0)
-            
-            meals_by_date = Meal.objects.filter(
-                user=user,
-                date__gte=start_date,
-                date__lte=end_date
-            ).values('date').annotate(
-                total_calories=Sum(F('items__calories'))
-            ).order_by('date')
-            
-            for item in meals_by_date:
-                if item['total_calories']:
-                    daily_intake[str(item['date'])] = round(item['total_calories'], 0)
-        
-        # Get daily calories burned (消費カロリー)
-        daily_burned = {}
-        workouts_by_date = Workout.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).values('date').annotate(
-            total_burned=Sum('total_calories_burned')
-        ).order_by('date')
-        
-        for item in workouts_by_date:
-            if item['total_burned']:
-                daily_burned[str(item['date'])] = round(item['total_burned'], 0)
-        
-        # Fill all dates in range with calorie data
-        current = start_date
-        while current <= end_date:
-            date_str = str(current)
-            result['calorie_trends'].append({
-                'date': date_str,
-                'intake': daily_intake.get(date_str, 0),
-                'burned': daily_burned.get(date_str, 0)
-            })
-            current += timedelta(days=1)
-        
-        # Process workout data
-        if workout_trends:
-            result['total_workouts'] = workout_trends.get('total_workouts', 0)
-            result['workout_consistency'] = workout_trends.get('completion_rate', 0)
-        
-        # Get exercise type distribution
-        result['exercise_types'] = cls.get_exercise_type_distribution_by_date(user, start_date, end_date)
+    def get_exercise_type_distribution(cls, user, days=30):
+        """Get distribution of exercise types"""
+        # Include both completed and in-progress workouts
+        start_date = timezone.now().date() - timedelta(days=days)
+        return cls.get_exercise_type_distribution_by_date(user, start_date)
+    
+    @staticmethod
+    def _apply_goals(user, result):
+        """Fill profile goals and the active schedule's weekly progress into a report"""
+        from ..workouts.models import Workout, WorkoutSchedule
         
         # Get user goals from profile
         try:
@@ -722,75 +443,51 @@ class ProgressAnalyzer:
         
         # Get workout goal from active workout schedule
         try:
-            from ..workouts.models import WorkoutSchedule
+            today = timezone.now().date()
+            # Get start of week (Monday)
+            start_of_week = today - timedelta(days=today.weekday())
+            end_of_week = start_of_week + timedelta(days=6)
+            
+            # Scheduled sessions of this week with a logged workout, counted in the same query
             active_schedule = WorkoutSchedule.objects.filter(
                 user=user,
                 is_active=True,
                 completed=False
-            ).select_related('workout_plan').first()
+            ).select_related('workout_plan').annotate(
+                week_sessions_done=Count('sessions', filter=Q(
+                    sessions__date__range=(start_of_week, end_of_week),
+                    sessions__workout__isnull=False
+                ))
+            ).first()
             
             if active_schedule and active_schedule.workout_plan:
                 result['workout_goal'] = active_schedule.workout_plan.days_per_week
                 
-                # Calculate workouts this week for active schedule
-                from datetime import datetime
-                today = timezone.now().date()
-                # Get start of week (Monday)
-                start_of_week = today - timedelta(days=today.weekday())
-                end_of_week = start_of_week + timedelta(days=6)
-                
                 # Count workouts within this week and within schedule period
                 schedule_start = active_schedule.start_date
                 schedule_end = active_schedule.end_date
                 
-                workouts_this_week = Workout.objects.filter(
+                result['workouts_this_week'] = Workout.objects.filter(
                     user=user,
                     date__gte=max(start_of_week, schedule_start),
                     date__lte=min(end_of_week, schedule_end) if schedule_end else end_of_week
                 ).count()
-                
-                result['workouts_this_week'] = workouts_this_week
+                result['scheduled_sessions_this_week'] = active_schedule.week_sessions_done
             else:
                 # No active schedule, set to 0
                 result['workout_goal'] = 0
                 result['workouts_this_week'] = 0
+                result['scheduled_sessions_this_week'] = 0
         except Exception as e:
             # If error, set to 0
             result['workout_goal'] = 0
             result['workouts_this_week'] = 0
-        
-        # Add nested structures for frontend compatibility
-        if weight_progress:
-            result['weight_progress'] = {
-                'weight_change': weight_progress.get('weight_change', 0),
-                'start_weight': weight_progress.get('start_weight', 0),
-                'current_weight': weight_progress.get('current_weight', 0)
-            }
-        else:
-            result['weight_progress'] = None
-            
-        if workout_trends:
-            result['workout_trends'] = {
-                'total_workouts': workout_trends.get('completed_workouts', 0),
-                'total_duration_minutes': workout_trends.get('total_duration_minutes', 0)
-            }
-        else:
-            result['workout_trends'] = None
-        
-        return result
+            result['scheduled_sessions_this_week'] = 0
     
-    @classmethod
-    def get_comprehensive_report(cls, user, days=30):
-        """Get comprehensive progress report"""
-        # Get individual reports
-        weight_progress = cls.get_weight_progress(user, days)
-        body_composition = cls.get_body_composition_progress(user, days)
-        nutrition_trends = cls.get_nutrition_trends(user, days)
-        workout_trends = cls.get_workout_trends(user, days)
-        
-        # Format data for frontend compatibility
+    @staticmethod
+    def _build_report(weight_progress, body_composition, nutrition_trends, workout_trends):
+        """Format sub-reports into the structure expected by the frontend"""
         result = {
-            'period_days': days,
             'weight_history': [],
             'body_fat_history': [],
             'workout_frequency': [],
@@ -807,6 +504,7 @@ class ProgressAnalyzer:
             'body_fat_goal': 0,
             'workout_goal': 0,
             'workouts_this_week': 0,
+            'scheduled_sessions_this_week': 0,
             'achievements': []
         }
         
@@ -830,113 +528,10 @@ class ProgressAnalyzer:
             result['start_body_fat'] = body_composition.get('start_body_fat')
             result['current_body_fat'] = body_composition.get('current_body_fat')
         
-        # Process nutrition data and workout calories
-        start_date = timezone.now().date() - timedelta(days=days)
-        from ..nutrition.models import Meal
-        from ..workouts.models import Workout
-        from django.db.models import Sum, F
-        
-        # Get daily calorie intake (摂取カロリー)
-        daily_intake = {}
-        if nutrition_trends and nutrition_trends.get('total_meals_logged', 0) > 0:
-            result['avg_calories'] = nutrition_trends.get('average_daily_calories', 0)
-            
-            meals_by_date = Meal.objects.filter(
-                user=user,
-                date__gte=start_date
-            ).values('date').annotate(
-                total_calories=Sum(F('items__calories'))
-            ).order_by('date')
-            
-            for item in meals_by_date:
-                if item['total_calories']:
-                    daily_intake[str(item['date'])] = round(item['total_calories'], 0)
-        
-        # Get daily calories burned (消費カロリー)
-        daily_burned = {}
-        workouts_by_date = Workout.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).values('date').annotate(
-            total_burned=Sum('total_calories_burned')
-        ).order_by('date')
-        
-        for item in workouts_by_date:
-            if item['total_burned']:
-                daily_burned[str(item['date'])] = round(item['total_burned'], 0)
-        
-        # Combine both intake and burned calories
-        all_dates = set(daily_intake.keys()) | set(daily_burned.keys())
-        for date_str in sorted(all_dates):
-            result['calorie_trends'].append({
-                'date': date_str,
-                'intake': daily_intake.get(date_str, 0),
-                'burned': daily_burned.get(date_str, 0)
-            })
-        
         # Process workout data
         if workout_trends:
             result['total_workouts'] = workout_trends.get('total_workouts', 0)
             result['workout_consistency'] = workout_trends.get('completion_rate', 0)
-            # Create mock workout frequency data (weekly)
-            weeks = max(1, days // 7)
-            workouts_per_week = result['total_workouts'] / weeks if weeks > 0 else 0
-            for i in range(weeks):
-                result['workout_frequency'].append({
-                    'week': f'Week {i+1}',
-                    'count': int(workouts_per_week)
-                })
-        
-        # Get exercise type distribution
-        result['exercise_types'] = cls.get_exercise_type_distribution(user, days)
-        
-        # Get user goals from profile
-        try:
-            profile = user.profile
-            if hasattr(profile, 'target_weight') and profile.target_weight:
-                result['weight_goal'] = float(profile.target_weight)
-            if hasattr(profile, 'target_body_fat_percentage') and profile.target_body_fat_percentage:
-                result['body_fat_goal'] = float(profile.target_body_fat_percentage)
-        except:
-            pass
-        
-        # Get workout goal from active workout schedule
-        try:
-            from ..workouts.models import WorkoutSchedule
-            active_schedule = WorkoutSchedule.objects.filter(
-                user=user,
-                is_active=True,
-                completed=False
-            ).select_related('workout_plan').first()
-            
-            if active_schedule and active_schedule.workout_plan:
-                result['workout_goal'] = active_schedule.workout_plan.days_per_week
-                
-                # Calculate workouts this week for active schedule
-                today = timezone.now().date()
-                # Get start of week (Monday)
-                start_of_week = today - timedelta(days=today.weekday())
-                end_of_week = start_of_week + timedelta(days=6)
-                
-                # Count workouts within this week and within schedule period
-                schedule_start = active_schedule.start_date
-                schedule_end = active_schedule.end_date
-                
-                workouts_this_week = Workout.objects.filter(
-                    user=user,
-                    date__gte=max(start_of_week, schedule_start),
-                    date__lte=min(end_of_week, schedule_end) if schedule_end else end_of_week
-                ).count()
-                
-                result['workouts_this_week'] = workouts_this_week
-            else:
-                # No active schedule, set to 0
-                result['workout_goal'] = 0
-                result['workouts_this_week'] = 0
-        except Exception as e:
-            # If error, set to 0
-            result['workout_goal'] = 0
-            result['workouts_this_week'] = 0
         
         # Add nested structures for frontend compatibility
         if weight_progress:
@@ -957,6 +552,100 @@ class ProgressAnalyzer:
             result['workout_trends'] = None
         
         return result
+    
+    @staticmethod
+    def _daily_calories(rows, include_intake=True):
+        """Map date strings to intake (摂取カロリー) and burned (消費カロリー) calories"""
+        daily_intake = {}
+        daily_burned = {}
+        for row in rows:
+            if include_intake and row['calories_in']:
+                daily_intake[str(row['date'])] = round(row['calories_in'], 0)
+            if row['calories_burned']:
+                daily_burned[str(row['date'])] = round(row['calories_burned'], 0)
+        return daily_intake, daily_burned
+    
+    @classmethod
+    def get_comprehensive_report_by_date(cls, user, start_date, end_date):
+        """
+        Get comprehensive progress report for specific date range
+        
+        Every sub-report is built from one rollup fetch, so the query count
+        does not grow with the number of days, meals or workouts in range.
+        """
+        rows = cls._rollup_rows(user, start_date, end_date)
+        
+        nutrition_trends = cls.get_nutrition_trends_by_date(user, start_date, end_date, rows)
+        result = cls._build_report(
+            cls.get_weight_progress_by_date(user, start_date, end_date, rows),
+            cls.get_body_composition_progress_by_date(user, start_date, end_date, rows),
+            nutrition_trends,
+            cls.get_workout_trends_by_date(user, start_date, end_date, rows)
+        )
+        result['avg_calories'] = nutrition_trends.get('average_daily_calories', 0)
+        
+        # Fill all dates in range with calorie data
+        daily_intake, daily_burned = cls._daily_calories(rows)
+        for date, _ in cls._fill_dates(start_date, end_date, {}):
+            date_str = str(date)
+            result['calorie_trends'].append({
+                'date': date_str,
+                'intake': daily_intake.get(date_str, 0),
+                'burned': daily_burned.get(date_str, 0)
+            })
+        
+        result['exercise_types'] = cls.get_exercise_type_distribution_by_date(user, start_date, end_date)
+        cls._apply_goals(user, result)
+        
+        return result
+    
+    @classmethod
+    def get_comprehensive_report(cls, user, days=30):
+        """
+        Get comprehensive progress report
+        
+        Built from one rollup fetch like get_comprehensive_report_by_date.
+        """
+        start_date = timezone.now().date() - timedelta(days=days)
+        rows = cls._rollup_rows(user, start_date)
+        
+        nutrition_trends = cls.get_nutrition_trends(user, days, rows)
+        workout_trends = cls.get_workout_trends(user, days, rows)
+        result = cls._build_report(
+            cls.get_weight_progress(user, days, rows),
+            cls.get_body_composition_progress(user, days, rows),
+            nutrition_trends,
+            workout_trends
+        )
+        result = {'period_days': days, **result}
+        
+        has_meals = nutrition_trends['total_meals_logged'] > 0
+        if has_meals:
+            result['avg_calories'] = nutrition_trends.get('average_daily_calories', 0)
+        
+        # Combine both intake and burned calories
+        daily_intake, daily_burned = cls._daily_calories(rows, include_intake=has_meals)
+        all_dates = set(daily_intake.keys()) | set(daily_burned.keys())
+        for date_str in sorted(all_dates):
+            result['calorie_trends'].append({
+                'date': date_str,
+                'intake': daily_intake.get(date_str, 0),
+                'burned': daily_burned.get(date_str, 0)
+            })
+        
+        # Create mock workout frequency data (weekly)
+        weeks = max(1, days // 7)
+        workouts_per_week = result['total_workouts'] / weeks if weeks > 0 else 0
+        for i in range(weeks):
+            result['workout_frequency'].append({
+                'week': f'Week {i+1}',
+                'count': int(workouts_per_week)
+            })
+        
+        result['exercise_types'] = cls.get_exercise_type_distribution(user, days)
+        cls._apply_goals(user, result)
+        
+        return result
 
 
 class GoalTracker:
@@ -0,0 +1,106 @@
+"""
+Signals keeping the analytics daily rollups and cached responses in sync
+with the source apps
+"""
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from apps.measurements.models import BodyMeasurement
+from apps.nutrition.models import Meal, MealItem
+from apps.nutrition.signals import meals_imported
+from apps.users.models import FoodPreference, User, UserProfile
+from apps.workouts.models import Workout, WorkoutExercise, WorkoutSchedule
+from apps.workouts.signals import workouts_changed
+from .cache import bump_data_version
+from .rollups import DailyRollupService
+
+
+@receiver(pre_save, sender=BodyMeasurement)
+@receiver(pre_save, sender=Meal)
+@receiver(pre_save, sender=Workout)
+def remember_previous_date(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored date so a moved record also refreshes its old day"""
+    instance._rollup_previous_date = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and 'date' not in update_fields:
+        return
+    instance._rollup_previous_date = sender.objects.filter(
+        pk=instance.pk
+    ).values_list('date', flat=True).first()
+
+
+@receiver(post_save, sender=BodyMeasurement)
+@receiver(post_delete, sender=BodyMeasurement)
+@receiver(post_save, sender=Meal)
+@receiver(post_delete, sender=Meal)
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+def refresh_rollup_for_record(sender, instance, **kwargs):
+    """Refresh the rollup of the day a measurement, meal or workout belongs to"""
+    previous_date = getattr(instance, '_rollup_previous_date', None)
+    DailyRollupService.schedule_refresh(instance.user_id, instance.date, previous_date)
+    # Bumped after scheduling so the version changes once the rollup is fresh
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=MealItem)
+@receiver(post_delete, sender=MealItem)
+def refresh_rollup_for_meal_item(sender, instance, **kwargs):
+    """Refresh the rollup of the day the item's meal belongs to"""
+    if MealItem.meal.is_cached(instance):
+        user_id, date = instance.meal.user_id, instance.meal.date
+    else:
+        user_id, date = Meal.objects.filter(
+            pk=instance.meal_id
+        ).values_list('user_id', 'date').first() or (None, None)
+    if user_id is not None:
+        DailyRollupService.schedule_refresh(user_id, date)
+        bump_data_version(user_id)
+
+
+@receiver(meals_imported)
+def refresh_rollups_for_import(sender, user, dates, **kwargs):
+    """Refresh the rollups of every day a diary import wrote to"""
+    DailyRollupService.schedule_refresh(user.pk, *dates)
+    bump_data_version(user.pk)
+
+
+@receiver(workouts_changed)
+def refresh_rollups_for_workouts(sender, user_id, dates, **kwargs):
+    """Refresh the rollups of days whose workouts were rewritten in bulk"""
+    DailyRollupService.schedule_refresh(user_id, *dates)
+    bump_data_version(user_id)
+
+
+@receiver(post_save, sender=WorkoutExercise)
+@receiver(post_delete, sender=WorkoutExercise)
+def refresh_rollup_for_workout_exercise(sender, instance, **kwargs):
+    """Refresh the rollup of the workout's day (its calorie total may have changed)"""
+    if WorkoutExercise.workout.is_cached(instance):
+        user_id, date = instance.workout.user_id, instance.workout.date
+    else:
+        user_id, date = Workout.objects.filter(
+            pk=instance.workout_id
+        ).values_list('user_id', 'date').first() or (None, None)
+    if user_id is not None:
+        DailyRollupService.schedule_refresh(user_id, date)
+        bump_data_version(user_id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=FoodPreference)
+@receiver(post_delete, sender=FoodPreference)
+@receiver(post_save, sender=WorkoutSchedule)
+@receiver(post_delete, sender=WorkoutSchedule)
+def invalidate_for_user_record(sender, instance, **kwargs):
+    """Invalidate cached responses after profile, preference or schedule changes"""
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_for_user(sender, instance, update_fields=None, **kwargs):
+    """Invalidate cached responses after account changes (e.g. date of birth)"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_data_version(instance.pk)
@@ -0,0 +1,145 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.measurements.models import BodyMeasurement
+from apps.nutrition.models import Meal
+from apps.users.models import User, UserProfile
+from apps.workouts.models import (
+    Exercise, Workout, WorkoutExercise, WorkoutPlan, WorkoutPlanDay, WorkoutSchedule
+)
+from .rollups import DailyRollupService
+from .services import ProgressAnalyzer
+
+
+class ComprehensiveReportQueryTests(TestCase):
+    """The date-range report reads a fixed number of queries whatever the range"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='report', email='report@example.com', password='pw-report-1',
+            date_of_birth=date(1990, 1, 1)
+        )
+        UserProfile.objects.create(
+            user=cls.user, gender='female', height=165, current_weight=62,
+            target_weight=58, activity_level='moderate', fitness_goal='weight_loss'
+        )
+        exercises = [
+            Exercise.objects.create(
+                name=f'Exercise {exercise_type}', description='', exercise_type=exercise_type,
+                difficulty='beginner', equipment='none', calories_per_minute=7
+            )
+            for exercise_type in ('strength', 'cardio')
+        ]
+
+        cls.end_date = date(2026, 6, 30)
+        for offset in range(90):
+            day = cls.end_date - timedelta(days=offset)
+            Meal.objects.create(user=cls.user, name='Lunch', meal_type='lunch', date=day)
+            if offset % 3 == 0:
+                BodyMeasurement.objects.create(
+                    user=cls.user, date=day, weight=Decimal('62') - offset / Decimal('100'),
+                    body_fat_percentage=Decimal('24.5')
+                )
+            if offset % 2 == 0:
+                workout = Workout.objects.create(
+                    user=cls.user, name='Session', date=day, duration_minutes=40, completed=True
+                )
+                for order, exercise in enumerate(exercises):
+                    WorkoutExercise.objects.create(
+                        workout=workout, exercise=exercise, order=order, planned_sets=3
+                    )
+        DailyRollupService.rebuild(cls.user.pk)
+
+    def report(self, days):
+        user = User.objects.get(pk=self.user.pk)
+        start_date = self.end_date - timedelta(days=days - 1)
+        # Rollups, exercise types, profile and active schedule
+        with self.assertNumQueries(4):
+            return ProgressAnalyzer.get_comprehensive_report_by_date(user, start_date, self.end_date)
+
+    def test_query_count_does_not_grow_with_range(self):
+        week = self.report(7)
+        quarter = self.report(90)
+
+        self.assertEqual(len(week['calorie_trends']), 7)
+        self.assertEqual(len(quarter['calorie_trends']), 90)
+        self.assertEqual(week['total_workouts'], 4)
+        self.assertEqual(quarter['total_workouts'], 45)
+
+
+class WeeklyGoalTests(TestCase):
+    """The weekly goal counts logged workouts and, separately, scheduled sessions done"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='goals', email='goals@example.com', password='pw-goals-1',
+            date_of_birth=date(1990, 1, 1)
+        )
+        plan = WorkoutPlan.objects.create(
+            name='Alternate', description='', goal='general_fitness', difficulty='beginner',
+            duration_weeks=2, days_per_week=4, overview='', requirements=''
+        )
+        WorkoutPlanDay.objects.create(workout_plan=plan, day_number=1, name='Train')
+        WorkoutPlanDay.objects.create(workout_plan=plan, day_number=2, name='Rest', rest_day=True)
+
+        today = timezone.now().date()
+        monday = today - timedelta(days=today.weekday())
+        WorkoutSchedule.objects.create(user=cls.user, workout_plan=plan, start_date=monday)
+        # Monday is a scheduled session, Tuesday a rest day
+        for day in (monday, monday + timedelta(days=1)):
+            Workout.objects.create(user=cls.user, name='Session', date=day)
+
+    def test_workouts_and_sessions_this_week(self):
+        report = ProgressAnalyzer.get_comprehensive_report(self.user, days=7)
+        self.assertEqual(
+            (report['workout_goal'], report['workouts_this_week'], report['scheduled_sessions_this_week']),
+            (4, 2, 1)
+        )
+
+
+class CachedResponseTests(TestCase):
+    """A write handled by one worker invalidates responses cached by the others"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='cached', email='cached@example.com', password='pw-cached-1',
+            date_of_birth=date(1990, 1, 1)
+        )
+        UserProfile.objects.create(
+            user=cls.user, gender='male', height=180, current_weight=80,
+            target_weight=75, activity_level='moderate', fitness_goal='weight_loss'
+        )
+        # The profile records today's measurement of its current weight
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def metabolism(self, worker_cache):
+        with mock.patch('apps.analytics.cache.cache', worker_cache):
+            response = self.client.get('/api/analytics/metabolism/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['bmr']
+
+    def test_write_invalidates_other_workers(self):
+        worker = LocMemCache('worker-a', {})
+        before = self.metabolism(worker)
+        # Served from the worker's own cache, checking the shared version only
+        with self.assertNumQueries(1):
+            self.assertEqual(self.metabolism(worker), before)
+
+        # Written "in another worker": nothing touches this worker's cache
+        measurement = BodyMeasurement.objects.get(user=self.user)
+        measurement.weight = 90
+        with self.captureOnCommitCallbacks(execute=True):
+            measurement.save()
+
+        self.assertGreater(self.metabolism(worker), before)
+        self.assertEqual(self.metabolism(LocMemCache('worker-b', {})), self.metabolism(worker))
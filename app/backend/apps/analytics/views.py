@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from .cache import cache_user_response
 from .services import (
     MetabolismCalculator, MacroCalculator,
     ProgressAnalyzer, GoalTracker
@@ -12,6 +13,7 @@ class MetabolismView(APIView):
     """Calculate BMR and TDEE"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response
     def get(self, request):
         """Get BMR and TDEE for current user"""
         result = MetabolismCalculator.calculate_for_user(request.user)
@@ -29,6 +31,7 @@ class MacroCalculatorView(APIView):
     """Calculate macro distribution"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response
     def get(self, request):
         """Calculate macros based on user's TDEE and goal"""
         # Get TDEE
@@ -76,6 +79,7 @@ class ProgressAnalysisView(APIView):
     """Analyze user progress"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response
     def get(self, request):
         """Get progress analysis"""
         from datetime import datetime
@@ -146,6 +150,7 @@ class GoalProgressView(APIView):
     """Track progress towards goal"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response
     def get(self, request):
         """Get goal progress"""
         result = GoalTracker.calculate_goal_progress(request.user)
@@ -163,6 +168,7 @@ class DashboardStatsView(APIView):
     """Get dashboard statistics"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response
     def get(self, request):
         """Get all stats for dashboard"""
         # Get metabolism data
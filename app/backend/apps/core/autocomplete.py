@@ -0,0 +1,143 @@
+"""
+In-process prefix indexes for typeahead autocomplete
+
+Each catalog (foods, exercises) keeps one sorted index of public items and
+one per user with custom items. Indexes are rebuilt lazily when their
+shared version changes, so a keystroke costs one primary key lookup and a
+binary search instead of a catalog scan.
+"""
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from .text import normalize_search_text
+from .versions import bump_version, get_versions
+
+
+PUBLIC = 0  # owner key of the shared catalog
+
+
+class PrefixIndex:
+    """Sorted array of normalized names answering prefix queries with bisect"""
+
+    def __init__(self, items):
+        """
+        Args:
+            items: Iterable of (id, name) pairs
+        """
+        names = []
+        words = []
+        for item_id, name in items:
+            key = normalize_search_text(name)
+            names.append((key, item_id, name))
+            # Later words too, so "breast" finds "Chicken Breast"
+            parts = key.split(' ')
+            for i in range(1, len(parts)):
+                words.append((' '.join(parts[i:]), item_id, name))
+        names.sort()
+        words.sort()
+        self._names = names
+        self._name_keys = [entry[0] for entry in names]
+        self._words = words
+        self._word_keys = [entry[0] for entry in words]
+
+    def __len__(self):
+        return len(self._names)
+
+    @staticmethod
+    def _scan(keys, entries, rank, prefix, limit, seen):
+        matches = []
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            if len(matches) >= limit or not keys[position].startswith(prefix):
+                break
+            _, item_id, name = entries[position]
+            if item_id not in seen:
+                seen.add(item_id)
+                matches.append((rank, keys[position], item_id, name))
+        return matches
+
+    def search(self, prefix, limit, seen=None):
+        """
+        Return up to limit (rank, key, id, name) matches for a normalized prefix
+
+        Names starting with the prefix come first, then names with a later
+        word starting with it (rank 1); each group is in key order.
+        """
+        seen = set() if seen is None else seen
+        matches = self._scan(self._name_keys, self._names, 0, prefix, limit, seen)
+        if len(matches) < limit:
+            matches += self._scan(
+                self._word_keys, self._words, 1, prefix, limit - len(matches), seen
+            )
+        return matches
+
+
+class AutocompleteCatalog:
+    """
+    Versioned prefix indexes of one catalog, split by owner
+
+    Args:
+        name: Version key namespace, e.g. 'food'
+        load_items: Callable(owner_id) returning (id, name) pairs of the
+            public catalog (owner PUBLIC) or of one user's custom items
+        max_user_indexes: Per-user indexes kept in memory (LRU)
+    """
+
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 25
+
+    def __init__(self, name, load_items, max_user_indexes=1000):
+        self.name = name
+        self.load_items = load_items
+        self.max_user_indexes = max_user_indexes
+        self._indexes = OrderedDict()  # owner_id -> (version, PrefixIndex)
+        self._lock = threading.Lock()
+
+    def _version_key(self, owner_id):
+        return f'autocomplete:{self.name}:{owner_id}'
+
+    def _versions(self, owner_ids):
+        keys = {owner_id: self._version_key(owner_id) for owner_id in owner_ids}
+        stored = get_versions(keys.values())
+        return {owner_id: stored[key] for owner_id, key in keys.items()}
+
+    def invalidate(self, owner_id):
+        """Mark an owner's index stale once the current transaction commits"""
+        bump_version(self._version_key(owner_id or PUBLIC))
+
+    def _index(self, owner_id, version):
+        with self._lock:
+            loaded = self._indexes.get(owner_id)
+            if loaded is not None and loaded[0] == version:
+                self._indexes.move_to_end(owner_id)
+                return loaded[1]
+
+        index = PrefixIndex(self.load_items(owner_id))
+
+        with self._lock:
+            self._indexes[owner_id] = (version, index)
+            self._indexes.move_to_end(owner_id)
+            # Evict least recently used user indexes; the public one stays
+            while len(self._indexes) > self.max_user_indexes + 1:
+                oldest = next(owner for owner in self._indexes if owner != PUBLIC)
+                del self._indexes[oldest]
+        return index
+
+    def complete(self, user_id, query, limit=DEFAULT_LIMIT):
+        """
+        Autocomplete a query over the public catalog and the user's own items
+
+        Returns:
+            List of {'id', 'name'} dicts, own items first on equal keys
+        """
+        prefix = normalize_search_text(query)
+        if not prefix:
+            return []
+
+        versions = self._versions([PUBLIC, user_id])
+        seen = set()
+        own = self._index(user_id, versions[user_id]).search(prefix, limit, seen)
+        public = self._index(PUBLIC, versions[PUBLIC]).search(prefix, limit, seen)
+
+        # Stable sort: whole-name matches before word matches, then by key
+        merged = sorted(own + public, key=lambda match: match[:2])[:limit]
+        return [{'id': item_id, 'name': name} for _, _, item_id, name in merged]
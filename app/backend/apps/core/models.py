@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class DataVersion(models.Model):
+    """
+    Named counter shared by every process
+
+    Bumped when the data behind a cache changes; caches private to one
+    process (local memory caches, in-process indexes) key their entries by
+    it, so a write handled by one worker invalidates every worker.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
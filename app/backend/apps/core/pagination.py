@@ -0,0 +1,288 @@
+"""
+Pagination that avoids exact counts and deep OFFSET scans
+
+Page-number pagination counts the whole list and skips OFFSET rows, so deep
+pages get slower as a history grows. Keyset pages instead continue from the
+sort key of the last row shown (e.g. date, time, id), which a composite
+index serves as a range scan however deep the page. For large shared
+tables, count-free and estimated-count page numbers skip the exact COUNT(*).
+"""
+import base64
+import binascii
+import json
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# Below this many estimated rows an exact count is cheap enough to run
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimate_count(queryset):
+    """
+    Return the PostgreSQL planner's row estimate for a queryset
+
+    Returns:
+        Estimated row count, or None on other databases
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def approximate_count(queryset, threshold=ESTIMATE_THRESHOLD):
+    """
+    Count a queryset exactly when small, otherwise by planner estimate
+
+    Returns:
+        (count, is_estimate)
+    """
+    estimate = estimate_count(queryset)
+    if estimate is None or estimate < threshold:
+        return queryset.count(), False
+    return estimate, True
+
+
+class EstimatedCountPaginator(Paginator):
+    """Django paginator for admin changelists of large tables"""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return approximate_count(self.object_list)[0]
+        return super().count
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only pages ordered by the model's Meta.ordering plus the primary key
+
+    The view may set `keyset_ordering` to use another ordering; every field
+    must be a concrete model field. Nullable fields sort NULLs first when
+    descending and last when ascending on every database (PostgreSQL's
+    default), so the cursor comparison stays consistent.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, queryset, view):
+        """Return [(field, descending)] ending with the primary key"""
+        ordering = getattr(view, 'keyset_ordering', None) or queryset.model._meta.ordering
+        keys = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in ordering
+        ]
+        pk_name = queryset.model._meta.pk.name
+        if not any(name in ('pk', pk_name) for name, _ in keys):
+            keys.append((pk_name, keys[-1][1] if keys else False))
+        return [
+            (queryset.model._meta.get_field(pk_name if name == 'pk' else name), descending)
+            for name, descending in keys
+        ]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, keys, row):
+        values = []
+        for field, _ in keys:
+            value = field.value_from_object(row)
+            values.append(None if value is None else field.value_to_string(row))
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, keys, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(keys):
+                raise ValueError
+            return [
+                None if value is None else field.to_python(value)
+                for (field, _), value in zip(keys, values)
+            ]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _after(field, descending, value):
+        """Rows strictly after value in this column's sort order"""
+        name = field.attname
+        if value is None:
+            # NULLs come first when descending and last when ascending
+            return Q(**{f'{name}__isnull': False}) if descending else Q(pk__in=[])
+        after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+        if field.null and not descending:
+            after |= Q(**{f'{name}__isnull': True})
+        return after
+
+    @staticmethod
+    def _equal(field, value):
+        if value is None:
+            return Q(**{f'{field.attname}__isnull': True})
+        return Q(**{field.attname: value})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        keys = self.get_ordering(queryset, view)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*[
+            F(field.attname).desc(nulls_first=field.null or None) if descending
+            else F(field.attname).asc(nulls_last=field.null or None)
+            for field, descending in keys
+        ])
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(keys, cursor)
+            # (a, b, c) after (x, y, z): a after x, or a = x and (b, c) after (y, z)
+            condition = Q(pk__in=[])
+            for position in range(len(keys) - 1, -1, -1):
+                field, descending = keys[position]
+                condition = self._after(field, descending, values[position]) | (
+                    self._equal(field, values[position]) & condition
+                )
+            queryset = queryset.filter(condition)
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(keys, self.page[-1]) if self.has_next else None
+        return self.page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination unless the request opts into keyset pages
+
+    Passing `?cursor=` (empty for the first page) switches to
+    KeysetPagination; the response then has `next` and `results` but no
+    `count` or `previous`, and `ordering` parameters are ignored.
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class CountFreePagination(PageNumberPagination):
+    """
+    Page numbers without an exact COUNT(*)
+
+    Fetches page_size + 1 rows to tell whether a next page exists. With
+    count_mode 'none' the response has `has_next` instead of `count`; with
+    'estimate' `count` is exact for small results and the PostgreSQL
+    planner estimate above ESTIMATE_THRESHOLD rows.
+    """
+
+    count_mode = 'none'
+    estimate_threshold = ESTIMATE_THRESHOLD
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        try:
+            self.number = int(request.query_params.get(self.page_query_param, 1))
+            if self.number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params.get(self.page_query_param),
+                message='Invalid page.'
+            ))
+
+        offset = (self.number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.number, message='That page contains no results'
+            ))
+        self.has_next = len(rows) > page_size
+        self.rows = rows[:page_size]
+
+        self.count = None
+        if self.count_mode == 'estimate':
+            count, self.count_is_estimate = approximate_count(queryset, self.estimate_threshold)
+            # The planner may underestimate; never report fewer rows than seen
+            self.count = max(count, offset + len(rows))
+        return self.rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def get_paginated_response(self, data):
+        if self.count_mode == 'estimate':
+            counts = {'count': self.count, 'count_is_estimate': self.count_is_estimate}
+        else:
+            counts = {'has_next': self.has_next}
+        return Response({
+            **counts,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+
+class EstimatedCountPagination(CountFreePagination):
+    """Page numbers with an exact count for small results, an estimate otherwise"""
+
+    count_mode = 'estimate'
@@ -0,0 +1,88 @@
+"""
+Sparse fieldsets for list endpoints
+
+List serializers return a compact set of fields by default. Clients pick
+other fields with `?fields=a,b` and add nested data with `?expand=name`;
+dotted paths such as `plan_days.exercises` expand nested serializers
+further down.
+"""
+from rest_framework import serializers
+
+
+def split_param(value):
+    """Split a comma separated query parameter into a list of names"""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def expand_tree(paths):
+    """Return {first name: [rest of each dotted path]}"""
+    tree = {}
+    for path in paths:
+        name, _, rest = path.partition('.')
+        tree.setdefault(name, [])
+        if rest:
+            tree[name].append(rest)
+    return tree
+
+
+def requested_expansions(request):
+    """
+    Every nested path a request expands, for choosing prefetches
+
+    `?expand=plan_days.exercises` gives {'plan_days', 'plan_days.exercises'};
+    names in `?fields=` count as expanded too.
+    """
+    expanded = set(split_param(request.query_params.get('fields')))
+    for path in split_param(request.query_params.get('expand')):
+        parts = path.split('.')
+        expanded.update('.'.join(parts[:depth]) for depth in range(1, len(parts) + 1))
+    return expanded
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin choosing fields and nested depth per request
+
+    Without `fields` the serializer returns `compact_fields` (every field
+    when None). Fields in `expandable_fields` are built per request by a
+    callable receiving the remaining expand paths, and are left out unless
+    listed in the defaults, `fields` or `expand`. The root serializer reads
+    the options from the query string; nested ones take them as the
+    `fields` and `expand` keyword arguments.
+    """
+
+    compact_fields = None
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.requested_fields = fields
+        self.requested_expand = expand
+        super().__init__(*args, **kwargs)
+
+    def _is_root(self):
+        parent = self.parent
+        return parent is None or (
+            isinstance(parent, serializers.ListSerializer) and parent.parent is None
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = self.requested_fields, self.requested_expand
+        request = self.context.get('request')
+        if request is not None and self._is_root():
+            if only is None:
+                only = split_param(request.query_params.get('fields'))
+            if expand is None:
+                expand = split_param(request.query_params.get('expand'))
+        tree = expand_tree(expand or [])
+
+        names = list(only or self.compact_fields or fields)
+        names += [name for name in tree if name in self.expandable_fields and name not in names]
+
+        selected = {}
+        for name in names:
+            if name in self.expandable_fields:
+                selected[name] = self.expandable_fields[name](tree.get(name, []))
+            elif name in fields:
+                selected[name] = fields[name]
+        return selected
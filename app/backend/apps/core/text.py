@@ -0,0 +1,33 @@
+"""
+Text normalization shared by search and autocomplete
+"""
+import re
+import unicodedata
+
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Katakana ァ..ヶ map onto hiragana ぁ..ゖ
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+
+def normalize_search_text(*parts):
+    """
+    Normalize text for matching
+
+    NFKC folds full/half-width forms (ｶﾞ → ガ, ＡＢＣ → ABC), text is lowercased
+    and katakana is folded to hiragana so ヨーグルト matches よーぐると.
+    """
+    text = ' '.join(part for part in parts if part)
+    text = unicodedata.normalize('NFKC', text).lower().translate(_KATAKANA_TO_HIRAGANA)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def bigrams(text):
+    """Character bigrams of normalized text; single characters for 1-char words"""
+    grams = set()
+    for word in text.split(' '):
+        if len(word) == 1:
+            grams.add(word)
+        grams.update(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
@@ -0,0 +1,51 @@
+"""
+Database-backed version counters for invalidating process-local caches
+
+Reads take one primary key lookup for any number of keys. Bumps are
+collected per transaction and written once, after the current transaction
+commits, so a burst of writes costs a single UPDATE per key.
+"""
+from django.db import transaction
+from django.db.models import F
+from .models import DataVersion
+
+
+def get_versions(keys):
+    """Return {key: version}; keys never bumped are at version 0"""
+    keys = list(keys)
+    versions = dict.fromkeys(keys, 0)
+    versions.update(DataVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return versions
+
+
+def get_version(key):
+    """Return the current version of one key"""
+    return get_versions([key])[key]
+
+
+class _PendingBumps:
+    """on_commit callback incrementing the keys bumped inside one transaction"""
+
+    def __init__(self):
+        self.keys = set()
+
+    def __call__(self):
+        DataVersion.objects.bulk_create(
+            [DataVersion(key=key) for key in self.keys], ignore_conflicts=True
+        )
+        DataVersion.objects.filter(key__in=self.keys).update(version=F('version') + 1)
+
+
+def bump_version(*keys):
+    """Increment versions once the current transaction commits"""
+    connection = transaction.get_connection()
+    # Reuse the callback already registered at this savepoint level; rolling
+    # the savepoint back discards it together with its keys
+    savepoint_ids = set(connection.savepoint_ids)
+    for callback_savepoint_ids, callback, _ in connection.run_on_commit:
+        if isinstance(callback, _PendingBumps) and callback_savepoint_ids == savepoint_ids:
+            callback.keys.update(keys)
+            return
+    callback = _PendingBumps()
+    callback.keys.update(keys)
+    transaction.on_commit(callback)
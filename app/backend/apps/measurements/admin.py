@@ -2,12 +2,15 @@
 Admin configuration for Measurements app
 """
 from django.contrib import admin
+from apps.core.pagination import EstimatedCountPaginator
 from .models import BodyMeasurement, ProgressLog
 
 
 @admin.register(BodyMeasurement)
 class BodyMeasurementAdmin(admin.ModelAdmin):
     """Admin configuration for BodyMeasurement model"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = [
         'user', 'date', 'weight', 'body_fat_percentage', 'bmi',
         'weight_change', 'created_at'
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("measurements", "0003_alter_bodymeasurement_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bodymeasurement",
+            index=models.Index(
+                fields=["user", "date", "created_at", "id"],
+                name="measurement_user_id_ba9ee1_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="progresslog",
+            index=models.Index(
+                fields=["user", "date", "created_at", "id"],
+                name="measurement_user_id_ee352f_idx",
+            ),
+        ),
+    ]
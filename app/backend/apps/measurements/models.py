@@ -2,10 +2,49 @@
 Models for body measurements tracking
 """
 from django.db import models
+from django.db.models import Case, F, Value, When, Window
+from django.db.models.functions import Lag
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.users.models import User
 
 
+class BodyMeasurementQuerySet(models.QuerySet):
+    """QuerySet for BodyMeasurement with annotations for the derived fields"""
+    
+    def with_profile_height(self):
+        """Annotate the owner's profile height used as the BMI fallback"""
+        return self.annotate(profile_height=F('user__profile__height'))
+    
+    def with_deltas(self):
+        """
+        Annotate previous weight and body fat with LAG window functions
+        
+        The windows only see rows matched by filters applied before this
+        call, so filter by user (not by date or pk) first.
+        """
+        return self.with_profile_height().annotate(
+            previous_weight=Window(
+                expression=Lag('weight'),
+                partition_by=[F('user_id')],
+                order_by=F('date').asc()
+            ),
+            # Rows with and without body fat are partitioned separately so
+            # LAG returns the latest earlier measurement that has a value
+            previous_body_fat=Window(
+                expression=Lag('body_fat_percentage'),
+                partition_by=[
+                    F('user_id'),
+                    Case(
+                        When(body_fat_percentage__isnull=True, then=Value(True)),
+                        default=Value(False),
+                        output_field=models.BooleanField()
+                    ),
+                ],
+                order_by=F('date').asc()
+            ),
+        )
+
+
 class BodyMeasurement(models.Model):
     """
     Model to track body measurements over time
@@ -136,11 +175,17 @@ class BodyMeasurement(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BodyMeasurementQuerySet.as_manager()
+    
     class Meta:
         verbose_name = '身体測定'
         verbose_name_plural = '身体測定'
         ordering = ['-date', '-created_at']
         unique_together = ['user', 'date']
+        indexes = [
+            # Serves keyset pages in (date, created_at, id) order
+            models.Index(fields=['user', 'date', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.date} - {self.weight}kg"
@@ -150,7 +195,12 @@ class BodyMeasurement(models.Model):
         """Calculate BMI if height is available"""
         try:
             # Use measurement's height if available, otherwise fall back to profile height
-            height_cm = self.height if self.height else (self.user.profile.height if hasattr(self.user, 'profile') else None)
+            if self.height:
+                height_cm = self.height
+            elif hasattr(self, 'profile_height'):
+                height_cm = self.profile_height
+            else:
+                height_cm = self.user.profile.height if hasattr(self.user, 'profile') else None
             if height_cm:
                 height_m = float(height_cm) / 100  # Convert cm to m
                 return round(float(self.weight) / (height_m ** 2), 1)
@@ -161,13 +211,16 @@ class BodyMeasurement(models.Model):
     @property
     def weight_change(self):
         """Calculate weight change from previous measurement"""
-        previous = BodyMeasurement.objects.filter(
-            user=self.user,
-            date__lt=self.date
-        ).order_by('-date').first()
+        if hasattr(self, 'previous_weight'):
+            previous_weight = self.previous_weight
+        else:
+            previous_weight = BodyMeasurement.objects.filter(
+                user=self.user_id,
+                date__lt=self.date
+            ).order_by('-date').values_list('weight', flat=True).first()
         
-        if previous:
-            return round(float(self.weight) - float(previous.weight), 2)
+        if previous_weight is not None:
+            return round(float(self.weight) - float(previous_weight), 2)
         return None
     
     @property
@@ -176,14 +229,17 @@ class BodyMeasurement(models.Model):
         if not self.body_fat_percentage:
             return None
         
-        previous = BodyMeasurement.objects.filter(
-            user=self.user,
-            date__lt=self.date,
-            body_fat_percentage__isnull=False
-        ).order_by('-date').first()
+        if hasattr(self, 'previous_body_fat'):
+            previous_body_fat = self.previous_body_fat
+        else:
+            previous_body_fat = BodyMeasurement.objects.filter(
+                user=self.user_id,
+                date__lt=self.date,
+                body_fat_percentage__isnull=False
+            ).order_by('-date').values_list('body_fat_percentage', flat=True).first()
         
-        if previous and previous.body_fat_percentage:
-            return round(float(self.body_fat_percentage) - float(previous.body_fat_percentage), 1)
+        if previous_body_fat:
+            return round(float(self.body_fat_percentage) - float(previous_body_fat), 1)
         return None
 
 
@@ -242,6 +298,10 @@ class ProgressLog(models.Model):
         verbose_name_plural = '進捗記録'
         ordering = ['-date', '-created_at']
         unique_together = ['user', 'date']
+        indexes = [
+            # Serves keyset pages in (date, created_at, id) order
+            models.Index(fields=['user', 'date', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.date}"
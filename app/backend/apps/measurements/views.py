@@ -4,8 +4,9 @@ Views for Measurements app
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Avg
+from django.db.models import Avg, F, Max, Window
 from datetime import datetime, timedelta
+from apps.core.pagination import OptionalKeysetPagination
 from .models import BodyMeasurement, ProgressLog
 from .serializers import (
     BodyMeasurementSerializer,
@@ -24,6 +25,7 @@ class BodyMeasurementListCreateView(generics.ListCreateAPIView):
     GET/POST /api/measurements/
     """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -31,7 +33,7 @@ class BodyMeasurementListCreateView(generics.ListCreateAPIView):
         return BodyMeasurementListSerializer
     
     def get_queryset(self):
-        return BodyMeasurement.objects.filter(user=self.request.user)
+        return BodyMeasurement.objects.filter(user=self.request.user).with_deltas()
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -49,8 +51,17 @@ class BodyMeasurementDetailView(generics.RetrieveUpdateDestroyAPIView):
             return BodyMeasurementCreateSerializer
         return BodyMeasurementSerializer
     
+    # Looked up through a window-valued copy of the pk so the lookup is
+    # applied after the LAG windows have seen all of the user's rows
+    lookup_field = 'measurement_pk'
+    lookup_url_kwarg = 'pk'
+    
     def get_queryset(self):
-        return BodyMeasurement.objects.filter(user=self.request.user)
+        return BodyMeasurement.objects.filter(
+            user=self.request.user
+        ).select_related('user').with_deltas().annotate(
+            measurement_pk=Window(expression=Max('pk'), partition_by=[F('pk')])
+        )
 
 
 class ProgressLogListCreateView(generics.ListCreateAPIView):
@@ -59,6 +70,7 @@ class ProgressLogListCreateView(generics.ListCreateAPIView):
     GET/POST /api/measurements/progress-logs/
     """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -98,7 +110,7 @@ def measurement_history(request):
     measurements = BodyMeasurement.objects.filter(
         user=request.user,
         date__gte=start_date
-    ).order_by('date')
+    ).with_profile_height().order_by('date')
     
     data = {
         'dates': [m.date for m in measurements],
@@ -176,7 +188,7 @@ def latest_measurement(request):
     """
     measurement = BodyMeasurement.objects.filter(
         user=request.user
-    ).order_by('-date').first()
+    ).select_related('user').with_deltas().order_by('-date').first()
     
     if measurement:
         serializer = BodyMeasurementSerializer(measurement)
@@ -196,16 +208,16 @@ def measurement_comparison(request):
     """
     measurements = BodyMeasurement.objects.filter(
         user=request.user
-    ).order_by('date')
+    ).select_related('user').with_deltas().order_by('date')
+    
+    first = measurements.first()
+    latest = measurements.last()
     
-    if measurements.count() < 2:
+    if first is None or first.pk == latest.pk:
         return Response({
             'message': 'Need at least 2 measurements for comparison'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    first = measurements.first()
-    latest = measurements.last()
-    
     comparison = {
         'starting': BodyMeasurementSerializer(first).data,
         'current': BodyMeasurementSerializer(latest).data,
@@ -2,6 +2,7 @@
 Admin configuration for Nutrition app
 """
 from django.contrib import admin
+from apps.core.pagination import EstimatedCountPaginator
 from .models import (
     Food, Meal, MealItem, MealPlan,
     FavoriteFood, FavoriteMeal, FavoriteMealItem, Recipe
@@ -11,6 +12,8 @@ from .models import (
 @admin.register(Food)
 class FoodAdmin(admin.ModelAdmin):
     """Admin configuration for Food model"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = [
         'name', 'brand', 'category', 'calories', 'protein',
         'carbohydrates', 'fats', 'is_custom', 'created_by'
@@ -51,6 +54,8 @@ class MealItemInline(admin.TabularInline):
 @admin.register(Meal)
 class MealAdmin(admin.ModelAdmin):
     """Admin configuration for Meal model"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ['user', 'name', 'meal_type', 'date', 'time', 'total_calories']
     list_filter = ['meal_type', 'date', 'created_at']
     search_fields = ['user__email', 'user__username', 'name']
@@ -79,6 +84,8 @@ class MealAdmin(admin.ModelAdmin):
 @admin.register(MealItem)
 class MealItemAdmin(admin.ModelAdmin):
     """Admin configuration for MealItem model"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ['meal', 'food', 'serving_size', 'calories', 'protein', 'carbohydrates', 'fats']
     list_filter = ['meal__meal_type', 'created_at']
     search_fields = ['meal__name', 'food__name']
@@ -5,3 +5,6 @@ class NutritionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.nutrition'
     verbose_name = 'Nutrition'
+
+    def ready(self):
+        import apps.nutrition.signals
@@ -0,0 +1,219 @@
+"""
+Bulk loader for public food composition tables
+
+Rows are streamed from a CSV/TSV file, mapped to Food fields and upserted
+in batches keyed by Food.external_id. On PostgreSQL each batch is COPYed
+into a temporary staging table and merged with one INSERT ... ON CONFLICT;
+other databases use bulk_create(update_conflicts=True).
+"""
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+from django.db import connections, transaction
+from django.utils import timezone
+from apps.core.text import normalize_search_text
+from .models import Food
+from .services import food_autocomplete
+
+
+# Food fields a composition table may provide
+CATALOG_FIELDS = [
+    'name', 'category', 'brand', 'serving_size', 'unit',
+    'calories', 'protein', 'carbohydrates', 'fats',
+    'fiber', 'sugar', 'sodium',
+    'vitamin_a', 'vitamin_c', 'calcium', 'iron',
+    'description',
+]
+REQUIRED_FIELDS = ['name', 'calories', 'protein', 'carbohydrates', 'fats']
+
+CATEGORIES = {value for value, _ in Food.CATEGORY_CHOICES}
+
+# Placeholders used by composition tables: "-" not measured, "Tr" trace
+MISSING_VALUES = {'', '-', '—', '*', 'n/a', 'na'}
+TRACE_VALUES = {'tr', 'trace'}
+
+
+class CatalogError(ValueError):
+    """A catalog file or row that cannot be loaded"""
+
+
+class FoodCatalogLoader:
+    """
+    Upsert public foods from a composition table
+
+    Args:
+        mapping: dict of file column -> Food field; columns named like a
+            field (or 'external_id') map to it without an entry
+        id_column: Column holding the stable external ID
+        batch_size: Rows upserted per transaction
+        progress: Optional callable receiving the stats after each batch
+        using: Database alias to load into
+    """
+
+    BATCH_SIZE = 10000
+    MAX_ERRORS = 100
+
+    def __init__(self, mapping=None, id_column='external_id', batch_size=BATCH_SIZE,
+                 progress=None, using='default'):
+        self.mapping = mapping or {}
+        self.id_column = id_column
+        self.batch_size = batch_size
+        self.progress = progress
+        self.using = using
+        self.stats = {'rows': 0, 'loaded': 0, 'failed': 0}
+        self.errors = []
+        self._fields = {name: Food._meta.get_field(name) for name in CATALOG_FIELDS}
+
+    def run(self, stream, delimiter=','):
+        """
+        Load every row of a text stream
+
+        Returns:
+            dict with row counts and the first MAX_ERRORS errors
+        """
+        reader = csv.DictReader(stream, delimiter=delimiter)
+        columns = self._columns(reader.fieldnames or [])
+
+        batch = {}
+        for raw in reader:
+            self.stats['rows'] += 1
+            try:
+                external_id, values = self._parse(raw, columns)
+            except CatalogError as e:
+                self._fail(reader.line_num, e)
+                continue
+            # A repeated ID within a batch keeps its last row
+            batch[external_id] = values
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = {}
+        if batch:
+            self._flush(batch)
+
+        food_autocomplete.invalidate(None)
+        return {**self.stats, 'errors': self.errors}
+
+    def _columns(self, fieldnames):
+        """Return {Food field: file column} for the file's header"""
+        columns = {}
+        for column in fieldnames:
+            field = self.mapping.get(column, column)
+            if field in self._fields:
+                columns[field] = column
+        if self.id_column not in fieldnames:
+            raise CatalogError(f'ID column not found: {self.id_column}')
+        missing = [field for field in REQUIRED_FIELDS if field not in columns]
+        if missing:
+            raise CatalogError(f"Required columns not mapped: {', '.join(missing)}")
+        return columns
+
+    def _number(self, field, text):
+        value = text.strip().strip('()').lower()
+        if value in MISSING_VALUES:
+            return None
+        if value in TRACE_VALUES:
+            return Decimal('0')
+        try:
+            number = Decimal(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+        except InvalidOperation:
+            raise CatalogError(f'{field.name} must be a number')
+        if number < 0 or number >= 10 ** (field.max_digits - field.decimal_places):
+            raise CatalogError(f'{field.name} is out of range')
+        return number
+
+    def _parse(self, raw, columns):
+        external_id = (raw.get(self.id_column) or '').strip()
+        if not external_id:
+            raise CatalogError('external ID is required')
+        if len(external_id) > Food._meta.get_field('external_id').max_length:
+            raise CatalogError('external ID is too long')
+
+        values = {}
+        for name, field in self._fields.items():
+            text = raw.get(columns[name]) if name in columns else None
+            if text is None:
+                value = None
+            elif field.get_internal_type() == 'DecimalField':
+                value = self._number(field, text)
+            else:
+                value = text.strip()[:field.max_length] if field.max_length else text.strip()
+
+            if value is None or value == '':
+                if name in REQUIRED_FIELDS:
+                    raise CatalogError(f'{name} is required')
+                value = None if field.null else field.get_default()
+            values[name] = value
+
+        if values['category'] not in CATEGORIES:
+            values['category'] = 'other'
+        values['search_text'] = normalize_search_text(values['name'], values['brand'])
+        return external_id, values
+
+    def _fail(self, line, error):
+        self.stats['failed'] += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append({'line': line, 'error': str(error)})
+
+    def _flush(self, batch):
+        with transaction.atomic(using=self.using):
+            if connections[self.using].vendor == 'postgresql':
+                self._upsert_copy(batch)
+            else:
+                self._upsert_bulk(batch)
+        self.stats['loaded'] += len(batch)
+        if self.progress:
+            self.progress(self.stats)
+
+    def _upsert_bulk(self, batch):
+        Food.objects.using(self.using).bulk_create(
+            [
+                Food(external_id=external_id, is_custom=False, **values)
+                for external_id, values in batch.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['external_id'],
+            update_fields=[*CATALOG_FIELDS, 'search_text', 'updated_at']
+        )
+
+    @staticmethod
+    def _copy_value(value):
+        if value is None:
+            return '\\N'
+        return (
+            str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r')
+        )
+
+    def _upsert_copy(self, batch):
+        """COPY the batch into a staging table and merge it in one statement"""
+        connection = connections[self.using]
+        quote = connection.ops.quote_name
+        table = quote(Food._meta.db_table)
+        staged = ['external_id', *CATALOG_FIELDS, 'search_text']
+        columns = [quote(Food._meta.get_field(name).column) for name in staged]
+        column_list = ', '.join(columns)
+
+        data = io.StringIO()
+        for external_id, values in batch.items():
+            row = [external_id, *(values[name] for name in CATALOG_FIELDS), values['search_text']]
+            data.write('\t'.join(self._copy_value(value) for value in row))
+            data.write('\n')
+        data.seek(0)
+
+        now = timezone.now()
+        updates = ', '.join(f'{column} = EXCLUDED.{column}' for column in columns[1:])
+        with connection.cursor() as cursor:
+            # Dropped on commit; also dropped here in case an outer
+            # transaction kept the previous batch's table alive
+            cursor.execute('DROP TABLE IF EXISTS food_catalog_staging')
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE food_catalog_staging ON COMMIT DROP AS '
+                f'SELECT {column_list} FROM {table} WITH NO DATA'
+            )
+            cursor.copy_expert(f'COPY food_catalog_staging ({column_list}) FROM STDIN', data)
+            cursor.execute(
+                f'INSERT INTO {table} ({column_list}, is_custom, created_at, updated_at) '
+                f'SELECT {column_list}, false, %s, %s FROM food_catalog_staging '
+                f'ON CONFLICT (external_id) DO UPDATE SET {updates}, updated_at = EXCLUDED.updated_at',
+                [now, now]
+            )
@@ -0,0 +1,248 @@
+"""
+Streaming import of meal diaries from CSV or JSON Lines
+
+Each row holds date, meal_type, food (ID or exact name) and grams. Rows are
+parsed one at a time and written in batches: a batch resolves its foods
+through a per-import cache, finds or creates one meal per (date, meal_type)
+and inserts its items with bulk_create. Every item carries an import key
+derived from the row, so importing the same file again skips stored rows.
+
+Identical rows are numbered to keep repeated servings apart. The counters
+cover the whole run, so files need not be sorted by date; they hold one
+small entry per distinct row.
+"""
+import csv
+import hashlib
+import io
+import json
+from collections import namedtuple
+from datetime import date as date_cls
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Q
+from .models import Food, Meal, MealItem
+from .signals import meals_imported
+
+
+FORMATS = ('csv', 'ndjson')
+FORMAT_EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+MEAL_TYPE_NAMES = dict(Meal.MEAL_TYPE_CHOICES)
+
+ImportRow = namedtuple('ImportRow', 'line date meal_type food grams import_key')
+
+
+class ImportRowError(ValueError):
+    """A row that cannot be imported"""
+
+
+def detect_format(filename):
+    """Guess the import format from a file name, or None"""
+    for extension, file_format in FORMAT_EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return file_format
+    return None
+
+
+def open_text(binary_file):
+    """Wrap an uploaded or opened binary file as a streaming text file"""
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+
+
+class MealDiaryImporter:
+    """
+    Import a user's meal diary in batches
+
+    Args:
+        user: User the meals belong to
+        batch_size: Rows written per transaction
+        progress: Optional callable receiving the stats after each batch
+    """
+
+    BATCH_SIZE = 1000
+    MAX_ERRORS = 100  # per-row errors kept for the report
+    MAX_GRAMS = Decimal('5000')
+
+    def __init__(self, user, batch_size=BATCH_SIZE, progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.progress = progress
+        self.stats = {'rows': 0, 'created': 0, 'skipped': 0, 'failed': 0}
+        self.errors = []
+        self._foods = {}        # food reference -> Food, or None if unknown
+        self._occurrences = {}  # row signature digest -> times seen
+
+    def run(self, stream, file_format):
+        """
+        Import every row of a text stream
+
+        Returns:
+            dict with row counts and the first MAX_ERRORS errors
+        """
+        batch = []
+        for line, raw in self._read(stream, file_format):
+            self.stats['rows'] += 1
+            try:
+                batch.append(self._parse(line, raw))
+            except ImportRowError as e:
+                self._fail(line, e)
+                continue
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        return {**self.stats, 'errors': self.errors}
+
+    @staticmethod
+    def _read(stream, file_format):
+        """Yield (line number, row dict or None if unparsable)"""
+        if file_format == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line, text in enumerate(stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                yield line, json.loads(text)
+            except ValueError:
+                yield line, None
+
+    def _parse(self, line, raw):
+        if not isinstance(raw, dict):
+            raise ImportRowError('Row is not a valid record')
+
+        try:
+            date = date_cls.fromisoformat(str(raw.get('date') or '').strip())
+        except ValueError:
+            raise ImportRowError('date must be YYYY-MM-DD')
+
+        meal_type = str(raw.get('meal_type') or '').strip().lower()
+        if meal_type not in MEAL_TYPE_NAMES:
+            raise ImportRowError(f"meal_type must be one of {', '.join(MEAL_TYPE_NAMES)}")
+
+        food = str(raw.get('food') or '').strip()
+        if not food:
+            raise ImportRowError('food is required')
+
+        try:
+            grams = Decimal(str(raw.get('grams')).strip()).quantize(Decimal('0.1'))
+        except (InvalidOperation, ValueError):
+            raise ImportRowError('grams must be a number')
+        if not 0 < grams <= self.MAX_GRAMS:
+            raise ImportRowError(f'grams must be between 0 and {self.MAX_GRAMS}')
+
+        # Identical rows are numbered so repeated servings stay distinct
+        signature = f'{date}|{meal_type}|{food}|{grams}'
+        digest = hashlib.sha1(signature.encode()).digest()[:8]
+        occurrence = self._occurrences.get(digest, 0)
+        self._occurrences[digest] = occurrence + 1
+        import_key = hashlib.sha1(f'{signature}|{occurrence}'.encode()).hexdigest()
+
+        return ImportRow(line, date, meal_type, food, grams, import_key)
+
+    def _fail(self, line, error):
+        self.stats['failed'] += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append({'line': line, 'error': str(error)})
+
+    def _resolve_foods(self, references):
+        """Load foods not yet in the cache by ID or exact name, two queries at most"""
+        missing = {reference for reference in references if reference not in self._foods}
+        if not missing:
+            return
+
+        visible = Food.objects.filter(Q(is_custom=False) | Q(created_by=self.user))
+        ids = [int(reference) for reference in missing if reference.isdigit()]
+        names = [reference for reference in missing if not reference.isdigit()]
+
+        found = {str(pk): food for pk, food in visible.in_bulk(ids).items()} if ids else {}
+        if names:
+            # The user's own foods win over public ones of the same name
+            for food in visible.filter(name__in=names).order_by('-is_custom', 'pk'):
+                found.setdefault(food.name, food)
+
+        for reference in missing:
+            self._foods[reference] = found.get(reference)
+
+    def _get_meals(self, keys):
+        """
+        Return {(date, meal_type): Meal}, creating the missing meals
+
+        Existing meals are locked until the batch commits, so a concurrent
+        import of the same rows waits and then finds them stored.
+        """
+        meals = {}
+        existing = Meal.objects.select_for_update().filter(
+            user=self.user,
+            date__in={date for date, _ in keys},
+            meal_type__in={meal_type for _, meal_type in keys}
+        ).order_by('pk')
+        for meal in existing:
+            meals.setdefault((meal.date, meal.meal_type), meal)
+
+        created = Meal.objects.bulk_create([
+            Meal(user=self.user, name=MEAL_TYPE_NAMES[meal_type], date=date, meal_type=meal_type)
+            for date, meal_type in keys
+            if (date, meal_type) not in meals
+        ])
+        for meal in created:
+            meals[(meal.date, meal.meal_type)] = meal
+        return meals
+
+    def _flush(self, batch):
+        self._write(batch)
+        if self.progress:
+            self.progress(self.stats)
+
+    def _write(self, batch):
+        self._resolve_foods({row.food for row in batch})
+        rows = []
+        for row in batch:
+            if self._foods[row.food] is None:
+                self._fail(row.line, ImportRowError(f'Unknown food: {row.food}'))
+            else:
+                rows.append(row)
+        if not rows:
+            return
+
+        with transaction.atomic():
+            meals = self._get_meals({(row.date, row.meal_type) for row in rows})
+            stored = set(MealItem.objects.filter(
+                meal__in=[meal.pk for meal in meals.values()],
+                import_key__in=[row.import_key for row in rows]
+            ).values_list('meal_id', 'import_key'))
+
+            items = []
+            for row in rows:
+                meal = meals[(row.date, row.meal_type)]
+                if (meal.pk, row.import_key) in stored:
+                    self.stats['skipped'] += 1
+                    continue
+                nutrition = self._foods[row.food].get_nutrition_per_serving(row.grams)
+                items.append(MealItem(
+                    meal=meal,
+                    food=self._foods[row.food],
+                    serving_size=row.grams,
+                    calories=nutrition['calories'],
+                    protein=nutrition['protein'],
+                    carbohydrates=nutrition['carbohydrates'],
+                    fats=nutrition['fats'],
+                    import_key=row.import_key
+                ))
+
+            MealItem.objects.bulk_create(items)
+            self.stats['created'] += len(items)
+
+            if items:
+                touched = {item.meal_id for item in items}
+                Meal.objects.filter(pk__in=touched).update_totals()
+                meals_imported.send(
+                    sender=Meal,
+                    user=self.user,
+                    dates={meal.date for meal in meals.values() if meal.pk in touched}
+                )
+
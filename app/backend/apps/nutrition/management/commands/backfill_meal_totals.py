@@ -0,0 +1,41 @@
+"""
+Django管理コマンド: 食事の栄養合計値を再計算
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.nutrition.models import Meal
+
+
+class Command(BaseCommand):
+    help = '既存の食事の栄養合計値（カロリー・PFC）を食事項目から再計算'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='1トランザクションで更新する食事数'
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='指定したユーザーIDの食事のみ再計算'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Meal.objects.order_by('pk')
+        if options['user']:
+            queryset = queryset.filter(user_id=options['user'])
+
+        meal_ids = list(queryset.values_list('pk', flat=True))
+        self.stdout.write(f"{len(meal_ids)}件の食事を再計算中...")
+
+        updated = 0
+        for start in range(0, len(meal_ids), batch_size):
+            batch = meal_ids[start:start + batch_size]
+            with transaction.atomic():
+                updated += Meal.objects.filter(pk__in=batch).update_totals()
+            self.stdout.write(f"  {updated}/{len(meal_ids)}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ 再計算完了: {updated}件"))
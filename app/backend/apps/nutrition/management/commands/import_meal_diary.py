@@ -0,0 +1,58 @@
+"""
+Django管理コマンド: 食事日記をCSV/JSON Linesからインポート
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.nutrition.imports import FORMATS, MealDiaryImporter, detect_format, open_text
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = '他アプリの食事日記（date, meal_type, food, grams）をCSVまたはJSON Linesからインポート（再実行しても重複しない）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='インポートするファイルのパス')
+        parser.add_argument(
+            '--user',
+            type=int,
+            required=True,
+            help='食事を登録するユーザーID'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='ファイル形式（省略時は拡張子から判定）'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=MealDiaryImporter.BATCH_SIZE,
+            help='1トランザクションで書き込む行数'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(pk=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"ユーザーが見つかりません: {options['user']}")
+
+        file_format = options['format'] or detect_format(options['path'])
+        if file_format is None:
+            raise CommandError('--format を指定してください（csv または ndjson）')
+
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats['rows']}行 処理済み（追加 {stats['created']} / "
+                f"スキップ {stats['skipped']} / エラー {stats['failed']}）"
+            )
+
+        importer = MealDiaryImporter(user, batch_size=options['batch_size'], progress=progress)
+        with open(options['path'], 'rb') as binary_file:
+            result = importer.run(open_text(binary_file), file_format)
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"  {error['line']}行目: {error['error']}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ インポート完了: 追加 {result['created']}件 / "
+            f"スキップ {result['skipped']}件 / エラー {result['failed']}件"
+        ))
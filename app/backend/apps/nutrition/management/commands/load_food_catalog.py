@@ -0,0 +1,77 @@
+"""
+Django管理コマンド: 食品成分表（CSV/TSV）から公開食品を一括登録・更新
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.nutrition.catalog import CATALOG_FIELDS, CatalogError, FoodCatalogLoader
+
+
+class Command(BaseCommand):
+    help = '食品成分表（CSV/TSV）を外部IDをキーに公開食品へ一括登録・更新（PostgreSQLではCOPYを使用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='食品成分表ファイルのパス')
+        parser.add_argument(
+            '--id-column',
+            default='external_id',
+            help='外部ID（食品番号など）の列名'
+        )
+        parser.add_argument(
+            '--map',
+            action='append',
+            default=[],
+            metavar='COLUMN=FIELD',
+            help=f"列名と食品フィールドの対応（複数指定可）。フィールド: {', '.join(CATALOG_FIELDS)}"
+        )
+        parser.add_argument(
+            '--delimiter',
+            help='区切り文字（省略時は拡張子が .tsv ならタブ、それ以外はカンマ）'
+        )
+        parser.add_argument(
+            '--encoding',
+            default='utf-8-sig',
+            help='ファイルの文字コード（例: cp932）'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=FoodCatalogLoader.BATCH_SIZE,
+            help='1トランザクションで登録する行数'
+        )
+
+    def handle(self, *args, **options):
+        mapping = {}
+        for entry in options['map']:
+            column, _, field = entry.partition('=')
+            if field not in CATALOG_FIELDS:
+                raise CommandError(f'不明なフィールドです: {entry}')
+            mapping[column] = field
+
+        delimiter = options['delimiter']
+        if delimiter is None:
+            delimiter = '\t' if options['path'].lower().endswith('.tsv') else ','
+        elif delimiter == '\\t':
+            delimiter = '\t'
+
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats['rows']}行 処理済み（登録・更新 {stats['loaded']} / エラー {stats['failed']}）"
+            )
+
+        loader = FoodCatalogLoader(
+            mapping=mapping,
+            id_column=options['id_column'],
+            batch_size=options['batch_size'],
+            progress=progress
+        )
+        try:
+            with open(options['path'], encoding=options['encoding'], newline='') as stream:
+                result = loader.run(stream, delimiter=delimiter)
+        except CatalogError as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"  {error['line']}行目: {error['error']}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ 読み込み完了: 登録・更新 {result['loaded']}件 / エラー {result['failed']}件"
+        ))
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:53
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_meal_totals(apps, schema_editor):
+    Meal = apps.get_model("nutrition", "Meal")
+    MealItem = apps.get_model("nutrition", "MealItem")
+
+    def item_sum(field):
+        totals = (
+            MealItem.objects.filter(meal=OuterRef("pk"))
+            .order_by()
+            .values("meal")
+            .annotate(total=Sum(field))
+            .values("total")
+        )
+        return Coalesce(
+            Subquery(totals),
+            Value(0),
+            output_field=models.DecimalField(max_digits=7, decimal_places=1),
+        )
+
+    Meal.objects.update(
+        total_calories=item_sum("calories"),
+        total_protein=item_sum("protein"),
+        total_carbs=item_sum("carbohydrates"),
+        total_fats=item_sum("fats"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nutrition", "0006_food_unit_alter_food_serving_size"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="meal",
+            name="total_calories",
+            field=models.DecimalField(
+                decimal_places=1,
+                default=0,
+                editable=False,
+                max_digits=7,
+                verbose_name="Total Calories",
+            ),
+        ),
+        migrations.AddField(
+            model_name="meal",
+            name="total_carbs",
+            field=models.DecimalField(
+                decimal_places=1,
+                default=0,
+                editable=False,
+                max_digits=6,
+                verbose_name="Total Carbs (g)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="meal",
+            name="total_fats",
+            field=models.DecimalField(
+                decimal_places=1,
+                default=0,
+                editable=False,
+                max_digits=6,
+                verbose_name="Total Fats (g)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="meal",
+            name="total_protein",
+            field=models.DecimalField(
+                decimal_places=1,
+                default=0,
+                editable=False,
+                max_digits=6,
+                verbose_name="Total Protein (g)",
+            ),
+        ),
+        migrations.RunPython(backfill_meal_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:04
+
+from django.db import migrations, models
+
+from apps.core.text import normalize_search_text
+
+
+def backfill_search_text(apps, schema_editor):
+    Food = apps.get_model("nutrition", "Food")
+    batch = []
+    for food in Food.objects.only("id", "name", "brand").iterator(chunk_size=2000):
+        food.search_text = normalize_search_text(food.name, food.brand)
+        batch.append(food)
+        if len(batch) >= 2000:
+            Food.objects.bulk_update(batch, ["search_text"])
+            batch = []
+    if batch:
+        Food.objects.bulk_update(batch, ["search_text"])
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm only exists on PostgreSQL; other backends search without an index
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS nutrition_food_search_trgm "
+        "ON nutrition_food USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS nutrition_food_search_trgm")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "nutrition",
+            "0007_meal_total_calories_meal_total_carbs_meal_total_fats_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="food",
+            name="search_text",
+            field=models.TextField(blank=True, editable=False, verbose_name="検索用テキスト"),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
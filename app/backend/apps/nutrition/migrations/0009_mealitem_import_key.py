@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nutrition", "0008_food_search_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mealitem",
+            name="import_key",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=40,
+                null=True,
+                verbose_name="インポートキー",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="mealitem",
+            constraint=models.UniqueConstraint(
+                fields=("meal", "import_key"),
+                name="nutrition_mealitem_unique_import_key",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nutrition", "0009_mealitem_import_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="food",
+            name="external_id",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=64,
+                null=True,
+                unique=True,
+                verbose_name="外部ID",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nutrition", "0010_food_external_id"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="meal",
+            name="nutrition_m_user_id_80eec6_idx",
+        ),
+        migrations.AddIndex(
+            model_name="meal",
+            index=models.Index(
+                fields=["user", "date", "time", "id"],
+                name="nutrition_m_user_id_34339d_idx",
+            ),
+        ),
+    ]
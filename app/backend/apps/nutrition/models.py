@@ -1,9 +1,12 @@
 """
 Models for nutrition tracking and meal planning
 """
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.users.models import User
+from apps.core.text import normalize_search_text
 
 
 class Food(models.Model):
@@ -134,6 +137,20 @@ class Food(models.Model):
         verbose_name='Created By'
     )
     
+    # Stable ID of public foods loaded from a composition table
+    external_id = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='外部ID'
+    )
+    
+    # Normalized name and brand; on PostgreSQL a pg_trgm GIN index is
+    # created on it by migration 0008
+    search_text = models.TextField(blank=True, editable=False, verbose_name='検索用テキスト')
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -149,6 +166,14 @@ class Food(models.Model):
     def __str__(self):
         return f"{self.name} ({self.brand})" if self.brand else self.name
     
+    def save(self, *args, **kwargs):
+        """Keep the normalized search text in sync with name and brand"""
+        self.search_text = normalize_search_text(self.name, self.brand)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'search_text' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'search_text']
+        super().save(*args, **kwargs)
+    
     def get_nutrition_per_serving(self, serving_grams):
         """Calculate nutrition for a specific serving size"""
         multiplier = float(serving_grams) / float(self.serving_size)
@@ -160,6 +185,29 @@ class Food(models.Model):
         }
 
 
+class MealQuerySet(models.QuerySet):
+    """QuerySet for Meal with helpers for the cached nutrition totals"""
+    
+    def update_totals(self):
+        """Recalculate cached nutrition totals from meal items in a single UPDATE"""
+        def item_sum(field):
+            totals = MealItem.objects.filter(
+                meal=OuterRef('pk')
+            ).order_by().values('meal').annotate(total=Sum(field)).values('total')
+            return Coalesce(
+                Subquery(totals),
+                Value(0),
+                output_field=models.DecimalField(max_digits=7, decimal_places=1)
+            )
+        
+        return self.update(
+            total_calories=item_sum('calories'),
+            total_protein=item_sum('protein'),
+            total_carbs=item_sum('carbohydrates'),
+            total_fats=item_sum('fats'),
+        )
+
+
 class Meal(models.Model):
     """
     Model for user meals
@@ -171,6 +219,8 @@ class Meal(models.Model):
         ('snack', '間食'),
     ]
     
+    TOTAL_FIELDS = ['total_calories', 'total_protein', 'total_carbs', 'total_fats']
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='meals')
     name = models.CharField(max_length=200, verbose_name='食事名')
     meal_type = models.CharField(max_length=20, choices=MEAL_TYPE_CHOICES, verbose_name='食事タイプ')
@@ -180,48 +230,58 @@ class Meal(models.Model):
     notes = models.TextField(blank=True, verbose_name='メモ')
     image = models.ImageField(upload_to='meal_images/', blank=True, null=True, verbose_name='画像')
     
+    # Cached nutrition totals, maintained from MealItem writes
+    total_calories = models.DecimalField(
+        max_digits=7,
+        decimal_places=1,
+        default=0,
+        editable=False,
+        verbose_name='Total Calories'
+    )
+    total_protein = models.DecimalField(
+        max_digits=6,
+        decimal_places=1,
+        default=0,
+        editable=False,
+        verbose_name='Total Protein (g)'
+    )
+    total_carbs = models.DecimalField(
+        max_digits=6,
+        decimal_places=1,
+        default=0,
+        editable=False,
+        verbose_name='Total Carbs (g)'
+    )
+    total_fats = models.DecimalField(
+        max_digits=6,
+        decimal_places=1,
+        default=0,
+        editable=False,
+        verbose_name='Total Fats (g)'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = MealQuerySet.as_manager()
+    
     class Meta:
         verbose_name = '食事'
         verbose_name_plural = '食事'
         ordering = ['-date', '-time']
         indexes = [
-            models.Index(fields=['user', 'date']),
+            # Also serves keyset pages in (date, time, id) order
+            models.Index(fields=['user', 'date', 'time', 'id']),
             models.Index(fields=['meal_type']),
         ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.name} ({self.date})"
     
-    @property
-    def total_calories(self):
-        """Calculate total calories for this meal"""
-        return round(sum(
-            float(item.calories) for item in self.items.all()
-        ), 1)
-    
-    @property
-    def total_protein(self):
-        """Calculate total protein for this meal"""
-        return round(sum(
-            float(item.protein) for item in self.items.all()
-        ), 1)
-    
-    @property
-    def total_carbs(self):
-        """Calculate total carbohydrates for this meal"""
-        return round(sum(
-            float(item.carbohydrates) for item in self.items.all()
-        ), 1)
-    
-    @property
-    def total_fats(self):
-        """Calculate total fats for this meal"""
-        return round(sum(
-            float(item.fats) for item in self.items.all()
-        ), 1)
+    def update_totals(self):
+        """Recalculate cached nutrition totals and refresh this instance"""
+        Meal.objects.filter(pk=self.pk).update_totals()
+        self.refresh_from_db(fields=self.TOTAL_FIELDS)
 
 
 class MealItem(models.Model):
@@ -244,11 +304,26 @@ class MealItem(models.Model):
     carbohydrates = models.DecimalField(max_digits=5, decimal_places=1, verbose_name='Carbs (g)')
     fats = models.DecimalField(max_digits=5, decimal_places=1, verbose_name='Fats (g)')
     
+    # Identifies items written by a diary import so re-imports skip them
+    import_key = models.CharField(
+        max_length=40,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='インポートキー'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         verbose_name = '食事項目'
         verbose_name_plural = '食事項目'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['meal', 'import_key'],
+                name='nutrition_mealitem_unique_import_key'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.food.name} - {self.serving_size}g"
@@ -260,7 +335,9 @@ class MealItem(models.Model):
         self.protein = nutrition['protein']
         self.carbohydrates = nutrition['carbohydrates']
         self.fats = nutrition['fats']
-        super().save(*args, **kwargs)
+        # Keep the item and its meal totals (updated in post_save) in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class MealPlan(models.Model):
@@ -1,11 +1,14 @@
 """
 Serializers for Nutrition models
 """
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from .models import (
     Food, Meal, MealItem, MealPlan, 
     FavoriteFood, FavoriteMeal, FavoriteMealItem, Recipe
 )
+from .services import MealItemService
 
 
 class FoodSerializer(serializers.ModelSerializer):
@@ -83,18 +86,18 @@ class MealCreateSerializer(serializers.ModelSerializer):
         model = Meal
         fields = ['name', 'meal_type', 'date', 'time', 'notes', 'image', 'items']
     
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
         meal = Meal.objects.create(**validated_data)
         
-        for item_data in items_data:
-            food_id = item_data.pop('food_id')
-            MealItem.objects.create(
-                meal=meal,
-                food_id=food_id,
-                **item_data
-            )
+        try:
+            MealItemService.add_items(meal, items_data)
+        except Food.DoesNotExist as e:
+            raise serializers.ValidationError({'items': [str(e)]})
         
+        # Load the items for the response in one query
+        prefetch_related_objects([meal], 'items__food')
         return meal
 
 
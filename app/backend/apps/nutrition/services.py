@@ -0,0 +1,244 @@
+"""
+Nutrition services for meal items, diary summaries, food search and autocomplete
+"""
+from datetime import timedelta
+from django.db import connections, transaction
+from django.db.models import Case, Count, Exists, OuterRef, Q, Sum, Value, When
+from .models import FavoriteFood, Food, Meal, MealItem
+from apps.core.autocomplete import PUBLIC, AutocompleteCatalog
+from apps.core.text import bigrams, normalize_search_text
+
+
+class MealItemService:
+    """Batched insertion of meal items"""
+    
+    @staticmethod
+    @transaction.atomic
+    def add_items(meal, items):
+        """
+        Add food items to a meal with one food query and one INSERT
+        
+        Args:
+            meal: Meal object
+            items: Iterable of dicts with 'food_id' and 'serving_size'
+        
+        Returns:
+            List of created MealItem objects
+        
+        Raises:
+            Food.DoesNotExist: An item references a food the meal's user cannot use
+        """
+        items = list(items)
+        if not items:
+            return []
+        
+        foods = Food.objects.filter(
+            Q(is_custom=False) | Q(created_by_id=meal.user_id)
+        ).in_bulk({item['food_id'] for item in items})
+        
+        meal_items = []
+        for item in items:
+            food = foods.get(item['food_id'])
+            if food is None:
+                raise Food.DoesNotExist(f"Food {item['food_id']} does not exist")
+            nutrition = food.get_nutrition_per_serving(item['serving_size'])
+            meal_items.append(MealItem(
+                meal=meal,
+                food=food,
+                serving_size=item['serving_size'],
+                calories=nutrition['calories'],
+                protein=nutrition['protein'],
+                carbohydrates=nutrition['carbohydrates'],
+                fats=nutrition['fats']
+            ))
+        MealItem.objects.bulk_create(meal_items)
+        
+        # bulk_create sends no signals: saving the meal's totals does, so
+        # rollups and cached responses see the new items
+        totals = meal.items.aggregate(
+            total_calories=Sum('calories'),
+            total_protein=Sum('protein'),
+            total_carbs=Sum('carbohydrates'),
+            total_fats=Sum('fats')
+        )
+        for field in Meal.TOTAL_FIELDS:
+            setattr(meal, field, totals[field] or 0)
+        meal.save(update_fields=[*Meal.TOTAL_FIELDS, 'updated_at'])
+        
+        return meal_items
+
+
+class NutritionSummaryService:
+    """Aggregate a user's meal diary into per-day nutrition totals"""
+    
+    # Longest range a single summary request may cover
+    MAX_RANGE_DAYS = 366
+    
+    @staticmethod
+    def get_daily_totals(user, start_date, end_date):
+        """
+        Get nutrition totals for every date in a range
+        
+        Args:
+            user: User object
+            start_date: First date of the range (inclusive)
+            end_date: Last date of the range (inclusive)
+        
+        Returns:
+            List of per-day dicts ordered by date; days without meals are zero-filled
+        """
+        rows = Meal.objects.filter(
+            user=user,
+            date__gte=start_date,
+            date__lte=end_date
+        ).values('date').annotate(
+            total_calories=Sum('total_calories'),
+            total_protein=Sum('total_protein'),
+            total_carbs=Sum('total_carbs'),
+            total_fats=Sum('total_fats'),
+            meals_count=Count('id')
+        ).order_by('date')
+        
+        totals_by_date = {row['date']: row for row in rows}
+        
+        daily_totals = []
+        current = start_date
+        while current <= end_date:
+            row = totals_by_date.get(current, {})
+            daily_totals.append({
+                'date': current,
+                'total_calories': float(row.get('total_calories') or 0),
+                'total_protein': float(row.get('total_protein') or 0),
+                'total_carbs': float(row.get('total_carbs') or 0),
+                'total_fats': float(row.get('total_fats') or 0),
+                'meals_count': row.get('meals_count', 0)
+            })
+            current += timedelta(days=1)
+        
+        return daily_totals
+
+
+class FoodSearchService:
+    """Relevance-ranked food search over the normalized search text"""
+    
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 50
+    
+    # Relevance bonuses added to the text similarity (0..1)
+    PREFIX_BOOST = 0.5
+    CONTAINS_BOOST = 0.3
+    CUSTOM_BOOST = 0.2
+    FAVORITE_BOOST = 0.3
+    
+    # Non-PostgreSQL fallback: candidates scored in Python per request, and
+    # the bigram similarity a non-substring match needs (like pg_trgm's threshold)
+    MAX_CANDIDATES = 500
+    MIN_SIMILARITY = 0.4
+    
+    @classmethod
+    def search(cls, queryset, user, query, limit=DEFAULT_LIMIT):
+        """
+        Search foods by name and brand
+        
+        Args:
+            queryset: Foods visible to the user
+            user: User whose custom and favorite foods are boosted
+            query: Raw search text
+            limit: Maximum number of results
+        
+        Returns:
+            List of Food objects, most relevant first
+        """
+        normalized = normalize_search_text(query)
+        if not normalized:
+            return []
+        
+        queryset = queryset.select_related('created_by').annotate(
+            is_favorite=Exists(
+                FavoriteFood.objects.filter(user=user, food=OuterRef('pk'))
+            )
+        )
+        
+        if connections[queryset.db].vendor == 'postgresql':
+            return cls._search_trigram(queryset, user, normalized, limit)
+        return cls._search_bigram(queryset, user, normalized, limit)
+    
+    @classmethod
+    def _search_trigram(cls, queryset, user, normalized, limit):
+        """Rank with pg_trgm word similarity; both filters use the GIN index"""
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        
+        boost = (
+            Case(
+                When(search_text__startswith=normalized, then=Value(cls.PREFIX_BOOST)),
+                When(search_text__contains=normalized, then=Value(cls.CONTAINS_BOOST)),
+                default=Value(0.0)
+            )
+            + Case(
+                When(is_custom=True, created_by=user, then=Value(cls.CUSTOM_BOOST)),
+                default=Value(0.0)
+            )
+            + Case(
+                When(is_favorite=True, then=Value(cls.FAVORITE_BOOST)),
+                default=Value(0.0)
+            )
+        )
+        return list(
+            queryset.filter(
+                Q(search_text__contains=normalized)
+                | Q(search_text__trigram_word_similar=normalized)
+            ).annotate(
+                relevance=TrigramWordSimilarity(normalized, 'search_text') + boost
+            ).order_by('-relevance', 'name')[:limit]
+        )
+    
+    @classmethod
+    def _search_bigram(cls, queryset, user, normalized, limit):
+        """Rank by bigram overlap in Python (SQLite and other backends)"""
+        query_grams = bigrams(normalized)
+        matches_any = Q()
+        for gram in query_grams:
+            matches_any |= Q(search_text__contains=gram)
+        
+        candidates = queryset.filter(matches_any).order_by('name')[:cls.MAX_CANDIDATES]
+        
+        def similarity(text):
+            # Dice coefficient of the bigram sets
+            text_grams = bigrams(text)
+            return 2 * len(query_grams & text_grams) / (len(query_grams) + len(text_grams))
+        
+        results = []
+        for food in candidates:
+            # Best of the whole text and its single words, like word similarity
+            relevance = max(
+                similarity(text)
+                for text in [food.search_text, *food.search_text.split(' ')]
+            )
+            if food.search_text.startswith(normalized):
+                relevance += cls.PREFIX_BOOST
+            elif normalized in food.search_text:
+                relevance += cls.CONTAINS_BOOST
+            elif relevance < cls.MIN_SIMILARITY:
+                continue
+            if food.is_custom and food.created_by_id == user.pk:
+                relevance += cls.CUSTOM_BOOST
+            if food.is_favorite:
+                relevance += cls.FAVORITE_BOOST
+            food.relevance = relevance
+            results.append(food)
+        
+        # Stable sort keeps name order among equal scores
+        results.sort(key=lambda food: food.relevance, reverse=True)
+        return results[:limit]
+
+
+def _load_food_names(owner_id):
+    """(id, name) pairs of public foods, or of one user's custom foods"""
+    if owner_id == PUBLIC:
+        foods = Food.objects.filter(is_custom=False)
+    else:
+        foods = Food.objects.filter(is_custom=True, created_by_id=owner_id)
+    return foods.values_list('id', 'name')
+
+
+food_autocomplete = AutocompleteCatalog('food', _load_food_names)
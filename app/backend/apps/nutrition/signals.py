@@ -0,0 +1,26 @@
+"""
+Signals for Nutrition app
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from .models import Food, Meal, MealItem
+from .services import food_autocomplete
+
+
+# Sent after a diary import batch writes items without per-item signals.
+# Arguments: user, dates (set of meal dates that received items)
+meals_imported = Signal()
+
+
+@receiver(post_save, sender=MealItem)
+@receiver(post_delete, sender=MealItem)
+def update_meal_totals(sender, instance, **kwargs):
+    """Keep the cached nutrition totals on the parent meal in sync"""
+    Meal.objects.filter(pk=instance.meal_id).update_totals()
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def invalidate_food_autocomplete(sender, instance, **kwargs):
+    """Rebuild the autocomplete index holding this food"""
+    food_autocomplete.invalidate(instance.created_by_id if instance.is_custom else None)
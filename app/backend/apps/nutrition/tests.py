@@ -0,0 +1,115 @@
+import io
+from datetime import date, time
+from unittest import mock
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.core.pagination import approximate_count
+from apps.users.models import User
+from .imports import MealDiaryImporter
+from .models import Food, Meal, MealItem
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pw-nutrition-1',
+        date_of_birth=date(1990, 1, 1)
+    )
+
+
+class MealDiaryImportTests(TestCase):
+    """Diary imports number repeated servings across the whole file"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('diary')
+        Food.objects.create(
+            name='Rice', category='grains', calories=130, protein=2.7,
+            carbohydrates=28, fats=0.3
+        )
+
+    def run_import(self, rows):
+        stream = io.StringIO('date,meal_type,food,grams\n' + ''.join(f'{row}\n' for row in rows))
+        # One row per batch, so repeated servings span batches
+        return MealDiaryImporter(self.user, batch_size=1).run(stream, 'csv')
+
+    def test_unsorted_file_keeps_repeated_servings(self):
+        rows = [
+            '2026-06-01,lunch,Rice,150',
+            '2026-06-02,lunch,Rice,150',
+            '2026-06-01,lunch,Rice,150',
+        ]
+        result = self.run_import(rows)
+        self.assertEqual((result['created'], result['skipped'], result['failed']), (3, 0, 0))
+        self.assertEqual(MealItem.objects.filter(meal__date=date(2026, 6, 1)).count(), 2)
+
+        # Importing the same file again skips every row
+        result = self.run_import(rows)
+        self.assertEqual((result['created'], result['skipped']), (0, 3))
+
+
+class PaginationTests(TestCase):
+    """Keyset cursors walk meals without gaps and counts fall back to exact"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('pages')
+        # Ties on (date, time) are broken by id; NULL times sort first
+        for day, meal_time in [
+            (1, time(8)), (2, time(12)), (2, time(12)), (2, None),
+            (2, time(12)), (3, time(19)), (1, None),
+        ]:
+            Meal.objects.create(
+                user=cls.user, name='Meal', meal_type='lunch',
+                date=date(2026, 6, day), time=meal_time
+            )
+        for index in range(3):
+            Food.objects.create(
+                name=f'Food {index}', category='other', calories=100, protein=1,
+                carbohydrates=1, fats=1
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_round_trip(self):
+        ids = []
+        url = '/api/nutrition/meals/?cursor=&page_size=2'
+        while url:
+            page = self.get(url)
+            self.assertNotIn('count', page)
+            self.assertLessEqual(len(page['results']), 2)
+            ids += [meal['id'] for meal in page['results']]
+            url = page['next']
+
+        meals = {meal.pk: meal for meal in Meal.objects.filter(user=self.user)}
+        expected = sorted(
+            meals,
+            key=lambda pk: (
+                -meals[pk].date.toordinal(),
+                meals[pk].time is not None,
+                -(meals[pk].time.hour if meals[pk].time else 0),
+                -pk
+            )
+        )
+        self.assertEqual(ids, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/nutrition/meals/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_estimate_falls_back_to_exact_count(self):
+        # SQLite has no planner estimate
+        self.assertEqual(approximate_count(Food.objects.all()), (3, False))
+        page = self.get('/api/nutrition/foods/')
+        self.assertEqual((page['count'], page['count_is_estimate']), (3, False))
+
+    def test_large_estimate_is_used(self):
+        with mock.patch('apps.core.pagination.estimate_count', return_value=50000):
+            page = self.get('/api/nutrition/foods/')
+        self.assertEqual((page['count'], page['count_is_estimate']), (50000, True))
@@ -5,7 +5,8 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Q
+from django.db import transaction
+from django.db.models import Q, prefetch_related_objects
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import (
@@ -19,6 +20,11 @@ from .serializers import (
     FavoriteMealSerializer, FavoriteMealCreateSerializer,
     DailyNutritionSummarySerializer, RecipeSerializer
 )
+from apps.core.pagination import EstimatedCountPagination, OptionalKeysetPagination
+from .imports import FORMATS, MealDiaryImporter, detect_format, open_text
+from .services import (
+    FoodSearchService, MealItemService, NutritionSummaryService, food_autocomplete
+)
 
 
 class FoodViewSet(viewsets.ModelViewSet):
@@ -27,6 +33,7 @@ class FoodViewSet(viewsets.ModelViewSet):
     Provides CRUD operations for foods
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = EstimatedCountPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'brand', 'category']
     ordering_fields = ['name', 'calories', 'protein', 'created_at']
@@ -76,6 +83,62 @@ class FoodViewSet(viewsets.ModelViewSet):
         foods = Food.objects.filter(created_by=request.user, is_custom=True)
         serializer = self.get_serializer(foods, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Search foods ranked by relevance
+        GET /api/nutrition/foods/search/?q=<text>&limit=20
+        
+        Matches name and brand ignoring width, case and katakana/hiragana;
+        the user's custom and favorite foods rank higher.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'q parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = int(request.query_params.get('limit', FoodSearchService.DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, FoodSearchService.MAX_LIMIT))
+        
+        foods = FoodSearchService.search(self.get_queryset(), request.user, query, limit)
+        serializer = self.get_serializer(foods, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Suggest food names for a typed prefix
+        GET /api/nutrition/foods/autocomplete/?q=<prefix>&limit=10
+        
+        Served from an in-memory index of public foods plus the user's
+        custom foods; returns id and name only.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'q parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = int(request.query_params.get('limit', food_autocomplete.DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, food_autocomplete.MAX_LIMIT))
+        
+        return Response(food_autocomplete.complete(request.user.pk, query, limit))
 
 
 class MealViewSet(viewsets.ModelViewSet):
@@ -84,6 +147,7 @@ class MealViewSet(viewsets.ModelViewSet):
     Provides CRUD operations for meals
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['date', 'time', 'created_at']
     ordering = ['-date', '-time']
@@ -135,13 +199,7 @@ class MealViewSet(viewsets.ModelViewSet):
         else:
             date = date_str
         
-        meals = Meal.objects.filter(user=request.user, date=date)
-        
-        # Calculate totals
-        total_calories = sum(meal.total_calories for meal in meals)
-        total_protein = sum(meal.total_protein for meal in meals)
-        total_carbs = sum(meal.total_carbs for meal in meals)
-        total_fats = sum(meal.total_fats for meal in meals)
+        totals = NutritionSummaryService.get_daily_totals(request.user, date, date)[0]
         
         # Get user's target calories
         target_calories = None
@@ -149,15 +207,10 @@ class MealViewSet(viewsets.ModelViewSet):
         if hasattr(request.user, 'profile'):
             target_calories = request.user.profile.daily_calorie_target
             if target_calories:
-                calories_remaining = target_calories - total_calories
+                calories_remaining = target_calories - totals['total_calories']
         
         data = {
-            'date': date,
-            'total_calories': total_calories,
-            'total_protein': total_protein,
-            'total_carbs': total_carbs,
-            'total_fats': total_fats,
-            'meals_count': meals.count(),
+            **totals,
             'target_calories': target_calories,
             'calories_remaining': calories_remaining
         }
@@ -167,32 +220,39 @@ class MealViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def weekly_summary(self, request):
-        """Get weekly nutrition summary"""
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=6)
-        
-        daily_summaries = []
-        current_date = start_date
-        
-        while current_date <= end_date:
-            meals = Meal.objects.filter(user=request.user, date=current_date)
-            
-            total_calories = sum(meal.total_calories for meal in meals)
-            total_protein = sum(meal.total_protein for meal in meals)
-            total_carbs = sum(meal.total_carbs for meal in meals)
-            total_fats = sum(meal.total_fats for meal in meals)
-            
-            daily_summaries.append({
-                'date': current_date,
-                'total_calories': total_calories,
-                'total_protein': total_protein,
-                'total_carbs': total_carbs,
-                'total_fats': total_fats,
-                'meals_count': meals.count()
-            })
-            
-            current_date += timedelta(days=1)
+        """
+        Get per-day nutrition summary for a date range
+        Query params: start, end (YYYY-MM-DD) or days (default: 7, ending today)
+        """
+        start_str = request.query_params.get('start')
+        end_str = request.query_params.get('end')
         
+        try:
+            end_date = (
+                datetime.strptime(end_str, '%Y-%m-%d').date()
+                if end_str else timezone.now().date()
+            )
+            if start_str:
+                start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
+            else:
+                days = int(request.query_params.get('days', 7))
+                start_date = end_date - timedelta(days=days - 1)
+        except ValueError:
+            return Response(
+                {'error': 'Invalid range. Use start/end as YYYY-MM-DD or days as an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        range_days = (end_date - start_date).days + 1
+        if range_days < 1 or range_days > NutritionSummaryService.MAX_RANGE_DAYS:
+            return Response(
+                {'error': f'Range must cover 1 to {NutritionSummaryService.MAX_RANGE_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        daily_summaries = NutritionSummaryService.get_daily_totals(
+            request.user, start_date, end_date
+        )
         return Response(daily_summaries)
     
     @action(detail=True, methods=['post'])
@@ -221,6 +281,39 @@ class MealViewSet(viewsets.ModelViewSet):
                 {'error': 'Item not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_diary(self, request):
+        """
+        Import meals from a CSV or JSON Lines diary file
+        POST /api/nutrition/meals/import/ (multipart: file, format=csv|ndjson)
+        
+        Rows need date, meal_type, food (ID or exact name) and grams. Items
+        are added to the day's meal of that type; re-importing a file skips
+        rows imported before.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'file is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = request.data.get('format') or detect_format(upload.name)
+        if file_format not in FORMATS:
+            return Response(
+                {'error': f"format must be one of {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            result = MealDiaryImporter(request.user).run(open_text(upload), file_format)
+        except UnicodeDecodeError:
+            return Response(
+                {'error': 'file must be UTF-8 encoded'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(result)
 
 
 class MealPlanViewSet(viewsets.ModelViewSet):
@@ -348,23 +441,26 @@ class FavoriteMealViewSet(viewsets.ModelViewSet):
         date = request.data.get('date', timezone.now().date())
         time = request.data.get('time')
         
-        # Create new meal
-        meal = Meal.objects.create(
-            user=request.user,
-            name=favorite_meal.name,
-            meal_type=favorite_meal.meal_type,
-            date=date,
-            time=time
-        )
-        
-        # Copy items from template
-        for item in favorite_meal.items.all():
-            MealItem.objects.create(
-                meal=meal,
-                food=item.food,
-                serving_size=item.serving_size
-            )
-        
+        try:
+            with transaction.atomic():
+                # Create new meal
+                meal = Meal.objects.create(
+                    user=request.user,
+                    name=favorite_meal.name,
+                    meal_type=favorite_meal.meal_type,
+                    date=date,
+                    time=time
+                )
+
+                # Copy items from template
+                MealItemService.add_items(
+                    meal, favorite_meal.items.values('food_id', 'serving_size')
+                )
+        except Food.DoesNotExist as e:
+            # The template references a food the user can no longer use
+            return Response({'items': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        prefetch_related_objects([meal], 'items__food')
         serializer = MealSerializer(meal)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
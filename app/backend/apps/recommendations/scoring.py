@@ -0,0 +1,197 @@
+"""
+Array-backed exercise catalog for scoring exercise recommendations
+
+The catalog is loaded once per process into flat feature columns and
+reloaded when the shared catalog version changes (bumped on every
+Exercise write, stored in the database so every process sees it), so each
+request only applies its per-user adjustments and selects the top k.
+"""
+import heapq
+import threading
+from array import array
+from apps.core.versions import bump_version, get_version
+from apps.workouts.models import Exercise
+
+
+CATALOG_VERSION_KEY = 'exercise-catalog-version'
+
+# Points per rule; the defaults reproduce the original rule-based scores
+DEFAULT_WEIGHTS = {
+    'new': 30,
+    'rarely_done': 15,
+    'goal_match': 25,
+    'beginner': 10,
+    'high_calorie_burn': 20,
+}
+
+HIGH_CALORIE_BURN = 8  # calories per minute
+RARELY_DONE_COUNT = 3
+
+GOAL_EXERCISE_TYPES = {
+    'weight_loss': ('cardio', 'Great for weight loss'),
+    'muscle_gain': ('strength', 'Builds muscle'),
+}
+
+
+def get_catalog_version():
+    """Return the current exercise catalog version"""
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Mark loaded catalogs and cached recommendations stale once the current transaction commits"""
+    bump_version(CATALOG_VERSION_KEY)
+
+
+class ExerciseCatalog:
+    """Column-oriented snapshot of the exercise catalog"""
+
+    def __init__(self, rows):
+        self.ids = array('q')
+        self.owner_ids = array('q')      # created_by of custom exercises, 0 otherwise
+        self.beginner = array('b')
+        self.high_burn = array('b')
+        self.types = []
+        self.rows_by_type = {}           # exercise_type -> row positions
+        self.custom_rows = []            # positions only visible to their owner
+
+        for position, (pk, exercise_type, difficulty, calories, is_custom, created_by_id) in enumerate(rows):
+            self.ids.append(pk)
+            self.owner_ids.append((created_by_id or 0) if is_custom else 0)
+            self.beginner.append(difficulty == 'beginner')
+            self.high_burn.append(bool(calories) and float(calories) > HIGH_CALORIE_BURN)
+            self.types.append(exercise_type)
+            self.rows_by_type.setdefault(exercise_type, []).append(position)
+            if is_custom:
+                self.custom_rows.append(position)
+
+        self.positions = {pk: position for position, pk in enumerate(self.ids)}
+        self._base_scores = {}
+
+    @classmethod
+    def load(cls):
+        """Read the catalog features in one query, in the default (name) order"""
+        return cls(Exercise.objects.order_by('name', 'pk').values_list(
+            'id', 'exercise_type', 'difficulty', 'calories_per_minute',
+            'is_custom', 'created_by_id'
+        ))
+
+    def base_scores(self, weights):
+        """User-independent scores, assuming every exercise is new to the user"""
+        key = tuple(sorted(weights.items()))
+        scores = self._base_scores.get(key)
+        if scores is None:
+            scores = array('q', (
+                weights['new']
+                + weights['beginner'] * beginner
+                + weights['high_calorie_burn'] * high_burn
+                for beginner, high_burn in zip(self.beginner, self.high_burn)
+            ))
+            self._base_scores[key] = scores
+        return scores
+
+
+class ExerciseScoringEngine:
+    """Score the whole exercise catalog for a user and select the top k"""
+
+    _lock = threading.Lock()
+    _loaded = None  # (version, ExerciseCatalog)
+
+    @classmethod
+    def get_catalog(cls):
+        """Return the in-process catalog, reloading it when the version changed"""
+        version = get_catalog_version()
+        loaded = cls._loaded
+        if loaded is None or loaded[0] != version:
+            with cls._lock:
+                loaded = cls._loaded
+                if loaded is None or loaded[0] != version:
+                    loaded = cls._loaded = (version, ExerciseCatalog.load())
+        return loaded[1]
+
+    @classmethod
+    def score(cls, catalog, user_id, goal, exercise_counts, weights):
+        """
+        Score every catalog row for a user
+
+        Args:
+            catalog: ExerciseCatalog
+            user_id: ID of the user
+            goal: The user's fitness goal
+            exercise_counts: dict of exercise ID to times done recently
+            weights: Points per rule (see DEFAULT_WEIGHTS)
+
+        Returns:
+            array of scores aligned with catalog.ids; rows the user cannot
+            see score 0
+        """
+        scores = array('q', catalog.base_scores(weights))
+
+        goal_type = GOAL_EXERCISE_TYPES.get(goal)
+        if goal_type:
+            for position in catalog.rows_by_type.get(goal_type[0], ()):
+                scores[position] += weights['goal_match']
+
+        # Exercises done recently are not new; rarely done ones get a smaller bonus
+        for exercise_id, count in exercise_counts.items():
+            position = catalog.positions.get(exercise_id)
+            if position is not None:
+                scores[position] -= weights['new']
+                if count < RARELY_DONE_COUNT:
+                    scores[position] += weights['rarely_done']
+
+        for position in catalog.custom_rows:
+            if catalog.owner_ids[position] != user_id:
+                scores[position] = 0
+
+        return scores
+
+    @staticmethod
+    def _reasons(catalog, position, goal, exercise_counts):
+        """Explain the score of one catalog row"""
+        reasons = []
+        count = exercise_counts.get(catalog.ids[position], 0)
+        if not count:
+            reasons.append("New exercise to try")
+        elif count < RARELY_DONE_COUNT:
+            reasons.append("Haven't done this much")
+
+        goal_type = GOAL_EXERCISE_TYPES.get(goal)
+        if goal_type and catalog.types[position] == goal_type[0]:
+            reasons.append(goal_type[1])
+
+        if catalog.beginner[position]:
+            reasons.append("Easy to learn")
+        if catalog.high_burn[position]:
+            reasons.append("High calorie burn")
+        return reasons
+
+    @classmethod
+    def recommend(cls, user_id, goal, exercise_counts, limit=10, weights=None):
+        """
+        Recommend the best scoring exercises for a user
+
+        Returns:
+            List of dicts with 'exercise', 'score' and 'reasons', best first
+        """
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        catalog = cls.get_catalog()
+        scores = cls.score(catalog, user_id, goal, exercise_counts, weights)
+
+        # Partial selection; ties keep catalog (name) order
+        top = [
+            position
+            for position in heapq.nlargest(limit, range(len(scores)), key=scores.__getitem__)
+            if scores[position] > 0
+        ]
+
+        exercises = Exercise.objects.in_bulk([catalog.ids[position] for position in top])
+        return [
+            {
+                'exercise': exercises[catalog.ids[position]],
+                'score': scores[position],
+                'reasons': cls._reasons(catalog, position, goal, exercise_counts)
+            }
+            for position in top
+            if catalog.ids[position] in exercises
+        ]
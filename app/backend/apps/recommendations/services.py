@@ -3,12 +3,13 @@ Recommendation service for generating personalized workout and meal suggestions
 """
 import os
 from datetime import datetime, timedelta
-from django.db.models import Avg, Count, Q
+from django.db.models import Count, Q, Sum
 from apps.measurements.models import BodyMeasurement
 from apps.nutrition.models import Meal, Food
 from apps.users.models import FoodPreference
-from apps.workouts.models import Workout, Exercise, WorkoutPlan
+from apps.workouts.models import Workout, WorkoutExercise, WorkoutPlan
 from apps.analytics.services import MetabolismCalculator, ProgressAnalyzer
+from .scoring import ExerciseScoringEngine
 
 
 class WorkoutRecommendationEngine:
@@ -75,70 +76,35 @@ class WorkoutRecommendationEngine:
         try:
             profile = user.profile
             
-            # Get user's workout history
-            recent_workouts = Workout.objects.filter(
-                user=user,
-                date__gte=datetime.now().date() - timedelta(days=30)
-            ).prefetch_related('exercises__exercise')
-            
-            # Get exercises user has done
-            done_exercise_ids = set()
-            exercise_counts = {}
-            
-            for workout in recent_workouts:
-                for workout_exercise in workout.exercises.all():
-                    exercise = workout_exercise.exercise
-                    done_exercise_ids.add(exercise.id)
-                    exercise_counts[exercise.id] = exercise_counts.get(exercise.id, 0) + 1
-            
-            # Get exercises user hasn't tried or rarely does
-            all_exercises = Exercise.objects.filter(
-                Q(is_custom=False) | Q(created_by=user)
+            # How often each exercise was done in the last 30 days
+            exercise_counts = dict(
+                WorkoutExercise.objects.filter(
+                    workout__user=user,
+                    workout__date__gte=datetime.now().date() - timedelta(days=30)
+                ).values('exercise_id').annotate(
+                    count=Count('id')
+                ).order_by().values_list('exercise_id', 'count')
             )
             
-            recommendations = []
-            
-            for exercise in all_exercises:
-                score = 0
-                reasons = []
-                
-                # Prefer exercises not done recently
-                if exercise.id not in done_exercise_ids:
-                    score += 30
-                    reasons.append("New exercise to try")
-                elif exercise_counts.get(exercise.id, 0) < 3:
-                    score += 15
-                    reasons.append("Haven't done this much")
-                
-                # Match with goal
-                if profile.fitness_goal == 'weight_loss' and exercise.exercise_type == 'cardio':
-                    score += 25
-                    reasons.append("Great for weight loss")
-                elif profile.fitness_goal == 'muscle_gain' and exercise.exercise_type == 'strength':
-                    score += 25
-                    reasons.append("Builds muscle")
-                
-                # Consider difficulty
-                if exercise.difficulty == 'beginner':
-                    score += 10
-                    reasons.append("Easy to learn")
-                
-                # High calorie burn
-                if exercise.calories_per_minute and float(exercise.calories_per_minute) > 8:
-                    score += 20
-                    reasons.append("High calorie burn")
-                
-                if score > 0:
-                    recommendations.append({
-                        'exercise': exercise,
-                        'score': score,
-                        'reasons': reasons
-                    })
-            
-            # Sort by score
-            recommendations.sort(key=lambda x: x['score'], reverse=True)
+            recommendations = ExerciseScoringEngine.recommend(
+                user.pk, profile.fitness_goal, exercise_counts, limit=10
+            )
             
-            return recommendations[:10]
+            # Plain values, so the result can be rendered and cached as JSON
+            return [
+                {
+                    **item,
+                    'exercise': {
+                        'id': item['exercise'].id,
+                        'name': item['exercise'].name,
+                        'exercise_type': item['exercise'].exercise_type,
+                        'difficulty': item['exercise'].difficulty,
+                        'equipment': item['exercise'].equipment,
+                        'calories_per_minute': item['exercise'].calories_per_minute,
+                    },
+                }
+                for item in recommendations
+            ]
         
         except Exception as e:
             return []
@@ -257,16 +223,16 @@ class NutritionRecommendationEngine:
     def get_nutrition_tips(user):
         """Get personalized nutrition tips"""
         try:
-            # Get recent nutrition data
+            # Get recent nutrition data (daily averages over logged days)
             recent_meals = Meal.objects.filter(
                 user=user,
                 date__gte=datetime.now().date() - timedelta(days=7)
             ).aggregate(
-                avg_calories=Avg('total_calories'),
-                avg_protein=Avg('total_protein'),
-                avg_carbs=Avg('total_carbs'),
-                avg_fats=Avg('total_fats')
+                total_calories=Sum('total_calories'),
+                total_protein=Sum('total_protein'),
+                logged_days=Count('date', distinct=True)
             )
+            logged_days = recent_meals['logged_days'] or 1
             
             tips = []
             
@@ -274,7 +240,7 @@ class NutritionRecommendationEngine:
             metabolism = MetabolismCalculator.calculate_for_user(user)
             if metabolism:
                 tdee = metabolism['tdee']
-                avg_calories = recent_meals['avg_calories'] or 0
+                avg_calories = float(recent_meals['total_calories'] or 0) / logged_days
                 
                 if avg_calories < tdee - 500:
                     tips.append({
@@ -299,7 +265,7 @@ class NutritionRecommendationEngine:
                     })
             
             # Protein tip
-            avg_protein = recent_meals['avg_protein'] or 0
+            avg_protein = float(recent_meals['total_protein'] or 0) / logged_days
             if avg_protein < 80:
                 tips.append({
                     'type': 'suggestion',
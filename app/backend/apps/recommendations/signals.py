@@ -0,0 +1,14 @@
+"""
+Signals keeping the in-process exercise catalog used for scoring current
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.workouts.models import Exercise
+from .scoring import bump_catalog_version
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def invalidate_exercise_catalog(sender, instance, **kwargs):
+    """Reload the scoring catalog after any exercise change"""
+    bump_catalog_version()
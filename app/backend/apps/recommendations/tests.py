@@ -0,0 +1,49 @@
+from datetime import date
+from unittest import mock
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.users.models import User, UserProfile
+from apps.workouts.models import Exercise
+
+
+class ExerciseCatalogVersionTests(TestCase):
+    """Exercise changes reach cached recommendations and loaded catalogs of every worker"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='recs', email='recs@example.com', password='pw-recs-1',
+            date_of_birth=date(1990, 1, 1)
+        )
+        UserProfile.objects.create(
+            user=cls.user, gender='female', height=165, current_weight=60,
+            target_weight=58, activity_level='moderate', fitness_goal='weight_loss'
+        )
+        cls.create_exercise('Walk')
+
+    @staticmethod
+    def create_exercise(name):
+        return Exercise.objects.create(
+            name=name, description='', exercise_type='cardio', difficulty='beginner',
+            equipment='none', calories_per_minute=9
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def recommended(self, worker_cache):
+        with mock.patch('apps.analytics.cache.cache', worker_cache):
+            response = self.client.get('/api/recommendations/workouts/?type=exercises')
+        self.assertEqual(response.status_code, 200)
+        return [item['exercise']['name'] for item in response.json()['recommendations']]
+
+    def test_new_exercise_invalidates_cached_recommendations(self):
+        worker = LocMemCache('worker-a', {})
+        self.assertEqual(self.recommended(worker), ['Walk'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_exercise('Row')
+
+        self.assertEqual(self.recommended(worker), ['Row', 'Walk'])
@@ -2,6 +2,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from apps.analytics.cache import cache_user_response
+from .scoring import CATALOG_VERSION_KEY
 from .services import (
     WorkoutRecommendationEngine,
     NutritionRecommendationEngine,
@@ -13,6 +15,7 @@ class WorkoutRecommendationsView(APIView):
     """Get workout recommendations"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response(shared_versions=[CATALOG_VERSION_KEY])
     def get(self, request):
         """Get personalized workout recommendations"""
         recommendation_type = request.query_params.get('type', 'plans')
@@ -39,6 +42,7 @@ class NutritionRecommendationsView(APIView):
     """Get nutrition recommendations"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response
     def get(self, request):
         """Get personalized nutrition recommendations"""
         recommendation_type = request.query_params.get('type', 'meals')
@@ -66,6 +70,7 @@ class PersonalizedPlanView(APIView):
     """Get comprehensive personalized plan"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response(shared_versions=[CATALOG_VERSION_KEY])
     def get(self, request):
         """Get AI-powered personalized plan"""
         plan = AIRecommendationEngine.generate_personalized_plan(request.user)
@@ -83,6 +88,7 @@ class AIInsightsView(APIView):
     """Get AI-generated insights"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response
     def get(self, request):
         """Get AI insights about user's progress"""
         insights = AIRecommendationEngine.get_ai_insights(request.user)
@@ -97,6 +103,7 @@ class DailyRecommendationsView(APIView):
     """Get daily recommendations"""
     permission_classes = [IsAuthenticated]
     
+    @cache_user_response
     def get(self, request):
         """Get all daily recommendations"""
         workout_tips = WorkoutRecommendationEngine.get_daily_workout_tip(request.user)
@@ -1,7 +1,8 @@
 from django.contrib import admin
+from apps.core.pagination import EstimatedCountPaginator
 from .models import (
     Exercise, ExerciseMedia, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
-    Workout, WorkoutExercise, WorkoutSchedule, FavoriteExercise
+    Workout, WorkoutExercise, WorkoutSet, WorkoutSchedule, FavoriteExercise
 )
 
 
@@ -31,6 +32,8 @@ class WorkoutExerciseInline(admin.TabularInline):
 
 @admin.register(Exercise)
 class ExerciseAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ['name', 'exercise_type', 'difficulty', 'equipment', 'calories_per_minute', 'is_custom', 'created_at']
     list_filter = ['exercise_type', 'difficulty', 'equipment', 'is_custom']
     search_fields = ['name', 'description', 'primary_muscles', 'secondary_muscles']
@@ -98,6 +101,8 @@ class WorkoutPlanExerciseAdmin(admin.ModelAdmin):
 
 @admin.register(Workout)
 class WorkoutAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ['user', 'name', 'date', 'duration_minutes', 'total_calories_burned', 'completed', 'created_at']
     list_filter = ['completed', 'date', 'workout_plan']
     search_fields = ['name', 'notes', 'user__email']
@@ -125,11 +130,25 @@ class WorkoutAdmin(admin.ModelAdmin):
 
 @admin.register(WorkoutExercise)
 class WorkoutExerciseAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ['workout', 'exercise', 'order', 'planned_sets', 'completed_sets', 'completed']
     list_filter = ['completed', 'workout__date']
     autocomplete_fields = ['exercise']
 
 
+@admin.register(WorkoutSet)
+class WorkoutSetAdmin(admin.ModelAdmin):
+    """Read-only admin for the per-set rows derived from workout exercises"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_display = ['user', 'exercise', 'date', 'set_index', 'reps', 'weight_kg', 'rpe']
+    list_filter = ['date']
+    search_fields = ['user__email', 'exercise__name']
+    date_hierarchy = 'date'
+    readonly_fields = [field.name for field in WorkoutSet._meta.fields]
+
+
 @admin.register(WorkoutSchedule)
 class WorkoutScheduleAdmin(admin.ModelAdmin):
     list_display = ['user', 'workout_plan', 'start_date', 'end_date', 'is_active', 'completed']
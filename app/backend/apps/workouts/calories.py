@@ -0,0 +1,62 @@
+"""
+Incremental maintenance of Workout.total_calories_burned
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from .models import Workout
+
+
+# Per-thread stack of {workout_id: delta} dicts for nested deferral blocks
+_deferred = threading.local()
+
+
+def _apply(workout_id, delta):
+    """Add delta to a workout's total in one UPDATE, never going below zero"""
+    Workout.objects.filter(pk=workout_id).update(
+        total_calories_burned=Greatest(
+            F('total_calories_burned') + Value(delta),
+            Value(Decimal('0'))
+        )
+    )
+
+
+def apply_calorie_delta(workout_id, delta):
+    """Apply a change in exercise calories to the workout total, or defer it"""
+    if not delta:
+        return
+
+    stack = getattr(_deferred, 'stack', None)
+    if stack:
+        pending = stack[-1]
+        pending[workout_id] = pending.get(workout_id, Decimal('0')) + delta
+        return
+
+    _apply(workout_id, delta)
+
+
+@contextmanager
+def defer_calorie_updates():
+    """
+    Collect calorie deltas and apply them once per workout on exit.
+
+    Used around bulk changes to a workout's exercises so that the total is
+    written in a single UPDATE instead of once per exercise row. The block
+    runs in a transaction, so on_commit work (e.g. analytics rollups) sees
+    the final total.
+    """
+    stack = getattr(_deferred, 'stack', None)
+    if stack is None:
+        stack = _deferred.stack = []
+
+    with transaction.atomic():
+        stack.append({})
+        try:
+            yield
+        finally:
+            pending = stack.pop()
+        for workout_id, delta in pending.items():
+            apply_calorie_delta(workout_id, delta)
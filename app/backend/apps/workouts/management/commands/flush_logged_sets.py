@@ -0,0 +1,29 @@
+"""
+Django管理コマンド: 未反映のセット記録をワークアウト種目へ反映
+"""
+from django.core.management.base import BaseCommand
+from apps.workouts.models import WorkoutExercise
+from apps.workouts.sets import flush_logged_sets
+
+
+class Command(BaseCommand):
+    help = '閲覧・完了されていないワークアウトの未反映セット記録（sets_dirty）を種目の実績・カロリーへ反映（定期実行用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='1トランザクションで反映する種目数'
+        )
+
+    def handle(self, *args, **options):
+        dirty = WorkoutExercise.objects.filter(sets_dirty=True).order_by('pk')
+        pks = list(dirty.values_list('pk', flat=True))
+
+        flushed = 0
+        for start in range(0, len(pks), options['batch_size']):
+            batch = pks[start:start + options['batch_size']]
+            flushed += flush_logged_sets(WorkoutExercise.objects.filter(pk__in=batch))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ 反映完了: {flushed}件"))
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:01
+
+from django.db import migrations, models
+from django.db.models import (
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, NullIf
+
+
+def backfill_exercise_calories(apps, schema_editor):
+    Exercise = apps.get_model("workouts", "Exercise")
+    WorkoutExercise = apps.get_model("workouts", "WorkoutExercise")
+
+    calories_per_minute = Subquery(
+        Exercise.objects.filter(pk=OuterRef("exercise_id")).values(
+            "calories_per_minute"
+        )[:1]
+    )
+    # Planned duration, or 3 seconds per rep (10 reps when not planned)
+    duration_seconds = Coalesce(
+        NullIf(F("planned_duration_seconds"), Value(0)),
+        F("completed_sets") * Coalesce(F("planned_reps"), Value(10)) * Value(3),
+    )
+    calories = ExpressionWrapper(
+        calories_per_minute * duration_seconds / Value(60),
+        output_field=models.DecimalField(max_digits=7, decimal_places=2),
+    )
+    WorkoutExercise.objects.filter(completed=True).update(
+        calories_burned=Coalesce(calories, Value(0))
+    )
+
+
+def backfill_workout_totals(apps, schema_editor):
+    Workout = apps.get_model("workouts", "Workout")
+    WorkoutExercise = apps.get_model("workouts", "WorkoutExercise")
+
+    # Totals are maintained by adding exercise deltas from now on, so they
+    # must start as the sum of the exercises. Workouts without exercises
+    # keep their hand-entered total.
+    totals = (
+        WorkoutExercise.objects.filter(workout=OuterRef("pk"))
+        .order_by()
+        .values("workout")
+        .annotate(total=Sum("calories_burned"))
+        .values("total")
+    )
+    Workout.objects.filter(
+        Exists(WorkoutExercise.objects.filter(workout=OuterRef("pk")))
+    ).update(
+        total_calories_burned=Subquery(
+            totals, output_field=models.DecimalField(max_digits=7, decimal_places=2)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workouts", "0008_alter_exercise_instructions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workoutexercise",
+            name="calories_burned",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=7
+            ),
+        ),
+        migrations.RunPython(backfill_exercise_calories, migrations.RunPython.noop),
+        migrations.RunPython(backfill_workout_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workouts", "0009_workoutexercise_calories_burned"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="workout",
+            name="workouts_wo_user_id_f1c995_idx",
+        ),
+        migrations.AddIndex(
+            model_name="workout",
+            index=models.Index(
+                fields=["user", "date", "created_at", "id"],
+                name="workouts_wo_user_id_58a169_idx",
+            ),
+        ),
+    ]
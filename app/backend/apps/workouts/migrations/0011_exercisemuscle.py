@@ -0,0 +1,85 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_exercise_muscles(apps, schema_editor):
+    Exercise = apps.get_model("workouts", "Exercise")
+    ExerciseMuscle = apps.get_model("workouts", "ExerciseMuscle")
+
+    rows = []
+    exercises = Exercise.objects.only("primary_muscles", "secondary_muscles")
+    for exercise in exercises.iterator(chunk_size=2000):
+        for role, muscles in (
+            ("primary", exercise.primary_muscles),
+            ("secondary", exercise.secondary_muscles),
+        ):
+            names = []
+            for muscle in muscles if isinstance(muscles, list) else []:
+                name = str(muscle).strip()[:50] if muscle is not None else ""
+                if name and name not in names:
+                    names.append(name)
+            rows.extend(
+                ExerciseMuscle(exercise_id=exercise.pk, muscle=name, role=role)
+                for name in names
+            )
+        if len(rows) >= 2000:
+            ExerciseMuscle.objects.bulk_create(rows)
+            rows = []
+    ExerciseMuscle.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workouts", "0010_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExerciseMuscle",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("muscle", models.CharField(max_length=50)),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[("primary", "主動筋"), ("secondary", "補助筋")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "exercise",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="muscles",
+                        to="workouts.exercise",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["muscle", "exercise"],
+                        name="workouts_ex_muscle_b27c13_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="exercisemuscle",
+            constraint=models.UniqueConstraint(
+                fields=("exercise", "muscle", "role"),
+                name="unique_exercise_muscle_role",
+            ),
+        ),
+        migrations.RunPython(backfill_exercise_muscles, migrations.RunPython.noop),
+    ]
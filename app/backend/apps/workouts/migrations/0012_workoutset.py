@@ -0,0 +1,158 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:23
+
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_workout_sets(apps, schema_editor):
+    WorkoutExercise = apps.get_model("workouts", "WorkoutExercise")
+    WorkoutSet = apps.get_model("workouts", "WorkoutSet")
+
+    def reps_value(value):
+        try:
+            reps = int(value)
+        except (TypeError, ValueError):
+            return None
+        return reps if reps >= 0 else None
+
+    def weight_value(value):
+        try:
+            weight = Decimal(str(value)).quantize(Decimal("0.01"))
+        except (InvalidOperation, ValueError):
+            return None
+        return weight if 0 <= weight < 10000 else None
+
+    rows = []
+    workout_exercises = WorkoutExercise.objects.values_list(
+        "pk",
+        "exercise_id",
+        "actual_reps",
+        "actual_weight_kg",
+        "workout__user_id",
+        "workout__date",
+    )
+    for pk, exercise_id, reps, weights, user_id, date in workout_exercises.iterator(
+        chunk_size=2000
+    ):
+        reps = reps if isinstance(reps, list) else []
+        weights = weights if isinstance(weights, list) else []
+        for index in range(max(len(reps), len(weights))):
+            set_reps = reps_value(reps[index]) if index < len(reps) else None
+            set_weight = weight_value(weights[index]) if index < len(weights) else None
+            if set_reps is None and set_weight is None:
+                continue
+            rows.append(
+                WorkoutSet(
+                    workout_exercise_id=pk,
+                    set_index=index,
+                    reps=set_reps,
+                    weight_kg=set_weight,
+                    user_id=user_id,
+                    exercise_id=exercise_id,
+                    date=date,
+                )
+            )
+        if len(rows) >= 2000:
+            WorkoutSet.objects.bulk_create(rows)
+            rows = []
+    WorkoutSet.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("workouts", "0011_exercisemuscle"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkoutSet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "set_index",
+                    models.PositiveSmallIntegerField(
+                        help_text="Position in the exercise, from 0"
+                    ),
+                ),
+                ("reps", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "weight_kg",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=6, null=True
+                    ),
+                ),
+                (
+                    "rpe",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=1,
+                        help_text="Rate of perceived exertion (1-10)",
+                        max_digits=3,
+                        null=True,
+                        validators=[
+                            django.core.validators.MinValueValidator(1),
+                            django.core.validators.MaxValueValidator(10),
+                        ],
+                    ),
+                ),
+                (
+                    "duration_seconds",
+                    models.PositiveIntegerField(blank=True, null=True),
+                ),
+                ("date", models.DateField()),
+                (
+                    "exercise",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="workouts.exercise",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="workout_sets",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "workout_exercise",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sets",
+                        to="workouts.workoutexercise",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["workout_exercise", "set_index"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "exercise", "date"],
+                        name="workouts_wo_user_id_7fe0d5_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="workoutset",
+            constraint=models.UniqueConstraint(
+                fields=("workout_exercise", "set_index"),
+                name="unique_workout_set_index",
+            ),
+        ),
+        migrations.RunPython(backfill_workout_sets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workouts", "0012_workoutset"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workoutexercise",
+            name="sets_dirty",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="workoutset",
+            name="set_key",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="workoutexercise",
+            index=models.Index(
+                condition=models.Q(("sets_dirty", True)),
+                fields=["workout"],
+                name="workoutexercise_dirty_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="workoutset",
+            constraint=models.UniqueConstraint(
+                fields=("workout_exercise", "set_key"), name="unique_workout_set_key"
+            ),
+        ),
+    ]
@@ -0,0 +1,143 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:29
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def expand_existing_schedules(apps, schema_editor):
+    WorkoutSchedule = apps.get_model("workouts", "WorkoutSchedule")
+    WorkoutPlanDay = apps.get_model("workouts", "WorkoutPlanDay")
+    Workout = apps.get_model("workouts", "Workout")
+    WorkoutScheduleSession = apps.get_model("workouts", "WorkoutScheduleSession")
+
+    plan_days = {}
+    for day in WorkoutPlanDay.objects.all():
+        plan_days.setdefault(day.workout_plan_id, {})[day.day_number] = day
+
+    for schedule in WorkoutSchedule.objects.select_related("workout_plan").iterator():
+        days = plan_days.get(schedule.workout_plan_id)
+        if not days:
+            continue
+        end = schedule.end_date or schedule.start_date + timedelta(
+            weeks=schedule.workout_plan.duration_weeks
+        )
+        end = min(end, schedule.start_date + timedelta(days=729))
+        cycle = max(days)
+
+        workouts = {}
+        for workout in Workout.objects.filter(
+            user_id=schedule.user_id,
+            date__range=(schedule.start_date, end),
+        ).order_by("pk"):
+            if workout.workout_plan_id in (None, schedule.workout_plan_id):
+                current = workouts.get(workout.date)
+                if current is None or (workout.completed and not current.completed):
+                    workouts[workout.date] = workout
+
+        sessions = []
+        for offset in range((end - schedule.start_date).days + 1):
+            day = days.get(offset % cycle + 1)
+            if day is None:
+                continue
+            date = schedule.start_date + timedelta(days=offset)
+            workout = None if day.rest_day else workouts.get(date)
+            sessions.append(
+                WorkoutScheduleSession(
+                    schedule_id=schedule.pk,
+                    user_id=schedule.user_id,
+                    date=date,
+                    plan_day_id=day.pk,
+                    day_number=day.day_number,
+                    rest_day=day.rest_day,
+                    workout=workout,
+                    completed=bool(workout and workout.completed),
+                )
+            )
+        WorkoutScheduleSession.objects.bulk_create(sessions, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("workouts", "0013_workout_set_logging"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkoutScheduleSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("day_number", models.IntegerField()),
+                ("rest_day", models.BooleanField(default=False)),
+                (
+                    "completed",
+                    models.BooleanField(
+                        default=False, help_text="Linked workout is completed"
+                    ),
+                ),
+                (
+                    "plan_day",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="sessions",
+                        to="workouts.workoutplanday",
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sessions",
+                        to="workouts.workoutschedule",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="workout_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "workout",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="schedule_sessions",
+                        to="workouts.workout",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "date"], name="workouts_wo_user_id_9c7bab_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="workoutschedulesession",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "date"), name="unique_schedule_session_date"
+            ),
+        ),
+        migrations.RunPython(expand_existing_schedules, migrations.RunPython.noop),
+    ]
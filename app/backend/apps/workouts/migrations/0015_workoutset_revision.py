@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workouts", "0014_workoutschedulesession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workoutset",
+            name="revision",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,6 +1,8 @@
+from decimal import Decimal
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Lag
 
 
 class Exercise(models.Model):
@@ -30,6 +32,12 @@ class Exercise(models.Model):
         ('other', 'その他'),
     ]
 
+    MUSCLE_GROUPS = [
+        'chest', 'back', 'shoulders', 'biceps', 'triceps',
+        'forearms', 'abs', 'obliques', 'quads', 'hamstrings',
+        'glutes', 'calves', 'traps', 'lats'
+    ]
+
     name = models.CharField(max_length=200)
     description = models.TextField()
     exercise_type = models.CharField(max_length=20, choices=EXERCISE_TYPES)
@@ -121,6 +129,41 @@ class ExerciseMedia(models.Model):
         return f"{self.exercise.name} - {self.media_type} #{self.order}"
 
 
+class ExerciseMuscle(models.Model):
+    """
+    Indexed copy of an exercise's primary and secondary muscle lists
+
+    Rebuilt from the JSON lists whenever the exercise is saved, so muscle
+    filters and facet counts use an index instead of scanning the JSON.
+    """
+    ROLE_CHOICES = [
+        ('primary', '主動筋'),
+        ('secondary', '補助筋'),
+    ]
+
+    exercise = models.ForeignKey(
+        Exercise,
+        on_delete=models.CASCADE,
+        related_name='muscles'
+    )
+    muscle = models.CharField(max_length=50)
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['exercise', 'muscle', 'role'],
+                name='unique_exercise_muscle_role'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['muscle', 'exercise']),
+        ]
+
+    def __str__(self):
+        return f"{self.exercise_id} - {self.muscle} ({self.role})"
+
+
 class WorkoutPlan(models.Model):
     """Pre-defined workout plans"""
     GOAL_CHOICES = [
@@ -273,16 +316,38 @@ class Workout(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # (date, completed, workout_plan_id) as last stored, None when unknown
+    _saved_schedule_link = None
+
     class Meta:
         ordering = ['-date', '-created_at']
         indexes = [
-            models.Index(fields=['user', 'date']),
+            # Also serves keyset pages in (date, created_at, id) order
+            models.Index(fields=['user', 'date', 'created_at', 'id']),
             models.Index(fields=['user', 'completed']),
         ]
 
     def __str__(self):
         return f"{self.user.email} - {self.name} ({self.date})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'date', 'completed', 'workout_plan_id'} <= instance.__dict__.keys():
+            instance._saved_schedule_link = instance._schedule_link()
+        return instance
+
+    def _schedule_link(self):
+        return (self.date, self.completed, self.workout_plan_id)
+
+    def schedule_link_changed(self):
+        """Whether the fields linking this workout to scheduled sessions changed since it was stored"""
+        return self._saved_schedule_link != self._schedule_link()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._saved_schedule_link = self._schedule_link()
+
     def calculate_duration(self):
         """Calculate workout duration from start and end time"""
         if self.start_time and self.end_time:
@@ -335,13 +400,184 @@ class WorkoutExercise(models.Model):
     
     notes = models.TextField(blank=True)
     completed = models.BooleanField(default=False)
+    
+    # Share of the workout's total_calories_burned (0 until completed)
+    calories_burned = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        default=0,
+        editable=False
+    )
+
+    # Set when sets were logged one at a time and the actual_* lists,
+    # completed_sets and calories_burned still need to be rebuilt from them
+    # (done when the workout is next read or completed, or by flush_logged_sets)
+    sets_dirty = models.BooleanField(default=False, editable=False)
+
+    # calories_burned as last stored, None when unknown
+    _saved_calories = None
 
     class Meta:
         ordering = ['workout', 'order']
+        indexes = [
+            models.Index(
+                fields=['workout'],
+                condition=models.Q(sets_dirty=True),
+                name='workoutexercise_dirty_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.exercise.name} in {self.workout.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'calories_burned' in instance.__dict__:
+            instance._saved_calories = instance.calories_burned
+        return instance
+
+    def estimate_calories(self):
+        """Estimate calories burned by this exercise, 0 unless completed"""
+        if not self.completed:
+            return Decimal('0')
+
+        if WorkoutExercise.exercise.is_cached(self):
+            calories_per_minute = self.exercise.calories_per_minute
+        else:
+            calories_per_minute = Exercise.objects.filter(
+                pk=self.exercise_id
+            ).values_list('calories_per_minute', flat=True).first()
+        if not calories_per_minute:
+            return Decimal('0')
+
+        # Estimate based on duration, or 3 seconds per rep
+        if self.planned_duration_seconds:
+            duration_seconds = self.planned_duration_seconds
+        else:
+            duration_seconds = self.completed_sets * (self.planned_reps or 10) * 3
+
+        calories = Decimal(calories_per_minute) * duration_seconds / 60
+        return calories.quantize(Decimal('0.01'))
+
+    def save(self, *args, **kwargs):
+        """Store this exercise's calories and remember the change for the workout total"""
+        if self._state.adding:
+            previous = Decimal('0')
+        elif self._saved_calories is not None:
+            previous = self._saved_calories
+        else:
+            previous = WorkoutExercise.objects.filter(
+                pk=self.pk
+            ).values_list('calories_burned', flat=True).first() or Decimal('0')
+
+        self.calories_burned = self.estimate_calories()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'calories_burned' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'calories_burned']
+
+        # Applied to the workout by the post_save signal
+        self._calories_delta = self.calories_burned - previous
+        super().save(*args, **kwargs)
+        self._saved_calories = self.calories_burned
+
+
+class WorkoutSetQuerySet(models.QuerySet):
+    """QuerySet for WorkoutSet with strength progression aggregates"""
+
+    def progression(self):
+        """
+        Per-day sets, reps, volume, top weight and estimated 1RM, oldest first
+
+        The 1RM uses the Epley formula, weight * (1 + reps / 30). Each day
+        also carries its change in volume, top weight and 1RM since the
+        previous day (LAG over the daily rows; None on the first day).
+        """
+        volume = models.ExpressionWrapper(
+            models.F('weight_kg') * models.F('reps'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        )
+        one_rep_max = models.ExpressionWrapper(
+            models.F('weight_kg') * (models.F('reps') + 30) / models.Value(30.0),
+            output_field=models.FloatField()
+        )
+        daily = self.order_by().values('date').annotate(
+            sets=models.Count('id'),
+            total_reps=models.Sum('reps'),
+            volume=models.Sum(volume),
+            top_weight=models.Max('weight_kg'),
+            estimated_1rm=models.Max(one_rep_max),
+        )
+        return daily.annotate(**{
+            f'{name}_change': models.F(name) - models.Window(
+                Lag(name), order_by=models.F('date').asc()
+            )
+            for name in ('volume', 'top_weight', 'estimated_1rm')
+        }).order_by('date')
+
+
+class WorkoutSet(models.Model):
+    """
+    One performed set of a workout exercise
+
+    Sets are logged one at a time, or follow the actual_reps /
+    actual_weight_kg lists by set index when the workout exercise is saved;
+    a set's key, RPE and duration are kept across such edits. user,
+    exercise and date are copied from the
+    workout so progression queries need no joins.
+    """
+    workout_exercise = models.ForeignKey(
+        WorkoutExercise,
+        on_delete=models.CASCADE,
+        related_name='sets'
+    )
+    set_index = models.PositiveSmallIntegerField(help_text="Position in the exercise, from 0")
+    reps = models.PositiveIntegerField(null=True, blank=True)
+    weight_kg = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    rpe = models.DecimalField(
+        max_digits=3,
+        decimal_places=1,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(10)],
+        help_text="Rate of perceived exertion (1-10)"
+    )
+    duration_seconds = models.PositiveIntegerField(null=True, blank=True)
+    # Client-supplied key making repeated logging of the same set idempotent
+    set_key = models.CharField(max_length=64, null=True, blank=True)
+    # Client revision of the logged values; only a higher one corrects the set
+    revision = models.PositiveIntegerField(default=0)
+
+    # Copied from the workout
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='workout_sets'
+    )
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    date = models.DateField()
+
+    objects = WorkoutSetQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['workout_exercise', 'set_index']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['workout_exercise', 'set_index'],
+                name='unique_workout_set_index'
+            ),
+            models.UniqueConstraint(
+                fields=['workout_exercise', 'set_key'],
+                name='unique_workout_set_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'exercise', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.workout_exercise_id} set {self.set_index + 1}"
+
 
 class WorkoutSchedule(models.Model):
     """User's workout schedule/calendar"""
@@ -376,6 +612,60 @@ class WorkoutSchedule(models.Model):
         return f"{self.user.email} - {self.workout_plan.name}"
 
 
+class WorkoutScheduleSession(models.Model):
+    """
+    One dated day of a schedule's plan
+
+    Expanded from the plan's days when the schedule or plan changes: plan
+    day N falls on start_date + N - 1 and the days repeat every
+    max(day_number) days until end_date. The logged workout of that day is
+    linked once it exists.
+    """
+    schedule = models.ForeignKey(
+        WorkoutSchedule,
+        on_delete=models.CASCADE,
+        related_name='sessions'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='workout_sessions'
+    )
+    date = models.DateField()
+    plan_day = models.ForeignKey(
+        WorkoutPlanDay,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sessions'
+    )
+    day_number = models.IntegerField()
+    rest_day = models.BooleanField(default=False)
+    workout = models.ForeignKey(
+        Workout,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='schedule_sessions'
+    )
+    completed = models.BooleanField(default=False, help_text="Linked workout is completed")
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['schedule', 'date'],
+                name='unique_schedule_session_date'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.schedule_id} - {self.date} (Day {self.day_number})"
+
+
 class FavoriteExercise(models.Model):
     """User's favorite exercises"""
     user = models.ForeignKey(
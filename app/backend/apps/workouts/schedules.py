@@ -0,0 +1,151 @@
+"""
+Dated sessions of workout schedules
+
+A schedule is expanded into one WorkoutScheduleSession per plan day on the
+calendar, so calendar, adherence and "this week" lookups read a date range
+from an index instead of recomputing the plan for every request. Sessions
+are re-expanded as a diff when the schedule's dates or the plan's days
+change; unchanged sessions keep their linked workout.
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Workout, WorkoutPlanDay, WorkoutSchedule, WorkoutScheduleSession
+
+
+# Longest stretch a single schedule is expanded over
+MAX_DAYS = 730
+
+
+def schedule_end(schedule, plan=None):
+    """Last day of a schedule: its end date, or the plan's duration from the start"""
+    if schedule.end_date:
+        return schedule.end_date
+    plan = plan or schedule.workout_plan
+    return schedule.start_date + timedelta(weeks=plan.duration_weeks)
+
+
+def planned_days(schedule, plan_days, end=None):
+    """
+    Return {date: plan day} for a schedule
+
+    Plan day N falls on start_date + N - 1; the days repeat every
+    max(day_number) days. Dates without a plan day get no session.
+    """
+    by_number = {day.day_number: day for day in plan_days}
+    if not by_number:
+        return {}
+    cycle = max(by_number)
+    end = min(end or schedule_end(schedule), schedule.start_date + timedelta(days=MAX_DAYS - 1))
+
+    days = {}
+    for offset in range((end - schedule.start_date).days + 1):
+        day = by_number.get(offset % cycle + 1)
+        if day is not None:
+            days[schedule.start_date + timedelta(days=offset)] = day
+    return days
+
+
+def _pick_workout(workouts, plan_id):
+    """The workout to link to a session: same plan first, then completed, then oldest"""
+    return min(
+        workouts,
+        key=lambda workout: (
+            workout.workout_plan_id not in (None, plan_id),
+            workout.workout_plan_id != plan_id,
+            not workout.completed,
+            workout.pk,
+        )
+    )
+
+
+def expand_schedule(schedule, since=None, plan_days=None):
+    """
+    Bring a schedule's sessions in line with its dates and plan
+
+    Args:
+        schedule: WorkoutSchedule object
+        since: Only sessions on or after this date are changed
+        plan_days: The plan's days, when already loaded
+
+    Returns:
+        Number of sessions created, changed or removed
+    """
+    if plan_days is None:
+        plan_days = list(WorkoutPlanDay.objects.filter(workout_plan_id=schedule.workout_plan_id))
+    planned = planned_days(schedule, plan_days)
+    existing = WorkoutScheduleSession.objects.filter(schedule=schedule)
+    if since is not None:
+        planned = {date: day for date, day in planned.items() if date >= since}
+        existing = existing.filter(date__gte=since)
+    existing = {session.date: session for session in existing}
+
+    stale = [session.pk for date, session in existing.items() if date not in planned]
+    changed, created = [], []
+    for date, day in planned.items():
+        session = existing.get(date)
+        if session is None:
+            created.append(WorkoutScheduleSession(
+                schedule=schedule,
+                user_id=schedule.user_id,
+                date=date,
+                plan_day=day,
+                day_number=day.day_number,
+                rest_day=day.rest_day
+            ))
+        elif (session.plan_day_id, session.day_number, session.rest_day) != (
+            day.pk, day.day_number, day.rest_day
+        ):
+            session.plan_day = day
+            session.day_number = day.day_number
+            session.rest_day = day.rest_day
+            changed.append(session)
+
+    training_dates = {session.date for session in created if not session.rest_day}
+    if training_dates:
+        workouts = {}
+        for workout in Workout.objects.filter(user_id=schedule.user_id, date__in=training_dates):
+            workouts.setdefault(workout.date, []).append(workout)
+        for session in created:
+            if session.date in workouts and not session.rest_day:
+                workout = _pick_workout(workouts[session.date], schedule.workout_plan_id)
+                if workout.workout_plan_id in (None, schedule.workout_plan_id):
+                    session.workout = workout
+                    session.completed = workout.completed
+
+    with transaction.atomic():
+        if stale:
+            WorkoutScheduleSession.objects.filter(pk__in=stale).delete()
+        if changed:
+            WorkoutScheduleSession.objects.bulk_update(changed, ['plan_day', 'day_number', 'rest_day'])
+        if created:
+            WorkoutScheduleSession.objects.bulk_create(created)
+    return len(stale) + len(changed) + len(created)
+
+
+def expand_plan_schedules(workout_plan_id):
+    """Re-expand the current and future sessions of every running schedule of a plan"""
+    today = timezone.now().date()
+    plan_days = list(WorkoutPlanDay.objects.filter(workout_plan_id=workout_plan_id))
+    schedules = WorkoutSchedule.objects.filter(
+        workout_plan_id=workout_plan_id
+    ).filter(
+        Q(end_date__gte=today) | Q(end_date__isnull=True)
+    ).select_related('workout_plan')
+    for schedule in schedules:
+        expand_schedule(schedule, since=today, plan_days=plan_days)
+
+
+def link_workout(workout):
+    """Link a saved workout to its day's open sessions and unlink it from others"""
+    WorkoutScheduleSession.objects.filter(workout=workout).exclude(
+        date=workout.date
+    ).update(workout=None, completed=False)
+
+    sessions = WorkoutScheduleSession.objects.filter(
+        user_id=workout.user_id, date=workout.date, rest_day=False
+    ).filter(Q(workout__isnull=True) | Q(workout=workout))
+    if workout.workout_plan_id:
+        sessions = sessions.filter(schedule__workout_plan_id=workout.workout_plan_id)
+    sessions.update(workout=workout, completed=workout.completed)
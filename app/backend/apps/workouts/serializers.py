@@ -1,11 +1,50 @@
 from rest_framework import serializers
 import json
+from decimal import Decimal
+from apps.core.serializers import SparseFieldsMixin
+from .calories import defer_calorie_updates
 from .models import (
     Exercise, ExerciseMedia, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
     Workout, WorkoutExercise, WorkoutSchedule, FavoriteExercise
 )
 
 
+def _request_id_set(context, key, load):
+    """
+    Return a set of IDs computed once per request
+
+    Nested serializers share their root's context dict, so the set is
+    loaded on first use and reused for every row in the response.
+    """
+    ids = context.get(key)
+    if ids is None:
+        request = context.get('request')
+        if request and request.user.is_authenticated:
+            ids = set(load(request.user))
+        else:
+            ids = set()
+        context[key] = ids
+    return ids
+
+
+def favorite_exercise_ids(context):
+    """IDs of the exercises the requesting user has favorited"""
+    return _request_id_set(
+        context, 'favorite_exercise_ids',
+        lambda user: FavoriteExercise.objects.filter(user=user).values_list('exercise_id', flat=True)
+    )
+
+
+def scheduled_plan_ids(context):
+    """IDs of the workout plans the requesting user has actively scheduled"""
+    return _request_id_set(
+        context, 'scheduled_plan_ids',
+        lambda user: WorkoutSchedule.objects.filter(
+            user=user, is_active=True
+        ).values_list('workout_plan_id', flat=True)
+    )
+
+
 class JSONStringField(serializers.Field):
     """Custom field to handle JSON string or list"""
     
@@ -70,13 +109,7 @@ class ExerciseSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return FavoriteExercise.objects.filter(
-                user=request.user,
-                exercise=obj
-            ).exists()
-        return False
+        return obj.pk in favorite_exercise_ids(self.context)
 
     def create(self, validated_data):
         request = self.context.get('request')
@@ -91,6 +124,18 @@ class ExerciseSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class ExerciseListSerializer(SparseFieldsMixin, ExerciseSerializer):
+    """Compact exercise list; ?expand=media_files adds the media"""
+    compact_fields = [
+        'id', 'name', 'exercise_type', 'difficulty', 'equipment',
+        'primary_muscles', 'calories_per_minute', 'met_value',
+        'image_url', 'image', 'is_custom', 'created_by', 'is_favorited'
+    ]
+    expandable_fields = {
+        'media_files': lambda expand: ExerciseMediaSerializer(many=True, read_only=True),
+    }
+
+
 class WorkoutPlanExerciseSerializer(serializers.ModelSerializer):
     """Serializer for exercises in a workout plan"""
     exercise = ExerciseSerializer(read_only=True)
@@ -121,7 +166,10 @@ class WorkoutPlanDaySerializer(serializers.ModelSerializer):
         ]
 
     def get_exercise_count(self, obj):
-        return obj.exercises.count()
+        # List querysets annotate the count when exercises are not prefetched
+        if hasattr(obj, 'exercise_total'):
+            return obj.exercise_total
+        return len(obj.exercises.all())
 
 
 class WorkoutPlanSerializer(serializers.ModelSerializer):
@@ -141,17 +189,12 @@ class WorkoutPlanSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
 
     def get_total_days(self, obj):
-        return obj.plan_days.count()
+        if hasattr(obj, 'day_count'):
+            return obj.day_count
+        return len(obj.plan_days.all())
 
     def get_is_scheduled(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return WorkoutSchedule.objects.filter(
-                user=request.user,
-                workout_plan=obj,
-                is_active=True
-            ).exists()
-        return False
+        return obj.pk in scheduled_plan_ids(self.context)
 
     def create(self, validated_data):
         request = self.context.get('request')
@@ -165,6 +208,32 @@ class WorkoutPlanDetailSerializer(WorkoutPlanSerializer):
     plan_days = WorkoutPlanDaySerializer(many=True, read_only=True)
 
 
+class WorkoutPlanDayListSerializer(SparseFieldsMixin, WorkoutPlanDaySerializer):
+    """Plan day without its exercises unless expanded"""
+    compact_fields = ['id', 'day_number', 'name', 'description', 'rest_day', 'exercise_count']
+    expandable_fields = {
+        'exercises': lambda expand: WorkoutPlanExerciseSerializer(many=True, read_only=True),
+    }
+
+
+class WorkoutPlanListSerializer(SparseFieldsMixin, WorkoutPlanSerializer):
+    """
+    Compact workout plan list
+
+    ?expand=plan_days adds the days, ?expand=plan_days.exercises their exercises.
+    """
+    compact_fields = [
+        'id', 'name', 'description', 'goal', 'difficulty',
+        'duration_weeks', 'days_per_week', 'is_custom', 'created_by',
+        'total_days', 'is_scheduled', 'created_at', 'updated_at'
+    ]
+    expandable_fields = {
+        'plan_days': lambda expand: WorkoutPlanDayListSerializer(
+            many=True, read_only=True, expand=expand
+        ),
+    }
+
+
 class WorkoutExerciseSerializer(serializers.ModelSerializer):
     """Serializer for exercises in a workout log"""
     exercise = ExerciseSerializer(read_only=True)
@@ -213,12 +282,19 @@ class WorkoutSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
 
     def get_exercise_count(self, obj):
-        return obj.exercises.count()
+        if hasattr(obj, 'exercise_total'):
+            return obj.exercise_total
+        return len(obj.exercises.all())
 
     def get_completion_percentage(self, obj):
-        total_exercises = obj.exercises.count()
+        # Computed from list annotations or the prefetched exercises
+        if hasattr(obj, 'exercise_total'):
+            total_exercises, completed_exercises = obj.exercise_total, obj.exercises_completed
+        else:
+            exercises = obj.exercises.all()
+            total_exercises = len(exercises)
+            completed_exercises = sum(1 for exercise in exercises if exercise.completed)
         if total_exercises > 0:
-            completed_exercises = obj.exercises.filter(completed=True).count()
             return (completed_exercises / total_exercises) * 100
         return 0
 
@@ -231,6 +307,20 @@ class WorkoutSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class WorkoutListSerializer(SparseFieldsMixin, WorkoutSerializer):
+    """Compact workout list; ?expand=exercises adds the logged exercises"""
+    compact_fields = [
+        'id', 'workout_plan', 'workout_plan_name', 'name', 'date',
+        'start_time', 'end_time', 'duration_minutes',
+        'total_calories_burned', 'notes', 'completed', 'status',
+        'exercise_count', 'completion_percentage',
+        'created_at', 'updated_at'
+    ]
+    expandable_fields = {
+        'exercises': lambda expand: WorkoutExerciseSerializer(many=True, read_only=True),
+    }
+
+
 class WorkoutCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating a workout with exercises"""
     exercises = WorkoutExerciseSerializer(many=True, write_only=True, required=False)
@@ -254,11 +344,15 @@ class WorkoutCreateSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         validated_data['user'] = request.user
         
-        workout = Workout.objects.create(**validated_data)
+        with defer_calorie_updates():
+            workout = Workout.objects.create(**validated_data)
+            
+            # Create exercises
+            for exercise_data in exercises_data:
+                WorkoutExercise.objects.create(workout=workout, **exercise_data)
         
-        # Create exercises
-        for exercise_data in exercises_data:
-            WorkoutExercise.objects.create(workout=workout, **exercise_data)
+        # Pick up the calorie total applied when the block ended
+        workout.refresh_from_db(fields=['total_calories_burned'])
         
         return workout
 
@@ -294,13 +388,10 @@ class WorkoutScheduleSerializer(serializers.ModelSerializer):
         return 0
 
     def get_days_completed(self, obj):
-        return Workout.objects.filter(
-            user=obj.user,
-            workout_plan=obj.workout_plan,
-            date__gte=obj.start_date,
-            date__lte=obj.end_date if obj.end_date else obj.start_date,
-            completed=True
-        ).count()
+        # Annotated by the schedule list; counted from the sessions otherwise
+        if hasattr(obj, 'completed_sessions'):
+            return obj.completed_sessions
+        return obj.sessions.filter(completed=True).count()
 
     def get_total_days(self, obj):
         if obj.end_date:
@@ -341,6 +432,39 @@ class FavoriteExerciseSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class WorkoutSetLogSerializer(serializers.Serializer):
+    """Input of the single-set logging endpoint"""
+    workout_exercise_id = serializers.IntegerField()
+    set_key = serializers.CharField(max_length=64)
+    set_index = serializers.IntegerField(min_value=0, max_value=999, required=False, allow_null=True)
+    revision = serializers.IntegerField(min_value=0, required=False)
+    reps = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    weight_kg = serializers.DecimalField(
+        max_digits=6, decimal_places=2, min_value=0, required=False, allow_null=True
+    )
+    rpe = serializers.DecimalField(
+        max_digits=3, decimal_places=1, min_value=1, max_value=10, required=False, allow_null=True
+    )
+    duration_seconds = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+
+
+class WorkoutPlanCloneSerializer(serializers.Serializer):
+    """Input of the plan clone endpoint"""
+    name = serializers.CharField(max_length=200, required=False, allow_blank=True)
+    drop_days = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list
+    )
+    scale_sets = serializers.DecimalField(
+        max_digits=4, decimal_places=2, min_value=Decimal('0.1'), max_value=10, required=False, default=1
+    )
+    scale_reps = serializers.DecimalField(
+        max_digits=4, decimal_places=2, min_value=Decimal('0.1'), max_value=10, required=False, default=1
+    )
+    scale_weight = serializers.DecimalField(
+        max_digits=4, decimal_places=2, min_value=0, max_value=10, required=False, default=1
+    )
+
+
 class WorkoutStatsSerializer(serializers.Serializer):
     """Serializer for workout statistics"""
     total_workouts = serializers.IntegerField()
@@ -353,3 +477,16 @@ class WorkoutStatsSerializer(serializers.Serializer):
     workouts_this_month = serializers.IntegerField()
     favorite_exercise_type = serializers.CharField()
     most_used_exercises = serializers.ListField()
+
+
+class ExerciseProgressionSerializer(serializers.Serializer):
+    """One day of strength progression on an exercise; changes are since the previous day"""
+    date = serializers.DateField()
+    sets = serializers.IntegerField()
+    total_reps = serializers.IntegerField(allow_null=True)
+    volume = serializers.DecimalField(max_digits=12, decimal_places=2, allow_null=True)
+    top_weight = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+    estimated_1rm = serializers.FloatField(allow_null=True)
+    volume_change = serializers.DecimalField(max_digits=12, decimal_places=2, allow_null=True)
+    top_weight_change = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+    estimated_1rm_change = serializers.FloatField(allow_null=True)
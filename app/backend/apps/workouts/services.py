@@ -0,0 +1,414 @@
+"""
+Workout services
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Value
+from .calories import apply_calorie_delta, defer_calorie_updates
+from .models import (
+    Exercise, ExerciseMuscle, WorkoutExercise, WorkoutPlan, WorkoutPlanDay,
+    WorkoutPlanExercise, WorkoutSet
+)
+from apps.core.autocomplete import PUBLIC, AutocompleteCatalog
+
+
+def _load_exercise_names(owner_id):
+    """(id, name) pairs of public exercises, or of one user's custom exercises"""
+    if owner_id == PUBLIC:
+        exercises = Exercise.objects.filter(is_custom=False)
+    else:
+        exercises = Exercise.objects.filter(is_custom=True, created_by_id=owner_id)
+    return exercises.values_list('id', 'name')
+
+
+exercise_autocomplete = AutocompleteCatalog('exercise', _load_exercise_names)
+
+
+def muscle_names(muscles):
+    """Clean, de-duplicated muscle names from a JSON muscle list"""
+    max_length = ExerciseMuscle._meta.get_field('muscle').max_length
+    names = []
+    for muscle in muscles if isinstance(muscles, list) else []:
+        name = str(muscle).strip()[:max_length] if muscle is not None else ''
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def sync_exercise_muscles(exercises):
+    """Rebuild the ExerciseMuscle rows of exercises from their JSON lists"""
+    exercises = list(exercises)
+    ExerciseMuscle.objects.filter(exercise__in=[exercise.pk for exercise in exercises]).delete()
+    ExerciseMuscle.objects.bulk_create([
+        ExerciseMuscle(exercise=exercise, muscle=muscle, role=role)
+        for exercise in exercises
+        for role, muscles in (
+            ('primary', exercise.primary_muscles),
+            ('secondary', exercise.secondary_muscles),
+        )
+        for muscle in muscle_names(muscles)
+    ])
+
+
+FACET_FIELDS = {
+    'exercise_type': dict(Exercise.EXERCISE_TYPES),
+    'difficulty': dict(Exercise.DIFFICULTY_LEVELS),
+    'equipment': dict(Exercise.EQUIPMENT_CHOICES),
+}
+
+
+def exercise_facets(queryset):
+    """
+    Count exercises per type, difficulty, equipment and muscle
+
+    All four facets are grouped counts over the same exercises, combined
+    with UNION ALL so the database answers them in one query.
+
+    Returns:
+        dict of facet name -> [{'value', 'label', 'count'}] by count
+    """
+    exercises = queryset.order_by().prefetch_related(None)
+    parts = [
+        exercises.values(field).annotate(
+            facet=Value(field), count=Count('id')
+        ).values_list('facet', field, 'count').order_by()
+        for field in FACET_FIELDS
+    ]
+    # An exercise counts once per muscle, whether primary or secondary
+    parts.append(
+        ExerciseMuscle.objects.filter(exercise__in=exercises.values('pk'))
+        .values('muscle').annotate(
+            facet=Value('muscle'), count=Count('exercise', distinct=True)
+        ).values_list('facet', 'muscle', 'count').order_by()
+    )
+
+    facets = {name: [] for name in [*FACET_FIELDS, 'muscle']}
+    for facet, value, count in parts[0].union(*parts[1:], all=True):
+        labels = FACET_FIELDS.get(facet, {})
+        facets[facet].append({'value': value, 'label': labels.get(value, value), 'count': count})
+    for buckets in facets.values():
+        buckets.sort(key=lambda bucket: (-bucket['count'], bucket['value']))
+    return facets
+
+
+def _set_reps(value):
+    try:
+        reps = int(value)
+    except (TypeError, ValueError):
+        return None
+    return reps if reps >= 0 else None
+
+
+def _set_weight(value):
+    try:
+        weight = Decimal(str(value)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return None
+    return weight if 0 <= weight < 10000 else None
+
+
+def workout_set_rows(workout_exercise):
+    """WorkoutSet rows for the actual_reps / actual_weight_kg lists of an exercise"""
+    reps = workout_exercise.actual_reps if isinstance(workout_exercise.actual_reps, list) else []
+    weights = workout_exercise.actual_weight_kg if isinstance(workout_exercise.actual_weight_kg, list) else []
+    workout = workout_exercise.workout
+    rows = []
+    for index in range(max(len(reps), len(weights))):
+        set_reps = _set_reps(reps[index]) if index < len(reps) else None
+        set_weight = _set_weight(weights[index]) if index < len(weights) else None
+        if set_reps is None and set_weight is None:
+            continue
+        rows.append(WorkoutSet(
+            workout_exercise=workout_exercise,
+            set_index=index,
+            reps=set_reps,
+            weight_kg=set_weight,
+            user_id=workout.user_id,
+            exercise_id=workout_exercise.exercise_id,
+            date=workout.date
+        ))
+    return rows
+
+
+def sync_workout_sets(workout_exercises):
+    """
+    Bring the WorkoutSet rows of workout exercises in line with their JSON lists
+
+    Rows are matched by set index and only their reps, weight and copied
+    columns are rewritten, so the set_key, rpe and duration of sets logged
+    one at a time survive edits of the lists. Rows past the end of the
+    lists are removed.
+    """
+    workout_exercises = list(workout_exercises)
+    existing = {
+        (workout_set.workout_exercise_id, workout_set.set_index): workout_set
+        for workout_set in WorkoutSet.objects.filter(
+            workout_exercise__in=[workout_exercise.pk for workout_exercise in workout_exercises]
+        )
+    }
+
+    created, updated = [], []
+    for workout_exercise in workout_exercises:
+        reps = workout_exercise.actual_reps if isinstance(workout_exercise.actual_reps, list) else []
+        weights = workout_exercise.actual_weight_kg if isinstance(workout_exercise.actual_weight_kg, list) else []
+        rows = {row.set_index: row for row in workout_set_rows(workout_exercise)}
+        for index in range(max(len(reps), len(weights))):
+            row = rows.get(index)
+            workout_set = existing.pop((workout_exercise.pk, index), None)
+            if workout_set is None:
+                if row is not None:
+                    created.append(row)
+                continue
+            values = {
+                'reps': row.reps if row else None,
+                'weight_kg': row.weight_kg if row else None,
+                'user_id': workout_exercise.workout.user_id,
+                'exercise_id': workout_exercise.exercise_id,
+                'date': workout_exercise.workout.date,
+            }
+            if any(getattr(workout_set, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(workout_set, name, value)
+                updated.append(workout_set)
+
+    if existing:
+        WorkoutSet.objects.filter(pk__in=[workout_set.pk for workout_set in existing.values()]).delete()
+    if updated:
+        WorkoutSet.objects.bulk_update(updated, ['reps', 'weight_kg', 'user', 'exercise', 'date'])
+    if created:
+        WorkoutSet.objects.bulk_create(created)
+
+
+class WorkoutExerciseService:
+    """Apply an edited exercise list to a workout as a diff"""
+
+    # Payload fields copied onto workout exercises
+    FIELDS = [
+        'order', 'planned_sets', 'planned_reps', 'planned_duration_seconds',
+        'planned_weight_kg', 'completed_sets', 'actual_reps', 'actual_weight_kg',
+        'notes', 'completed'
+    ]
+    # Values for new rows whose payload leaves them out
+    DEFAULTS = {'order': 1, 'planned_sets': 3, 'planned_reps': 10, 'planned_weight_kg': 0}
+    SET_FIELDS = {'actual_reps', 'actual_weight_kg'}
+
+    @staticmethod
+    def _clean(item):
+        """Return the payload fields of one item converted to Python values"""
+        values = {}
+        for name in WorkoutExerciseService.FIELDS:
+            if name in item:
+                field = WorkoutExercise._meta.get_field(name)
+                try:
+                    values[name] = field.clean(item[name], None)
+                except ValidationError as e:
+                    raise ValidationError({name: e.messages})
+        return values
+
+    @staticmethod
+    def _match(existing, items):
+        """
+        Pair payload items with existing rows
+
+        An item matches the row with its `id`, otherwise an unclaimed row of
+        the same exercise, preferring one at the same order.
+
+        Returns:
+            (list of (item, row or None), rows left unmatched)
+        """
+        unclaimed = {row.pk: row for row in existing}
+        pairs = []
+        for item in items:
+            row = unclaimed.pop(item.get('id'), None)
+            if row is None:
+                candidates = [
+                    candidate for candidate in unclaimed.values()
+                    if candidate.exercise_id == item['exercise_id']
+                ]
+                candidates.sort(key=lambda candidate: candidate.order != item.get('order'))
+                if candidates:
+                    row = unclaimed.pop(candidates[0].pk)
+            pairs.append((item, row))
+        return pairs, list(unclaimed.values())
+
+    @staticmethod
+    def sync(workout, items):
+        """
+        Make a workout's exercises match an edited list
+
+        Matched rows are updated only when a value changed, with one
+        bulk_update; new items are inserted with one bulk_create and
+        unmatched rows removed with one DELETE. The calorie total is
+        adjusted once at the end. Fields an item leaves out keep their
+        stored values, so logged sets survive plan edits.
+
+        Args:
+            workout: Workout object
+            items: Iterable of dicts with 'exercise_id', an optional 'id' of
+                an existing row and any of FIELDS
+
+        Returns:
+            dict with the number of rows created, updated and deleted
+
+        Raises:
+            ValidationError: An item has an invalid value or an unknown exercise
+        """
+        items = list(items)
+        cleaned = []
+        for item in items:
+            try:
+                exercise_id = int(item.get('exercise_id'))
+            except (TypeError, ValueError):
+                raise ValidationError({'exercise_id': ['A valid exercise is required.']})
+            try:
+                pk = int(item['id']) if item.get('id') is not None else None
+            except (TypeError, ValueError):
+                raise ValidationError({'id': ['A valid workout exercise id is required.']})
+            cleaned.append({**WorkoutExerciseService._clean(item), 'id': pk, 'exercise_id': exercise_id})
+
+        exercises = Exercise.objects.in_bulk({item['exercise_id'] for item in cleaned})
+        missing = {item['exercise_id'] for item in cleaned} - exercises.keys()
+        if missing:
+            raise ValidationError({'exercise_id': [f'Exercise {pk} does not exist.' for pk in sorted(missing)]})
+
+        with defer_calorie_updates():
+            existing = list(workout.exercises.select_for_update())
+            pairs, removed = WorkoutExerciseService._match(existing, cleaned)
+
+            created, updated, changed_fields, set_rows = [], [], set(), []
+            for item, row in pairs:
+                values = {name: item[name] for name in WorkoutExerciseService.FIELDS if name in item}
+                if row is None:
+                    row = WorkoutExercise(
+                        workout=workout,
+                        exercise=exercises[item['exercise_id']],
+                        **{**WorkoutExerciseService.DEFAULTS, **values}
+                    )
+                    row.calories_burned = row.estimate_calories()
+                    created.append(row)
+                    if row.actual_reps or row.actual_weight_kg:
+                        set_rows.append(row)
+                    continue
+
+                changes = {name for name, value in values.items() if getattr(row, name) != value}
+                if row.exercise_id != item['exercise_id']:
+                    changes.add('exercise')
+                if not changes:
+                    continue
+                for name in changes - {'exercise'}:
+                    setattr(row, name, values[name])
+                row.exercise = exercises[item['exercise_id']]
+                calories = row.estimate_calories()
+                if calories != row.calories_burned:
+                    changes.add('calories_burned')
+                    apply_calorie_delta(workout.pk, calories - row.calories_burned)
+                    row.calories_burned = calories
+                updated.append(row)
+                changed_fields |= changes
+                if changes & {*WorkoutExerciseService.SET_FIELDS, 'exercise'}:
+                    set_rows.append(row)
+
+            if removed:
+                # Deleting through the ORM cascades to the sets and takes the
+                # removed calories off the (deferred) workout total
+                WorkoutExercise.objects.filter(pk__in=[row.pk for row in removed]).delete()
+            if updated:
+                WorkoutExercise.objects.bulk_update(updated, sorted(changed_fields))
+            if created:
+                WorkoutExercise.objects.bulk_create(created)
+                apply_calorie_delta(workout.pk, sum(row.calories_burned for row in created))
+            if set_rows:
+                sync_workout_sets(set_rows)
+
+        return {'created': len(created), 'updated': len(updated), 'deleted': len(removed)}
+
+
+class WorkoutPlanService:
+    """Copy workout plans with their days and exercises"""
+
+    # Plan fields copied onto the clone
+    PLAN_FIELDS = [
+        'description', 'goal', 'difficulty', 'duration_weeks', 'days_per_week',
+        'overview', 'requirements'
+    ]
+    DAY_FIELDS = ['name', 'description', 'rest_day']
+    EXERCISE_FIELDS = [
+        'exercise_id', 'order', 'sets', 'reps', 'duration_seconds', 'rest_seconds',
+        'weight_kg', 'notes'
+    ]
+
+    @staticmethod
+    def _scale_count(value, factor):
+        """Scale a set or rep count, keeping at least one"""
+        if value is None or factor == 1:
+            return value
+        return max(1, int((value * factor).quantize(Decimal('1'), rounding=ROUND_HALF_UP)))
+
+    @staticmethod
+    def clone(plan, user, name=None, drop_days=(), scale_sets=1, scale_reps=1, scale_weight=1):
+        """
+        Copy a plan with all its days and exercises as a custom plan of a user
+
+        The copy takes three INSERTs whatever the plan's size: the plan, one
+        bulk_create for the days and one for the exercises. Overrides are
+        applied in memory while copying; the remaining days are renumbered
+        from 1 in their original order.
+
+        Args:
+            plan: WorkoutPlan object, ideally with plan_days__exercises prefetched
+            user: Owner of the copy
+            name: Name of the copy (defaults to "<name> (copy)")
+            drop_days: Day numbers to leave out
+            scale_sets: Factor for the sets of every exercise
+            scale_reps: Factor for the reps of every exercise
+            scale_weight: Factor for the recommended weights
+
+        Returns:
+            The new WorkoutPlan
+
+        Raises:
+            ValidationError: Every day of the plan would be dropped
+        """
+        scale_sets, scale_reps, scale_weight = (
+            Decimal(str(factor)) for factor in (scale_sets, scale_reps, scale_weight)
+        )
+        drop_days = set(drop_days)
+        days = [day for day in plan.plan_days.all() if day.day_number not in drop_days]
+        days.sort(key=lambda day: day.day_number)
+        if not days:
+            raise ValidationError({'drop_days': ['At least one day of the plan must be kept.']})
+
+        with transaction.atomic():
+            clone = WorkoutPlan.objects.create(
+                name=name or f'{plan.name} (copy)'[:200],
+                is_custom=True,
+                created_by=user,
+                **{field: getattr(plan, field) for field in WorkoutPlanService.PLAN_FIELDS}
+            )
+            new_days = WorkoutPlanDay.objects.bulk_create([
+                WorkoutPlanDay(
+                    workout_plan=clone,
+                    day_number=number,
+                    **{field: getattr(day, field) for field in WorkoutPlanService.DAY_FIELDS}
+                )
+                for number, day in enumerate(days, start=1)
+            ])
+
+            exercises = []
+            for day, new_day in zip(days, new_days):
+                for exercise in day.exercises.all():
+                    copy = WorkoutPlanExercise(
+                        plan_day=new_day,
+                        **{field: getattr(exercise, field) for field in WorkoutPlanService.EXERCISE_FIELDS}
+                    )
+                    copy.sets = WorkoutPlanService._scale_count(copy.sets, scale_sets)
+                    copy.reps = WorkoutPlanService._scale_count(copy.reps, scale_reps)
+                    if copy.weight_kg is not None and scale_weight != 1:
+                        copy.weight_kg = min(
+                            (copy.weight_kg * scale_weight).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+                            Decimal('9999.99')
+                        )
+                    exercises.append(copy)
+            WorkoutPlanExercise.objects.bulk_create(exercises)
+        return clone
@@ -0,0 +1,146 @@
+"""
+Live logging of single sets
+
+During a session each set is written as one WorkoutSet row, keyed by a
+client-supplied set key so retried requests do not log it twice. Logging
+only flags the workout exercise; its actual_* lists, completed_sets and
+calories, and the workout total, are rebuilt from the logged sets in one
+pass when the workout is read or completed, or by the flush_logged_sets
+command for workouts nobody opens again.
+"""
+from django.db import transaction
+from django.db.models import Max
+from .calories import apply_calorie_delta, defer_calorie_updates
+from .models import WorkoutExercise, WorkoutSet
+from .signals import workouts_changed
+
+
+SET_VALUES = ['reps', 'weight_kg', 'rpe', 'duration_seconds']
+
+
+class SetConflict(ValueError):
+    """The set index is already taken by a set logged under another key"""
+
+
+def log_set(user, workout_id, data):
+    """
+    Append or correct one set of a user's workout exercise
+
+    Args:
+        user: Owner of the workout
+        workout_id: Workout the exercise belongs to
+        data: dict with 'workout_exercise_id' and 'set_key', an optional
+            'set_index' (appended when left out), an optional 'revision'
+            (0 when left out) and any of SET_VALUES
+
+    A set is corrected by sending its key again with a higher revision.
+    Requests that do not raise the revision are replays and leave the set
+    as stored, including any edit made to the workout since.
+
+    Returns:
+        (WorkoutSet, created)
+
+    Raises:
+        WorkoutExercise.DoesNotExist: Not an exercise of the user's workout
+        SetConflict: set_index holds a set logged with another key
+    """
+    with transaction.atomic():
+        # Locks the one exercise row so concurrent taps append in turn
+        workout_exercise = WorkoutExercise.objects.select_for_update(
+            of=('self',)
+        ).select_related('workout').only(
+            'id', 'exercise_id', 'sets_dirty', 'workout', 'workout__user_id', 'workout__date'
+        ).get(pk=data['workout_exercise_id'], workout_id=workout_id, workout__user=user)
+
+        sets = WorkoutSet.objects.filter(workout_exercise=workout_exercise)
+        values = {name: data[name] for name in SET_VALUES if name in data}
+        workout_set = sets.filter(set_key=data['set_key']).first()
+        if workout_set is None and data.get('set_index') is not None:
+            workout_set = sets.filter(set_index=data['set_index']).first()
+            if workout_set is not None and workout_set.set_key is not None:
+                raise SetConflict(f"Set {data['set_index']} was logged with another set_key")
+
+        if workout_set is None:
+            set_index = data.get('set_index')
+            if set_index is None:
+                last = sets.aggregate(last=Max('set_index'))['last']
+                set_index = 0 if last is None else last + 1
+            workout_set = WorkoutSet.objects.create(
+                workout_exercise=workout_exercise,
+                set_index=set_index,
+                set_key=data['set_key'],
+                revision=data.get('revision', 0),
+                user_id=workout_exercise.workout.user_id,
+                exercise_id=workout_exercise.exercise_id,
+                date=workout_exercise.workout.date,
+                **values
+            )
+            created = True
+        elif workout_set.set_key is not None and data.get('revision', 0) <= workout_set.revision:
+            # A replay: keep the stored values, which an edit may have changed since
+            return workout_set, False
+        else:
+            changed = [name for name, value in values.items() if getattr(workout_set, name) != value]
+            workout_set.set_key = data['set_key']
+            workout_set.revision = data.get('revision', 0)
+            for name in changed:
+                setattr(workout_set, name, values[name])
+            workout_set.save(update_fields=changed + ['set_key', 'revision'])
+            created = False
+
+        if not workout_exercise.sets_dirty:
+            WorkoutExercise.objects.filter(pk=workout_exercise.pk).update(sets_dirty=True)
+    return workout_set, created
+
+
+def flush_logged_sets(workout_exercises):
+    """
+    Rebuild flagged workout exercises from their logged sets
+
+    Args:
+        workout_exercises: WorkoutExercise queryset to look for flagged rows in
+
+    Returns:
+        Number of workout exercises rebuilt
+    """
+    # Reads call this on every request; usually nothing is flagged
+    if not workout_exercises.filter(sets_dirty=True).exists():
+        return 0
+
+    with defer_calorie_updates():
+        rows = list(
+            workout_exercises.filter(sets_dirty=True)
+            .select_related('exercise', 'workout')
+            .select_for_update(of=('self',))
+        )
+        if not rows:
+            return 0
+
+        logged = {}
+        for workout_set in WorkoutSet.objects.filter(workout_exercise__in=rows).order_by('set_index'):
+            logged.setdefault(workout_set.workout_exercise_id, []).append(workout_set)
+
+        changed_days = {}
+        for row in rows:
+            sets = logged.get(row.pk, [])
+            size = sets[-1].set_index + 1 if sets else 0
+            row.actual_reps = [None] * size
+            row.actual_weight_kg = [None] * size
+            for workout_set in sets:
+                row.actual_reps[workout_set.set_index] = workout_set.reps
+                if workout_set.weight_kg is not None:
+                    row.actual_weight_kg[workout_set.set_index] = float(workout_set.weight_kg)
+            row.completed_sets = len(sets)
+            row.sets_dirty = False
+
+            calories = row.estimate_calories()
+            apply_calorie_delta(row.workout_id, calories - row.calories_burned)
+            row.calories_burned = calories
+            changed_days.setdefault(row.workout.user_id, set()).add(row.workout.date)
+
+        WorkoutExercise.objects.bulk_update(
+            rows, ['actual_reps', 'actual_weight_kg', 'completed_sets', 'calories_burned', 'sets_dirty']
+        )
+    for user_id, dates in changed_days.items():
+        workouts_changed.send(sender=WorkoutExercise, user_id=user_id, dates=dates)
+    return len(rows)
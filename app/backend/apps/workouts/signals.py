@@ -1,6 +1,15 @@
-from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
-from .models import Workout, WorkoutExercise
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from .calories import apply_calorie_delta
+from .models import Exercise, Workout, WorkoutExercise, WorkoutPlanDay, WorkoutSchedule, WorkoutSet
+from .schedules import expand_plan_schedules, expand_schedule, link_workout
+from .services import exercise_autocomplete, sync_exercise_muscles, sync_workout_sets
+
+
+# Sent after workout exercises are rewritten without per-row signals.
+# Arguments: user_id, dates (set of workout dates whose totals may have changed)
+workouts_changed = Signal()
 
 
 @receiver(pre_save, sender=Workout)
@@ -11,28 +20,82 @@ def calculate_workout_duration(sender, instance, **kwargs):
 
 
 @receiver(post_save, sender=WorkoutExercise)
-def update_workout_calories(sender, instance, **kwargs):
-    """Update total calories burned when workout exercise is saved"""
-    workout = instance.workout
-    
-    # Calculate calories for this exercise
-    if instance.completed and instance.exercise.calories_per_minute:
-        # Estimate based on sets and reps or duration
-        if instance.planned_duration_seconds:
-            duration_minutes = instance.planned_duration_seconds / 60
-        else:
-            # Estimate 3 seconds per rep
-            duration_minutes = (instance.completed_sets * (instance.planned_reps or 10) * 3) / 60
-        
-        exercise_calories = float(instance.exercise.calories_per_minute) * duration_minutes
-        
-        # Update workout total
-        total_calories = sum(
-            float(ex.exercise.calories_per_minute or 0) * (
-                (ex.planned_duration_seconds or (ex.completed_sets * (ex.planned_reps or 10) * 3)) / 60
-            )
-            for ex in workout.exercises.filter(completed=True)
-        )
-        
-        workout.total_calories_burned = total_calories
-        workout.save(update_fields=['total_calories_burned'])
+def update_workout_calories(sender, instance, raw=False, **kwargs):
+    """Apply the change in this exercise's calories to the workout total"""
+    if raw:
+        return
+    apply_calorie_delta(instance.workout_id, getattr(instance, '_calories_delta', 0))
+
+
+@receiver(post_delete, sender=WorkoutExercise)
+def remove_workout_calories(sender, instance, **kwargs):
+    """Take a deleted exercise's calories off the workout total"""
+    stored = instance._saved_calories
+    if stored is None:
+        stored = instance.calories_burned
+    apply_calorie_delta(instance.workout_id, -stored)
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def invalidate_exercise_autocomplete(sender, instance, **kwargs):
+    """Rebuild the autocomplete index holding this exercise"""
+    exercise_autocomplete.invalidate(instance.created_by_id if instance.is_custom else None)
+
+
+@receiver(post_save, sender=Exercise)
+def sync_muscles(sender, instance, update_fields=None, **kwargs):
+    """Rebuild the indexed muscle rows from the exercise's JSON lists"""
+    if update_fields and not {'primary_muscles', 'secondary_muscles'} & set(update_fields):
+        return
+    sync_exercise_muscles([instance])
+
+
+@receiver(post_save, sender=WorkoutExercise)
+def sync_sets(sender, instance, created, update_fields=None, **kwargs):
+    """Rebuild the per-set rows from the actual reps and weights"""
+    if update_fields and not {'actual_reps', 'actual_weight_kg', 'exercise'} & set(update_fields):
+        return
+    if created and not (instance.actual_reps or instance.actual_weight_kg):
+        return
+    sync_workout_sets([instance])
+
+
+@receiver(post_save, sender=Workout)
+def move_workout_sets(sender, instance, created, **kwargs):
+    """Keep the date copied onto the workout's sets in line with the workout"""
+    if created:
+        return
+    WorkoutSet.objects.filter(
+        workout_exercise__workout=instance
+    ).exclude(date=instance.date).update(date=instance.date)
+
+
+@receiver(post_save, sender=WorkoutSchedule)
+def expand_schedule_sessions(sender, instance, update_fields=None, **kwargs):
+    """Re-expand the dated sessions when the schedule's dates or plan may have changed"""
+    if update_fields and not {'start_date', 'end_date', 'workout_plan'} & set(update_fields):
+        return
+    expand_schedule(instance)
+
+
+@receiver(post_save, sender=WorkoutPlanDay)
+@receiver(post_delete, sender=WorkoutPlanDay)
+def expand_plan_day_sessions(sender, instance, **kwargs):
+    """Re-expand the upcoming sessions of schedules following this plan"""
+    # After commit, so a plan deleted with its days has no schedules left
+    workout_plan_id = instance.workout_plan_id
+    transaction.on_commit(lambda: expand_plan_schedules(workout_plan_id))
+
+
+@receiver(post_save, sender=Workout)
+def link_schedule_sessions(sender, instance, **kwargs):
+    """Link the workout to the scheduled session of its day when its date, status or plan changed"""
+    if instance.schedule_link_changed():
+        link_workout(instance)
+
+
+@receiver(pre_delete, sender=Workout)
+def reopen_schedule_sessions(sender, instance, **kwargs):
+    """A deleted workout no longer completes its session"""
+    instance.schedule_sessions.update(completed=False)
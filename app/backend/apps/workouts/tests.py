@@ -0,0 +1,501 @@
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.core.autocomplete import AutocompleteCatalog
+from apps.users.models import User
+from .models import (
+    Exercise, Workout, WorkoutExercise, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
+    WorkoutSchedule, WorkoutSet
+)
+from .services import WorkoutPlanService, _load_exercise_names
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pw-workouts-1',
+        date_of_birth=date(1990, 1, 1)
+    )
+
+
+def create_exercises(count):
+    return [
+        Exercise.objects.create(
+            name=f'Exercise {index}', description='', exercise_type='strength',
+            difficulty='beginner', equipment='barbell', calories_per_minute=6
+        )
+        for index in range(count)
+    ]
+
+
+class ListQueryCountTests(TestCase):
+    """List endpoints read a fixed number of queries however deep the data is"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('lists')
+        exercises = create_exercises(4)
+
+        for plan_index in range(3):
+            plan = WorkoutPlan.objects.create(
+                name=f'Plan {plan_index}', description='', goal='general_fitness',
+                difficulty='beginner', duration_weeks=4, days_per_week=3,
+                overview='', requirements=''
+            )
+            for day_number in range(1, 5):
+                day = WorkoutPlanDay.objects.create(
+                    workout_plan=plan, day_number=day_number, name=f'Day {day_number}'
+                )
+                for order, exercise in enumerate(exercises):
+                    WorkoutPlanExercise.objects.create(
+                        plan_day=day, exercise=exercise, order=order, sets=3, reps=10
+                    )
+
+        for offset in range(5):
+            workout = Workout.objects.create(
+                user=cls.user, name=f'Workout {offset}', date=date(2026, 6, 1) + timedelta(days=offset)
+            )
+            for order, exercise in enumerate(exercises):
+                WorkoutExercise.objects.create(
+                    workout=workout, exercise=exercise, order=order, planned_sets=3,
+                    completed=order % 2 == 0
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    # Counts include the page count query and the per-request lookups of
+    # scheduled plans and favorite exercises; workout reads also check for
+    # logged sets to apply
+
+    def test_plan_list(self):
+        plans = self.get('/api/workouts/workout-plans/', 3)
+        self.assertEqual([plan['total_days'] for plan in plans], [4, 4, 4])
+
+    def test_plan_list_with_days(self):
+        plans = self.get('/api/workouts/workout-plans/?expand=plan_days', 4)
+        self.assertEqual([day['exercise_count'] for day in plans[0]['plan_days']], [4, 4, 4, 4])
+
+    def test_plan_list_with_exercises(self):
+        plans = self.get('/api/workouts/workout-plans/?expand=plan_days.exercises', 8)
+        self.assertEqual(len(plans[0]['plan_days'][0]['exercises']), 4)
+
+    def test_workout_list(self):
+        workouts = self.get('/api/workouts/workouts/', 3)
+        self.assertEqual([workout['exercise_count'] for workout in workouts], [4] * 5)
+        self.assertEqual(workouts[0]['completion_percentage'], 50)
+
+    def test_workout_list_with_exercises(self):
+        workouts = self.get('/api/workouts/workouts/?expand=exercises', 7)
+        self.assertEqual(len(workouts[0]['exercises']), 4)
+
+    # Sparse fieldsets: lookups only run for the fields a request asks for
+
+    def test_fields_select_and_skip_lookups(self):
+        plans = self.get('/api/workouts/workout-plans/?fields=id,name', 2)
+        self.assertEqual(list(plans[0]), ['id', 'name'])
+        exercises = self.get('/api/workouts/exercises/?fields=id,name', 2)
+        self.assertEqual(list(exercises[0]), ['id', 'name'])
+
+    def test_unknown_names_are_ignored(self):
+        plans = self.get('/api/workouts/workout-plans/?fields=id,bogus&expand=nope', 2)
+        self.assertEqual(list(plans[0]), ['id'])
+
+    def test_nested_expand_with_fields(self):
+        plans = self.get('/api/workouts/workout-plans/?fields=id,plan_days', 3)
+        self.assertEqual(list(plans[0]), ['id', 'plan_days'])
+        self.assertNotIn('exercises', plans[0]['plan_days'][0])
+
+        plans = self.get('/api/workouts/workout-plans/?fields=id&expand=plan_days.exercises', 7)
+        self.assertEqual(list(plans[0]), ['id', 'plan_days'])
+        self.assertEqual(len(plans[0]['plan_days'][0]['exercises']), 4)
+
+
+class SetLoggingTests(TestCase):
+    """Logged sets are applied when the workout is read or completed, and replays change nothing"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('sets')
+        cls.exercise = create_exercises(1)[0]
+        cls.workout = Workout.objects.create(user=cls.user, name='Push', date=date(2026, 6, 1))
+        cls.workout_exercise = WorkoutExercise.objects.create(
+            workout=cls.workout, exercise=cls.exercise, planned_sets=3
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/workouts/workouts/{self.workout.pk}/'
+        self.payload = {
+            'workout_exercise_id': self.workout_exercise.pk, 'set_key': 'k1',
+            'reps': 10, 'weight_kg': '60.00', 'rpe': '8.0'
+        }
+
+    def log(self, payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url + 'log_set/', payload, format='json')
+
+    def assertApplied(self, reps):
+        self.workout_exercise.refresh_from_db()
+        self.assertEqual(self.workout_exercise.actual_reps, reps)
+        self.assertEqual(self.workout_exercise.completed_sets, len(reps))
+        self.assertFalse(self.workout_exercise.sets_dirty)
+
+    def test_logged_set_is_applied_on_read(self):
+        self.assertEqual(self.log(self.payload).status_code, 201)
+        self.assertEqual(self.log({**self.payload, 'set_key': 'k2', 'reps': 8}).status_code, 201)
+
+        # Logging only flags the exercise
+        self.workout_exercise.refresh_from_db()
+        self.assertEqual(self.workout_exercise.actual_reps, [])
+        self.assertTrue(self.workout_exercise.sets_dirty)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['exercises'][0]['actual_reps'], [10, 8])
+        self.assertApplied([10, 8])
+
+    def test_logged_set_is_applied_on_complete(self):
+        self.log(self.payload)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url + 'complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertApplied([10])
+        self.workout.refresh_from_db()
+        self.assertTrue(self.workout.completed)
+        self.assertEqual(self.workout.total_calories_burned, self.workout_exercise.calories_burned)
+
+    def test_command_applies_unread_sets(self):
+        self.log(self.payload)
+        call_command('flush_logged_sets', stdout=io.StringIO())
+        self.assertApplied([10])
+
+    def test_replay_after_edit(self):
+        self.assertEqual(self.log(self.payload).status_code, 201)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                self.url,
+                {'exercises': [{
+                    'id': self.workout_exercise.pk, 'exercise_id': self.exercise.pk,
+                    'actual_reps': [9], 'actual_weight_kg': [60]
+                }]},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+        workout_set = WorkoutSet.objects.get(workout_exercise=self.workout_exercise)
+        self.assertEqual(
+            (workout_set.set_index, workout_set.reps, workout_set.rpe, workout_set.set_key),
+            (0, 9, Decimal('8.0'), 'k1')
+        )
+
+        # The retried request finds its set by key and keeps the edit
+        response = self.log(self.payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['set_index'], response.json()['reps']), (0, 9))
+        self.assertEqual(WorkoutSet.objects.filter(workout_exercise=self.workout_exercise).count(), 1)
+
+        # A higher revision corrects the set
+        response = self.log({**self.payload, 'reps': 11, 'revision': 1})
+        self.assertEqual((response.status_code, response.json()['reps']), (200, 11))
+        self.client.get(self.url)
+        self.assertApplied([11])
+
+
+class StatsTests(TestCase):
+    """Workout stats take two queries plus the cache version lookup and respect the date range throughout"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('stats')
+        squat, run = create_exercises(2)
+        run.exercise_type = 'cardio'
+        run.save()
+
+        for offset in range(20):
+            workout = Workout.objects.create(
+                user=cls.user, name='Session', date=date(2026, 6, 1) + timedelta(days=offset),
+                duration_minutes=30, completed=offset % 2 == 0
+            )
+            # Squats in the first ten days, runs afterwards
+            WorkoutExercise.objects.create(
+                workout=workout, exercise=squat if offset < 10 else run, planned_sets=3
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def stats(self, query=''):
+        # Cache version, workout aggregate and exercise usage
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/workouts/workouts/stats/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count(self):
+        stats = self.stats()
+        self.assertEqual((stats['total_workouts'], stats['completed_workouts']), (20, 10))
+        self.assertEqual(len(stats['most_used_exercises']), 2)
+
+        # Served from the per-user cache until the data changes
+        with self.assertNumQueries(1):
+            self.client.get('/api/workouts/workouts/stats/')
+
+    def test_date_range_applies_to_exercise_usage(self):
+        stats = self.stats('?start_date=2026-06-15&end_date=2026-06-20')
+        self.assertEqual(stats['total_workouts'], 6)
+        self.assertEqual(stats['most_used_exercises'], [{'name': 'Exercise 1', 'count': 6}])
+        self.assertEqual(stats['favorite_exercise_type'], 'cardio')
+
+
+class AutocompleteTests(TestCase):
+    """Exercise writes reach the autocomplete indexes loaded by every worker"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('typeahead')
+        create_exercises(2)
+
+    def test_new_exercise_reaches_loaded_index(self):
+        # A separately loaded catalog stands in for another worker process
+        worker = AutocompleteCatalog('exercise', _load_exercise_names)
+        self.assertEqual(len(worker.complete(self.user.pk, 'exe')), 2)
+
+        # A warm index costs only the version lookup
+        with self.assertNumQueries(1):
+            worker.complete(self.user.pk, 'exe')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Exercise.objects.create(
+                name='Exercise Bike', description='', exercise_type='cardio',
+                difficulty='beginner', equipment='machine', calories_per_minute=8
+            )
+
+        names = [item['name'] for item in worker.complete(self.user.pk, 'exercise b')]
+        self.assertEqual(names, ['Exercise Bike'])
+
+
+class ProgressionTests(TestCase):
+    """Exercise progression groups logged sets by day with changes since the previous day"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('progress')
+        cls.exercise = create_exercises(1)[0]
+        for day, reps, weights in [
+            (1, [5, 5], [100, 100]), (3, [3], [110]), (5, [8], [90]),
+        ]:
+            workout = Workout.objects.create(user=cls.user, name='Bench', date=date(2026, 6, day))
+            WorkoutExercise.objects.create(
+                workout=workout, exercise=cls.exercise, planned_sets=len(reps),
+                actual_reps=reps, actual_weight_kg=weights
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/workouts/exercises/{self.exercise.pk}/progression/'
+
+    def get(self, query=''):
+        # The exercise and the grouped sets
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_daily_changes(self):
+        days = self.get()
+        self.assertEqual(
+            [(day['date'], day['sets'], day['volume'], day['top_weight']) for day in days],
+            [('2026-06-01', 2, '1000.00', '100.00'), ('2026-06-03', 1, '330.00', '110.00'),
+             ('2026-06-05', 1, '720.00', '90.00')]
+        )
+        self.assertEqual(
+            [(day['volume_change'], day['top_weight_change']) for day in days],
+            [(None, None), ('-670.00', '10.00'), ('390.00', '-20.00')]
+        )
+        self.assertIsNone(days[0]['estimated_1rm_change'])
+        self.assertAlmostEqual(days[2]['estimated_1rm_change'], 114 - 121)
+
+    def test_date_range(self):
+        days = self.get('?start_date=2026-06-02')
+        self.assertEqual([day['date'] for day in days], ['2026-06-03', '2026-06-05'])
+        # The first day in range has nothing to compare with
+        self.assertIsNone(days[0]['top_weight_change'])
+
+
+class ScheduleTests(TestCase):
+    """Schedules expand into dated sessions that saved workouts link to"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('schedule')
+        cls.plan = WorkoutPlan.objects.create(
+            name='Split', description='', goal='general_fitness', difficulty='beginner',
+            duration_weeks=1, days_per_week=2, overview='', requirements=''
+        )
+        for day_number, rest_day in [(1, False), (2, True), (3, False)]:
+            WorkoutPlanDay.objects.create(
+                workout_plan=cls.plan, day_number=day_number, name=f'Day {day_number}',
+                rest_day=rest_day
+            )
+        cls.schedule = WorkoutSchedule.objects.create(
+            user=cls.user, workout_plan=cls.plan,
+            start_date=date(2026, 6, 1), end_date=date(2026, 6, 6)
+        )
+
+    def sessions(self):
+        return list(self.schedule.sessions.values_list('date__day', 'day_number', 'rest_day', 'workout_id'))
+
+    def test_expansion(self):
+        # The three plan days repeat until the end date
+        self.assertEqual(self.sessions(), [
+            (1, 1, False, None), (2, 2, True, None), (3, 3, False, None),
+            (4, 1, False, None), (5, 2, True, None), (6, 3, False, None),
+        ])
+
+        self.schedule.end_date = date(2026, 6, 3)
+        self.schedule.save()
+        self.assertEqual([session[0] for session in self.sessions()], [1, 2, 3])
+
+    def test_linking(self):
+        workout = Workout.objects.create(user=self.user, name='Push', date=date(2026, 6, 1))
+        session = self.schedule.sessions.get(date=date(2026, 6, 1))
+        self.assertEqual((session.workout_id, session.completed), (workout.pk, False))
+
+        workout.completed = True
+        workout.save()
+        session.refresh_from_db()
+        self.assertTrue(session.completed)
+
+        # Moving the workout moves its link
+        workout.date = date(2026, 6, 3)
+        workout.save()
+        self.assertEqual(
+            [(day, workout_id) for day, _, _, workout_id in self.sessions() if workout_id],
+            [(3, workout.pk)]
+        )
+
+    def test_rest_day_is_not_linked(self):
+        Workout.objects.create(user=self.user, name='Extra', date=date(2026, 6, 2))
+        self.assertEqual([session[3] for session in self.sessions()], [None] * 6)
+
+    def test_unrelated_edit_skips_linking(self):
+        workout = Workout.objects.create(user=self.user, name='Push', date=date(2026, 6, 1))
+        workout = Workout.objects.get(pk=workout.pk)
+        workout.name = 'Heavy push'
+        with CaptureQueriesContext(connection) as queries:
+            workout.save()
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'workoutschedulesession' in query['sql']
+        ])
+
+
+class CloneAndFacetTests(TestCase):
+    """Plan clones and exercise facets take a fixed number of queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('clone')
+        exercises = create_exercises(2)
+        exercises[1].exercise_type = 'cardio'
+        exercises[1].equipment = 'none'
+        exercises[1].primary_muscles = ['legs']
+        exercises[1].save()
+        exercises[0].primary_muscles = ['chest']
+        exercises[0].secondary_muscles = ['legs']
+        exercises[0].save()
+
+        cls.plan = WorkoutPlan.objects.create(
+            name='Base', description='', goal='general_fitness', difficulty='beginner',
+            duration_weeks=4, days_per_week=3, overview='', requirements=''
+        )
+        for day_number in range(1, 4):
+            day = WorkoutPlanDay.objects.create(
+                workout_plan=cls.plan, day_number=day_number, name=f'Day {day_number}'
+            )
+            for order, exercise in enumerate(exercises):
+                WorkoutPlanExercise.objects.create(
+                    plan_day=day, exercise=exercise, order=order, sets=3, reps=10,
+                    weight_kg=Decimal('50')
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_clone_copies_days_and_exercises(self):
+        plan = WorkoutPlan.objects.prefetch_related('plan_days__exercises').get(pk=self.plan.pk)
+        # One INSERT each for the plan, its days and their exercises, in a savepoint
+        with self.assertNumQueries(5):
+            clone = WorkoutPlanService.clone(
+                plan, self.user, drop_days=[2], scale_sets=1.5, scale_reps=0.8, scale_weight=1.1
+            )
+
+        self.assertEqual((clone.name, clone.is_custom, clone.created_by), ('Base (copy)', True, self.user))
+        self.assertEqual(
+            list(clone.plan_days.values_list('day_number', 'name')),
+            [(1, 'Day 1'), (2, 'Day 3')]
+        )
+        copied = WorkoutPlanExercise.objects.filter(plan_day__workout_plan=clone)
+        self.assertEqual(
+            sorted(set(copied.values_list('sets', 'reps', 'weight_kg'))),
+            [(5, 8, Decimal('55.00'))]
+        )
+        self.assertEqual(copied.count(), 4)
+
+        # The original is untouched
+        self.assertEqual(
+            set(WorkoutPlanExercise.objects.filter(plan_day__workout_plan=self.plan)
+                .values_list('sets', 'reps', 'weight_kg')),
+            {(3, 10, Decimal('50.00'))}
+        )
+
+    def test_clone_endpoint(self):
+        url = f'/api/workouts/workout-plans/{self.plan.pk}/clone/'
+        # Source plan with days and exercises, the copy, then the copy reloaded
+        # for the response with exercises, media, favorites and schedules
+        with self.assertNumQueries(15):
+            response = self.client.post(url, {'name': 'Mine'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['name'], 'Mine')
+        self.assertEqual([len(day['exercises']) for day in response.json()['plan_days']], [2, 2, 2])
+
+        response = self.client.post(url, {'drop_days': [1, 2, 3]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('drop_days', response.json())
+
+    def test_facets(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/workouts/exercises/facets/')
+        facets = response.json()
+        self.assertEqual(
+            [(bucket['value'], bucket['count']) for bucket in facets['exercise_type']],
+            [('cardio', 1), ('strength', 1)]
+        )
+        self.assertEqual(facets['difficulty'][0]['count'], 2)
+        # An exercise counts once per muscle, primary or secondary
+        self.assertEqual(
+            [(bucket['value'], bucket['count']) for bucket in facets['muscle']],
+            [('legs', 2), ('chest', 1)]
+        )
+
+        # Facets follow the list filters
+        facets = self.client.get('/api/workouts/exercises/facets/?type=cardio').json()
+        self.assertEqual([bucket['value'] for bucket in facets['muscle']], ['legs'])
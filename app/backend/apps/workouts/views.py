@@ -1,25 +1,38 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Sum, Avg, Max
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q, Count, Sum, Avg, Max, Prefetch
 from django.utils import timezone
 from datetime import datetime, timedelta
+from apps.analytics.cache import cache_user_response
+from apps.core.pagination import EstimatedCountPagination, OptionalKeysetPagination
+from apps.core.serializers import requested_expansions
+from .calories import defer_calorie_updates
 from .models import (
-    Exercise, ExerciseMedia, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
-    Workout, WorkoutExercise, WorkoutSchedule, FavoriteExercise
+    Exercise, ExerciseMedia, ExerciseMuscle, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
+    Workout, WorkoutExercise, WorkoutSchedule, WorkoutScheduleSession, WorkoutSet, FavoriteExercise
 )
 from .serializers import (
-    ExerciseSerializer, ExerciseMediaSerializer, WorkoutPlanSerializer, WorkoutPlanDetailSerializer,
-    WorkoutPlanDaySerializer, WorkoutSerializer, WorkoutCreateSerializer,
+    ExerciseSerializer, ExerciseListSerializer, ExerciseMediaSerializer,
+    WorkoutPlanSerializer, WorkoutPlanDetailSerializer, WorkoutPlanListSerializer,
+    WorkoutPlanDaySerializer, WorkoutPlanCloneSerializer, WorkoutSerializer, WorkoutListSerializer, WorkoutCreateSerializer,
     WorkoutScheduleSerializer, FavoriteExerciseSerializer,
-    WorkoutStatsSerializer, WorkoutExerciseSerializer
+    WorkoutStatsSerializer, WorkoutExerciseSerializer, WorkoutSetLogSerializer,
+    ExerciseProgressionSerializer
+)
+from .sets import SetConflict, flush_logged_sets, log_set
+from .services import (
+    WorkoutExerciseService, WorkoutPlanService, exercise_autocomplete, exercise_facets
 )
 
 
 class ExerciseViewSet(viewsets.ModelViewSet):
     """ViewSet for Exercise model"""
     permission_classes = [IsAuthenticated]
+    pagination_class = EstimatedCountPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description', 'primary_muscles', 'secondary_muscles']
     ordering_fields = ['name', 'difficulty', 'calories_per_minute', 'created_at']
@@ -196,12 +209,11 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         if equipment:
             queryset = queryset.filter(equipment=equipment)
         
-        # Filter by muscle group
+        # Filter by muscle group (primary or secondary) through the indexed rows
         muscle = self.request.query_params.get('muscle')
         if muscle:
             queryset = queryset.filter(
-                Q(primary_muscles__contains=[muscle]) |
-                Q(secondary_muscles__contains=[muscle])
+                pk__in=ExerciseMuscle.objects.filter(muscle=muscle).values('exercise_id')
             )
         
         # Show only user's custom exercises or all public exercises
@@ -209,9 +221,16 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         if show_custom_only == 'true':
             queryset = queryset.filter(created_by=self.request.user)
         
-        return queryset
+        # The compact list only loads media when the client asks for it
+        if self.action == 'list' and 'media_files' not in requested_expansions(self.request):
+            return queryset
+        if self.action == 'progression':
+            return queryset
+        return queryset.prefetch_related('media_files')
 
     def get_serializer_class(self):
+        if self.action == 'list':
+            return ExerciseListSerializer
         return ExerciseSerializer
 
     @action(detail=False, methods=['get'])
@@ -228,13 +247,75 @@ class ExerciseViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def muscle_groups(self, request):
-        """Get all muscle groups"""
-        muscles = [
-            'chest', 'back', 'shoulders', 'biceps', 'triceps',
-            'forearms', 'abs', 'obliques', 'quads', 'hamstrings',
-            'glutes', 'calves', 'traps', 'lats'
-        ]
-        return Response(muscles)
+        """Get all muscle groups: the standard ones, then any others in use"""
+        muscles = list(Exercise.MUSCLE_GROUPS)
+        in_use = ExerciseMuscle.objects.exclude(
+            muscle__in=muscles
+        ).values_list('muscle', flat=True).distinct().order_by('muscle')
+        return Response(muscles + list(in_use))
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Count matching exercises per facet
+        GET /api/workouts/exercises/facets/?type=&difficulty=&equipment=&muscle=&search=
+
+        Applies the same filters as the list and returns, in one query,
+        {exercise_type, difficulty, equipment, muscle: [{value, label, count}]}.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(exercise_facets(queryset))
+
+    @action(detail=True, methods=['get'])
+    def progression(self, request, pk=None):
+        """
+        Get the user's daily strength progression on an exercise
+        GET /api/workouts/exercises/{id}/progression/?start_date=&end_date=
+
+        One grouped query over the logged sets: per day the sets, reps,
+        volume, top weight and estimated 1RM, each with its change since
+        the previous day.
+        """
+        exercise = self.get_object()
+        queryset = WorkoutSet.objects.filter(user=request.user, exercise=exercise)
+
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+
+        serializer = ExerciseProgressionSerializer(queryset.progression(), many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Suggest exercise names for a typed prefix
+        GET /api/workouts/exercises/autocomplete/?q=<prefix>&limit=10
+
+        Served from an in-memory index of public exercises plus the user's
+        custom exercises; returns id and name only.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'q parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = int(request.query_params.get('limit', exercise_autocomplete.DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, exercise_autocomplete.MAX_LIMIT))
+
+        return Response(exercise_autocomplete.complete(request.user.pk, query, limit))
 
 
 class ExerciseMediaViewSet(viewsets.ModelViewSet):
@@ -306,11 +387,27 @@ class WorkoutPlanViewSet(viewsets.ModelViewSet):
         if show_custom_only == 'true':
             queryset = queryset.filter(created_by=self.request.user)
         
-        return queryset.prefetch_related('plan_days__exercises__exercise')
+        if self.action == 'list':
+            # Prefetch only as deep as the requested shape
+            expanded = requested_expansions(self.request)
+            queryset = queryset.annotate(day_count=Count('plan_days'))
+            if 'plan_days.exercises' in expanded:
+                return queryset.prefetch_related('plan_days__exercises__exercise__media_files')
+            if 'plan_days' in expanded:
+                return queryset.prefetch_related(Prefetch(
+                    'plan_days',
+                    queryset=WorkoutPlanDay.objects.annotate(exercise_total=Count('exercises'))
+                ))
+            return queryset
+        if self.action == 'clone':
+            return queryset.prefetch_related('plan_days__exercises')
+        return queryset.prefetch_related('plan_days__exercises__exercise__media_files')
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return WorkoutPlanDetailSerializer
+        if self.action == 'list':
+            return WorkoutPlanListSerializer
         return WorkoutPlanSerializer
 
     @action(detail=True, methods=['post'])
@@ -345,10 +442,41 @@ class WorkoutPlanViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        """
+        Copy a plan with its days and exercises as a custom plan
+        POST /api/workouts/workout-plans/{id}/clone/
+        {
+            "name": "My plan",          (optional)
+            "drop_days": [3, 7],        (optional, day numbers to leave out)
+            "scale_sets": 1.5,          (optional)
+            "scale_reps": 0.8,          (optional)
+            "scale_weight": 1.1         (optional)
+        }
+        """
+        workout_plan = self.get_object()
+        serializer = WorkoutPlanCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            clone = WorkoutPlanService.clone(workout_plan, request.user, **serializer.validated_data)
+        except DjangoValidationError as e:
+            raise ValidationError(e.message_dict)
+
+        clone = WorkoutPlan.objects.prefetch_related(
+            'plan_days__exercises__exercise__media_files'
+        ).get(pk=clone.pk)
+        return Response(
+            WorkoutPlanDetailSerializer(clone, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
+
 
 class WorkoutViewSet(viewsets.ModelViewSet):
     """ViewSet for Workout model"""
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'notes']
     ordering_fields = ['date', 'duration_minutes', 'total_calories_burned', 'created_at']
@@ -380,13 +508,34 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         if workout_plan_id:
             queryset = queryset.filter(workout_plan_id=workout_plan_id)
         
-        return queryset.prefetch_related('exercises__exercise')
+        if self.action == 'list':
+            queryset = queryset.select_related('workout_plan').annotate(
+                exercise_total=Count('exercises'),
+                exercises_completed=Count('exercises', filter=Q(exercises__completed=True))
+            )
+            if 'exercises' not in requested_expansions(self.request):
+                return queryset
+        return queryset.prefetch_related('exercises__exercise__media_files')
 
     def get_serializer_class(self):
         if self.action == 'create':
             return WorkoutCreateSerializer
+        if self.action == 'list':
+            return WorkoutListSerializer
         return WorkoutSerializer
     
+    def list(self, request, *args, **kwargs):
+        """Apply sets logged since the last read, then list the workouts"""
+        flush_logged_sets(WorkoutExercise.objects.filter(workout__user=request.user))
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Apply sets logged since the last read, then show the workout"""
+        flush_logged_sets(
+            WorkoutExercise.objects.filter(workout_id=kwargs['pk'], workout__user=request.user)
+        )
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         """Override create to ensure it works properly"""
         serializer = self.get_serializer(data=request.data)
@@ -417,23 +566,23 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         # Update workout fields
         serializer = self.get_serializer(instance, data=workout_data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
         
-        # Update exercises if provided
-        if exercises_data is not None:
-            # Delete existing exercises
-            instance.exercises.all().delete()
+        if exercises_data is not None and not isinstance(exercises_data, list):
+            return Response(
+                {'error': 'exercises must be a list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Apply calorie changes of all exercise rows in one pass at the end
+        with defer_calorie_updates():
+            self.perform_update(serializer)
             
-            # Create new exercises
-            for exercise_data in exercises_data:
-                WorkoutExercise.objects.create(
-                    workout=instance,
-                    exercise_id=exercise_data.get('exercise_id'),
-                    order=exercise_data.get('order', 1),
-                    planned_sets=exercise_data.get('planned_sets', 3),
-                    planned_reps=exercise_data.get('planned_reps', 10),
-                    planned_weight_kg=exercise_data.get('planned_weight_kg', 0)
-                )
+            # Insert, update and delete only the exercises that changed
+            if exercises_data is not None:
+                try:
+                    WorkoutExerciseService.sync(instance, exercises_data)
+                except DjangoValidationError as e:
+                    raise ValidationError({'exercises': e.message_dict})
         
         # Refresh instance to get updated exercises
         instance.refresh_from_db()
@@ -463,8 +612,14 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cache_user_response
     def stats(self, request):
-        """Get workout statistics"""
+        """
+        Get workout statistics
+
+        One conditional aggregate over the workouts and one grouped query
+        over their exercises; cached until the user's data changes.
+        """
         queryset = self.get_queryset()
         
         # Date range filter
@@ -476,44 +631,45 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         if end_date:
             queryset = queryset.filter(date__lte=end_date)
         
-        # Calculate stats
-        total_workouts = queryset.count()
-        completed_workouts = queryset.filter(completed=True).count()
+        # This week and month
+        today = timezone.now().date()
+        start_of_week = today - timedelta(days=today.weekday())
+        start_of_month = today.replace(day=1)
         
         aggregates = queryset.aggregate(
+            total_workouts=Count('id'),
+            completed_workouts=Count('id', filter=Q(completed=True)),
+            workouts_this_week=Count('id', filter=Q(date__gte=start_of_week)),
+            workouts_this_month=Count('id', filter=Q(date__gte=start_of_month)),
             total_duration=Sum('duration_minutes'),
             total_calories=Sum('total_calories_burned'),
             avg_duration=Avg('duration_minutes')
         )
+        total_workouts = aggregates['total_workouts']
+        completed_workouts = aggregates['completed_workouts']
+        
+        # Exercise usage per (name, type) over the same workouts, split into
+        # both rankings below
+        usage = WorkoutExercise.objects.filter(
+            workout__in=queryset.values('pk')
+        ).values('exercise__name', 'exercise__exercise_type').annotate(
+            count=Count('id')
+        ).order_by()
         
-        # This week and month
-        today = timezone.now().date()
-        start_of_week = today - timedelta(days=today.weekday())
-        start_of_month = today.replace(day=1)
-        
-        workouts_this_week = queryset.filter(date__gte=start_of_week).count()
-        workouts_this_month = queryset.filter(date__gte=start_of_month).count()
+        name_counts, type_counts = {}, {}
+        for row in usage:
+            name_counts[row['exercise__name']] = name_counts.get(row['exercise__name'], 0) + row['count']
+            exercise_type = row['exercise__exercise_type']
+            type_counts[exercise_type] = type_counts.get(exercise_type, 0) + row['count']
         
         # Most used exercises
-        exercise_counts = WorkoutExercise.objects.filter(
-            workout__user=request.user
-        ).values('exercise__name').annotate(
-            count=Count('id')
-        ).order_by('-count')[:5]
-        
         most_used_exercises = [
-            {'name': e['exercise__name'], 'count': e['count']}
-            for e in exercise_counts
+            {'name': name, 'count': count}
+            for name, count in sorted(name_counts.items(), key=lambda item: -item[1])[:5]
         ]
         
         # Favorite exercise type
-        type_counts = WorkoutExercise.objects.filter(
-            workout__user=request.user
-        ).values('exercise__exercise_type').annotate(
-            count=Count('id')
-        ).order_by('-count').first()
-        
-        favorite_type = type_counts['exercise__exercise_type'] if type_counts else 'N/A'
+        favorite_type = max(type_counts, key=type_counts.get) if type_counts else 'N/A'
         
         stats = {
             'total_workouts': total_workouts,
@@ -522,8 +678,8 @@ class WorkoutViewSet(viewsets.ModelViewSet):
             'total_calories_burned': aggregates['total_calories'] or 0,
             'average_duration_minutes': aggregates['avg_duration'] or 0,
             'completion_rate': (completed_workouts / total_workouts * 100) if total_workouts > 0 else 0,
-            'workouts_this_week': workouts_this_week,
-            'workouts_this_month': workouts_this_month,
+            'workouts_this_week': aggregates['workouts_this_week'],
+            'workouts_this_month': aggregates['workouts_this_month'],
             'favorite_exercise_type': favorite_type,
             'most_used_exercises': most_used_exercises
         }
@@ -533,7 +689,8 @@ class WorkoutViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
-        """Mark workout as completed"""
+        """Mark workout as completed, applying its logged sets first"""
+        flush_logged_sets(WorkoutExercise.objects.filter(workout_id=pk, workout__user=request.user))
         workout = self.get_object()
         workout.completed = True
         
@@ -545,6 +702,47 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(workout)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def log_set(self, request, pk=None):
+        """
+        Append or correct one set of a workout exercise
+        POST /api/workouts/workouts/{id}/log_set/
+        {"workout_exercise_id", "set_key", "set_index"?, "revision"?, "reps", "weight_kg", "rpe", "duration_seconds"}
+
+        Idempotent per set_key: repeating a request changes nothing, and
+        the same key with a higher revision corrects the set. Without
+        set_index the set is appended. The exercise's lists and calorie
+        totals are rebuilt from the logged sets when the workout is next
+        read or completed.
+        """
+        serializer = WorkoutSetLogSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            workout_set, created = log_set(request.user, pk, serializer.validated_data)
+        except WorkoutExercise.DoesNotExist:
+            return Response(
+                {'error': 'Workout exercise not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except SetConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return Response(
+            {
+                'id': workout_set.pk,
+                'workout_exercise_id': workout_set.workout_exercise_id,
+                'set_key': workout_set.set_key,
+                'set_index': workout_set.set_index,
+                'revision': workout_set.revision,
+                'reps': workout_set.reps,
+                'weight_kg': workout_set.weight_kg,
+                'rpe': workout_set.rpe,
+                'duration_seconds': workout_set.duration_seconds,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
     @action(detail=True, methods=['post'])
     def add_exercise(self, request, pk=None):
         """Add an exercise to the workout"""
@@ -574,7 +772,11 @@ class WorkoutScheduleViewSet(viewsets.ModelViewSet):
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
         
-        return queryset.select_related('workout_plan')
+        return queryset.select_related('workout_plan').prefetch_related(
+            'workout_plan__plan_days__exercises__exercise__media_files'
+        ).annotate(
+            completed_sessions=Count('sessions', filter=Q(sessions__completed=True))
+        )
 
     @action(detail=False, methods=['get'], url_path='active')
     def active(self, request):
@@ -585,6 +787,63 @@ class WorkoutScheduleViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response(None, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Get the scheduled sessions in a date range
+        GET /api/workouts/schedules/calendar/?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+
+        Defaults to the current week (Monday to Sunday). Sessions of
+        inactive schedules are included only with ?all=true.
+        """
+        today = timezone.now().date()
+        try:
+            start_date = (
+                datetime.strptime(request.query_params['start_date'], '%Y-%m-%d').date()
+                if request.query_params.get('start_date') else today - timedelta(days=today.weekday())
+            )
+            end_date = (
+                datetime.strptime(request.query_params['end_date'], '%Y-%m-%d').date()
+                if request.query_params.get('end_date') else start_date + timedelta(days=6)
+            )
+        except ValueError:
+            return Response(
+                {'error': 'Invalid range. Use start_date/end_date as YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= (end_date - start_date).days < 366:
+            return Response(
+                {'error': 'Range must cover 1 to 366 days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        sessions = WorkoutScheduleSession.objects.filter(
+            user=request.user, date__range=(start_date, end_date)
+        ).select_related('plan_day').order_by('date', 'schedule_id')
+        if request.query_params.get('all') != 'true':
+            sessions = sessions.filter(schedule__is_active=True)
+
+        results = [
+            {
+                'date': session.date,
+                'schedule_id': session.schedule_id,
+                'day_number': session.day_number,
+                'name': session.plan_day.name if session.plan_day else None,
+                'rest_day': session.rest_day,
+                'workout_id': session.workout_id,
+                'completed': session.completed,
+            }
+            for session in sessions
+        ]
+        planned = [session for session in results if not session['rest_day']]
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            'planned_sessions': len(planned),
+            'completed_sessions': sum(session['completed'] for session in planned),
+            'sessions': results,
+        })
+
     @action(detail=True, methods=['post'])
     def deactivate(self, request, pk=None):
         """Deactivate a workout schedule"""
@@ -604,7 +863,7 @@ class FavoriteExerciseViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return FavoriteExercise.objects.filter(
             user=self.request.user
-        ).select_related('exercise')
+        ).select_related('exercise').prefetch_related('exercise__media_files')
 
     @action(detail=False, methods=['post'])
     def toggle(self, request):
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -31,6 +32,7 @@ INSTALLED_APPS = [
     'django_extensions',
     
     # Local apps
+    'apps.core',
     'apps.users',
     'apps.measurements',
     'apps.nutrition',
@@ -82,6 +84,19 @@ DATABASES = {
     }
 }
 
+# Cache - local memory by default; set CACHE_BACKEND/CACHE_LOCATION for Redis or file caches.
+# Cached entries are keyed by versions stored in the database (apps.core.versions),
+# so per-process caches never serve data another worker has changed.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='fitnutrition'),
+    }
+}
+
+# Lifetime (seconds) of cached per-user analytics/recommendation responses
+USER_RESPONSE_CACHE_TIMEOUT = config('USER_RESPONSE_CACHE_TIMEOUT', default=3600, cast=int)
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
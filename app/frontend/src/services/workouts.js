@@ -1,10 +1,26 @@
 import api from './api';
 
+// List endpoints return compact rows; request the fields the workouts page shows
+const EXERCISE_LIST_FIELDS = [
+  'id', 'name', 'description', 'exercise_type', 'difficulty', 'equipment',
+  'primary_muscles', 'secondary_muscles', 'instructions', 'tips',
+  'calories_per_minute', 'met_value', 'video_url', 'image_url', 'image',
+  'media_files', 'is_custom', 'created_by', 'is_favorited',
+].join(',');
+
+const PLAN_LIST_FIELDS = [
+  'id', 'name', 'description', 'goal', 'difficulty', 'duration_weeks',
+  'days_per_week', 'overview', 'requirements', 'is_custom', 'created_by',
+  'plan_days', 'total_days', 'is_scheduled',
+].join(',');
+
 const workoutsService = {
   // Exercises
   exercises: {
     getAll: async (params = {}) => {
-      const response = await api.get('/workouts/exercises/', { params });
+      const response = await api.get('/workouts/exercises/', {
+        params: { fields: EXERCISE_LIST_FIELDS, ...params },
+      });
       return response.data;
     },
     getById: async (id) => {
@@ -40,7 +56,9 @@ const workoutsService = {
   // Workout Plans
   workoutPlans: {
     getAll: async (params = {}) => {
-      const response = await api.get('/workouts/workout-plans/', { params });
+      const response = await api.get('/workouts/workout-plans/', {
+        params: { fields: PLAN_LIST_FIELDS, ...params },
+      });
       return response.data;
     },
     getById: async (id) => {
@@ -68,7 +86,9 @@ const workoutsService = {
   // Workouts
   workouts: {
     getAll: async (params = {}) => {
-      const response = await api.get('/workouts/workouts/', { params });
+      const response = await api.get('/workouts/workouts/', {
+        params: { expand: 'exercises', ...params },
+      });
       return response.data;
     },
     getById: async (id) => {